@@ -0,0 +1,103 @@
+"""Run the benchmark suite and compare it against the stored baseline.
+
+    python -m benchmarks                          # run everything, compare to baseline
+    python -m benchmarks --groups micro,macro     # subset
+    python -m benchmarks --output results.json    # save results
+    python -m benchmarks --update-baseline        # record a new baseline
+    python -m benchmarks --runs 5                 # best of 5 passes (default 3)
+
+Exits with status 1 when a benchmark is slower than the baseline by more than
+``--threshold`` (default 25%), so it can gate a deploy. Benchmarks that set
+their own ``tolerance`` (the sub-microsecond micro ones, which jitter more
+than that on an idle machine) use it instead when it is larger.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks.suite import BENCHMARKS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def run(groups, scale: float, runs: int = 1) -> dict:
+    """Best of ``runs`` passes per benchmark; passes are interleaved so a noisy moment hits one pass only."""
+    selected = [bench for bench in BENCHMARKS if not groups or bench.group in groups]
+    results = {}
+    for _ in range(max(1, runs)):
+        for bench in selected:
+            result = bench.run(scale)
+            best = results.get(bench.name)
+            if best is None or result["min"] < best["min"]:
+                results[bench.name] = result
+    for name, result in results.items():
+        print(f"{name:<36} {result['min'] * 1e6:>12.2f} us/op", flush=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return (name, ratio) for every benchmark slower than baseline * (1 + threshold)."""
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline us':>12} {'current us':>12} {'ratio':>7}")
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if not reference:
+            print(f"{name:<36} {'-':>12} {result['min'] * 1e6:>12.2f} {'new':>7}")
+            continue
+        ratio = result["min"] / reference["min"]
+        allowed = max(threshold, result.get("tolerance") or 0.0)
+        flag = "  REGRESSION" if ratio > 1 + allowed else ""
+        print(f"{name:<36} {reference['min'] * 1e6:>12.2f} {result['min'] * 1e6:>12.2f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", default="", help="comma-separated groups to run (micro, macro, api)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts (e.g. 0.1 for a smoke run)")
+    parser.add_argument("--runs", type=int, default=3, help="passes over the suite; the best one of each benchmark counts")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    groups = {g for g in args.groups.split(",") if g}
+    current = run(groups, args.scale, args.runs)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
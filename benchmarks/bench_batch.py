@@ -0,0 +1,67 @@
+"""Compare BatchBattle against the object-based Battle.
+
+Checks that both engines agree on winners and turn counts for a set of
+randomized rosters, then times Knight-vs-Knight matchups on each engine.
+
+    python -m benchmarks.bench_batch [battles]
+"""
+import random
+import sys
+import time
+
+from core.model.battle.batch_battle import BatchBattle
+from core.model.battle.battle import Battle, BattleState
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+MAX_TURNS = 50
+
+
+def random_team(rng: random.Random, size: int, element: CharacterElement):
+    return [Knight(f"Knight {i}", rng.randint(1, 20), element, speed=rng.randint(40, 200))
+            for i in range(size)]
+
+
+def play(battle: Battle, max_turns: int = MAX_TURNS) -> Battle:
+    turns = 0
+    while battle.state == BattleState.ONGOING and turns < max_turns:
+        battle.next_turn()
+        turns += 1
+    return battle
+
+
+def check_parity(samples: int = 500, seed: int = 0):
+    rng = random.Random(seed)
+    matchups = [(random_team(rng, rng.randint(1, 5), CharacterElement.FIRE),
+                 random_team(rng, rng.randint(1, 5), CharacterElement.WATER))
+                for _ in range(samples)]
+    batch = BatchBattle.from_teams(matchups).run(MAX_TURNS)
+    for i, ((team_a, team_b), outcome) in enumerate(zip(matchups, batch.outcomes())):
+        battle = play(Battle(team_a, team_b))
+        expected = (battle.state, battle.current_turn)
+        if outcome != expected:
+            raise AssertionError(f"matchup {i}: batch={outcome} object={expected}")
+    print(f"parity: {samples} randomized matchups agree")
+
+
+def bench(battles: int):
+    matchups = [([Knight("A", 5, CharacterElement.FIRE)], [Knight("B", 5, CharacterElement.WATER)])
+                for _ in range(battles)]
+
+    start = time.perf_counter()
+    for team_a, team_b in matchups:
+        play(Battle(team_a, team_b))
+    object_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    BatchBattle.from_teams(matchups).run(MAX_TURNS)
+    batch_time = time.perf_counter() - start
+
+    print(f"{battles} Knight-vs-Knight battles")
+    print(f"  Battle       {object_time:8.3f}s  ({battles / object_time:10.0f} battles/s)")
+    print(f"  BatchBattle  {batch_time:8.3f}s  ({battles / batch_time:10.0f} battles/s)")
+
+
+if __name__ == "__main__":
+    check_parity()
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,37 @@
+"""Cost of Battle.fork against deepcopy and a pickle round-trip.
+
+A search-based AI forks the battle once per explored branch, so the snapshot
+has to be far cheaper than playing a turn. Battles are measured mid-fight,
+with burns ticking and cooldowns allocated.
+
+    python -m benchmarks.bench_fork
+"""
+import copy
+import pickle
+import timeit
+
+from benchmarks.suite import burning_battle
+
+SIZES = (1, 5, 25, 100)
+NUMBER = 200
+
+
+def mid_battle(size: int):
+    battle = burning_battle(size)
+    for _ in range(4 * size):
+        battle.step()
+    return battle
+
+
+def cost(fn, number: int = NUMBER) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+if __name__ == "__main__":
+    print(f"{'size':>9} {'fork us':>9} {'deepcopy us':>12} {'pickle us':>10} {'speedup':>8}")
+    for size in SIZES:
+        battle = mid_battle(size)
+        fork = cost(battle.fork)
+        deep = cost(lambda: copy.deepcopy(battle))
+        pickled = cost(lambda: pickle.loads(pickle.dumps(battle, pickle.HIGHEST_PROTOCOL)))
+        print(f"{f'{size}v{size}':>9} {fork * 1e6:>9.1f} {deep * 1e6:>12.1f} {pickled * 1e6:>10.1f} {deep / fork:>7.0f}x")
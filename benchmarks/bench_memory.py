@@ -0,0 +1,29 @@
+"""Per-battle memory footprint of live battles held by BattleService.
+
+    python -m benchmarks.bench_memory [battles] [team_size]
+"""
+import gc
+import sys
+import tracemalloc
+
+from core.service.battle_service import BattleService
+
+
+def per_battle_bytes(battles: int, team_size: int) -> float:
+    service = BattleService()
+    names = [f"Knight {i}" for i in range(team_size)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(battles):
+        service.create_battle(names, names)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / battles
+
+
+if __name__ == "__main__":
+    battles = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    team_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    size = per_battle_bytes(battles, team_size)
+    print(f"{battles} battles of {team_size}v{team_size}: {size:,.0f} bytes per battle")
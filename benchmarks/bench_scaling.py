@@ -0,0 +1,47 @@
+"""Cost per turn of Battle against roster size.
+
+Team membership, alive tracking and the turn scheduler are indexed, so an
+action should cost roughly O(log n) rather than several passes over both
+teams. ``step`` skips rendering, ``resolve`` plays a real raid to the end.
+
+    python -m benchmarks.bench_scaling
+"""
+import time
+
+from core.model.battle.battle import Battle, BattleState
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+SIZES = (1, 10, 100, 1000, 5000)
+TURNS = 5000
+SPEEDS = (70, 80, 90, 100)  # a handful of distinct speeds, as in real rosters
+
+
+def team(prefix: str, size: int, element: CharacterElement, health: int):
+    return [Knight(f"{prefix}{i}", 5, element, speed=SPEEDS[i % len(SPEEDS)], health=health) for i in range(size)]
+
+
+def per_turn_cost(size: int, turns: int = TURNS) -> float:
+    # Huge health pools keep the battle going for the whole measurement
+    battle = Battle(team("A", size, CharacterElement.FIRE, 10 ** 9), team("B", size, CharacterElement.WATER, 10 ** 9))
+    start = time.perf_counter()
+    for _ in range(turns):
+        battle.step()
+    elapsed = time.perf_counter() - start
+    assert battle.state == BattleState.ONGOING
+    return elapsed / turns
+
+
+def raid(size: int):
+    """Seconds and turns needed to resolve a size-v-size battle with regular health."""
+    battle = Battle(team("A", size, CharacterElement.FIRE, 500), team("B", size, CharacterElement.WATER, 500))
+    start = time.perf_counter()
+    outcome = battle.resolve()
+    return time.perf_counter() - start, outcome.turns
+
+
+if __name__ == "__main__":
+    print(f"{'size':>9} {'us/turn':>9} {'raid turns':>11} {'raid s':>8}")
+    for size in SIZES:
+        elapsed, turns = raid(size)
+        print(f"{f'{size}v{size}':>9} {per_turn_cost(size) * 1e6:>9.1f} {turns:>11} {elapsed:>8.2f}")
@@ -0,0 +1,36 @@
+"""Cost per turn of Battle.next_turn as the speed/threshold gap widens.
+
+Before the event-driven scheduler, a character with speed ``s`` needed about
+``TURN_METER_THRESHOLD / s`` loop passes per action. The scheduler jumps
+straight to the next actor, so the time per turn should stay flat.
+
+    python -m benchmarks.bench_scheduler
+"""
+import time
+
+from core.model.battle.battle import Battle, BattleState
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+SPEEDS = (1000, 200, 80, 20, 5, 1)
+TURNS = 2000
+
+
+def per_turn_cost(speed: int, turns: int = TURNS) -> float:
+    # Huge health pools keep the battle going for the whole measurement
+    team_a = [Knight(f"A{i}", 5, CharacterElement.FIRE, speed=speed, health=10 ** 9) for i in range(3)]
+    team_b = [Knight(f"B{i}", 5, CharacterElement.WATER, speed=speed + 1, health=10 ** 9) for i in range(3)]
+    battle = Battle(team_a, team_b)
+    start = time.perf_counter()
+    for _ in range(turns):
+        battle.next_turn()
+    elapsed = time.perf_counter() - start
+    assert battle.state == BattleState.ONGOING
+    return elapsed / turns
+
+
+if __name__ == "__main__":
+    print(f"{'speed':>6} {'ticks/turn':>11} {'us/turn':>9}")
+    for speed in SPEEDS:
+        ticks = -(-Battle.TURN_METER_THRESHOLD // speed)
+        print(f"{speed:>6} {ticks:>11} {per_turn_cost(speed) * 1e6:>9.1f}")
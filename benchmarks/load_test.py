@@ -0,0 +1,64 @@
+"""Concurrent load test of the REST API through an in-process ASGI client.
+
+Each simulated client creates a battle, plays turns one by one and then
+autoplays it, while all clients run concurrently. Half of the clients share a
+single battle to exercise the per-battle lock. Reports p50/p99 latency per
+endpoint. Requires httpx.
+
+    python -m benchmarks.load_test [clients] [turns_per_client]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from rest.app import app
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def timed(latencies, name, request):
+    start = time.perf_counter()
+    response = await request
+    latencies[name].append(time.perf_counter() - start)
+    return response
+
+
+async def client_session(client, latencies, battle_id, turns: int):
+    if battle_id is None:
+        response = await timed(latencies, "POST /battles",
+                               client.post("/battles", json={"team_a": ["A1", "A2", "A3"], "team_b": ["B1", "B2", "B3"]}))
+        battle_id = response.json()["battle_id"]
+    for _ in range(turns):
+        await timed(latencies, "POST /turn", client.post(f"/battles/{battle_id}/turn"))
+    await timed(latencies, "POST /autoplay", client.post(f"/battles/{battle_id}/autoplay"))
+    await timed(latencies, "GET /battles/{id}", client.get(f"/battles/{battle_id}"))
+
+
+async def run(clients: int, turns: int):
+    latencies = defaultdict(list)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        shared = (await client.post("/battles", json={"team_a": ["S1"] * 3, "team_b": ["S2"] * 3})).json()["battle_id"]
+        start = time.perf_counter()
+        await asyncio.gather(*(client_session(client, latencies, shared if i % 2 else None, turns)
+                               for i in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{clients} clients, {total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    print(f"{'endpoint':<20} {'count':>6} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for name, samples in latencies.items():
+        print(f"{name:<20} {len(samples):>6} {percentile(samples, 50) * 1e3:>8.2f} "
+              f"{percentile(samples, 99) * 1e3:>8.2f} {statistics.mean(samples) * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+                    int(sys.argv[2]) if len(sys.argv) > 2 else 5))
@@ -0,0 +1,224 @@
+"""Benchmark definitions for the engine and API hot paths.
+
+Every benchmark times ``number`` calls of ``fn(state)`` per repetition, where
+``state`` comes from a fresh ``setup()`` call that is not timed. Results are
+reported in seconds per operation. The fastest repetition is what gets
+compared against the baseline, as it is the least affected by machine noise.
+``tolerance`` overrides the allowed slowdown for benchmarks too short to time
+within the default threshold.
+"""
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core.model.battle.batch_battle import BatchBattle
+from core.model.battle.battle import Battle
+from core.model.battle.battle_character import BattleCharacter
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+from core.service.battle_service import BattleService
+
+BIG_HP = 10 ** 9  # keeps battles alive for the whole measurement
+
+
+class Benchmark:
+    def __init__(self, name: str, group: str, fn: Callable[[Any], Any],
+                 setup: Optional[Callable[[], Any]] = None, number: int = 1000, repeat: int = 7,
+                 tolerance: Optional[float] = None):
+        self.name = name
+        self.group = group
+        self.fn = fn
+        self.setup = setup or (lambda: None)
+        self.number = number
+        self.repeat = repeat
+        self.tolerance = tolerance
+
+    def run(self, scale: float = 1.0) -> Dict:
+        number = max(1, int(self.number * scale))
+        timings: List[float] = []
+        for _ in range(self.repeat):
+            state = self.setup()
+            fn = self.fn
+            start = time.perf_counter()
+            for _ in range(number):
+                fn(state)
+            timings.append((time.perf_counter() - start) / number)
+        median = statistics.median(timings)
+        result = {
+            "group": self.group,
+            "median": median,
+            "min": min(timings),
+            "ops_per_sec": 1 / median if median else None,
+            "number": number,
+            "repeat": self.repeat,
+        }
+        if self.tolerance is not None:
+            result["tolerance"] = self.tolerance
+        return result
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(group: str, number: int = 1000, repeat: int = 7, setup: Optional[Callable[[], Any]] = None,
+              tolerance: Optional[float] = None):
+    def register(fn):
+        BENCHMARKS.append(Benchmark(f"{group}.{fn.__name__}", group, fn, setup, number, repeat, tolerance))
+        return fn
+    return register
+
+
+# ---------- Fixtures ----------
+
+def team(prefix: str, size: int, element: CharacterElement, **stats) -> List[Knight]:
+    return [Knight(f"{prefix}{i}", 5, element, **stats) for i in range(size)]
+
+
+def endless_battle(size: int = 5) -> Battle:
+    return Battle(team("A", size, CharacterElement.FIRE, health=BIG_HP),
+                  team("B", size, CharacterElement.WATER, health=BIG_HP))
+
+
+def started_battle(size: int = 5) -> Battle:
+    battle = endless_battle(size)
+    battle.next_turn()
+    return battle
+
+
+def burning_battle(size: int = 5) -> Battle:
+    """Every character burns for 1 per turn and a few stuns keep expiring."""
+    battle = endless_battle(size)
+    for bc in battle.roster:
+        bc.add_status_effect("burn", BIG_HP, 1)
+    return battle
+
+
+def service_battle(size: int):
+    service = BattleService()
+    names = [f"K{i}" for i in range(size)]
+    battle_id, _ = service.create_battle(names, names)
+    return service, battle_id
+
+
+# ---------- Micro ----------
+
+@benchmark("micro", number=2000, setup=endless_battle)
+def next_turn(battle):
+    battle.next_turn()
+
+
+@benchmark("micro", number=2000, setup=lambda: endless_battle(1000))
+def next_turn_1000v1000(battle):
+    battle.next_turn()
+
+
+@benchmark("micro", number=2000, setup=started_battle)
+def execute_turn(battle):
+    battle.execute_turn(0)
+
+
+@benchmark("micro", number=20000, tolerance=0.5,
+           setup=lambda: BattleCharacter(Knight("Target", 5, CharacterElement.FIRE, health=BIG_HP)))
+def take_damage(bc):
+    bc.take_damage(1)
+
+
+@benchmark("micro", number=2000, setup=burning_battle)
+def next_turn_burning(battle):
+    battle.roster[battle.current_turn % len(battle.roster)].add_status_effect("stun", 3)
+    battle.next_turn()
+
+
+@benchmark("micro", number=20000, setup=burning_battle)
+def fork_5v5(battle):
+    battle.fork()
+
+
+@benchmark("micro", number=20000, tolerance=0.5)
+def knight_construction(_):
+    Knight("Knight", 5, CharacterElement.FIRE)
+
+
+@benchmark("micro", number=2000, setup=started_battle)
+def get_battle_summary(battle):
+    battle.get_battle_summary()
+
+
+# ---------- Macro ----------
+
+@benchmark("macro", number=1, repeat=200, setup=lambda: service_battle(1))
+def autoplay_1v1(state):
+    service, battle_id = state
+    service.autoplay(battle_id, max_turns=10 ** 6)
+
+
+@benchmark("macro", number=1, repeat=50, setup=lambda: service_battle(5))
+def autoplay_5v5(state):
+    service, battle_id = state
+    service.autoplay(battle_id, max_turns=10 ** 6)
+
+
+@benchmark("macro", number=1, repeat=5, setup=lambda: service_battle(100))
+def autoplay_100v100(state):
+    service, battle_id = state
+    service.autoplay(battle_id, max_turns=10 ** 6)
+
+
+@benchmark("macro", number=200, setup=lambda: service_battle(5))
+def resolve_cached_5v5(state):
+    service, _ = state
+    names = [f"K{i}" for i in range(5)]
+    service.resolve(names, names)
+
+
+@benchmark("macro", number=1, repeat=5,
+           setup=lambda: [(team("A", 5, CharacterElement.FIRE), team("B", 5, CharacterElement.WATER))] * 1000)
+def batch_resolve_1000x5v5(matchups):
+    BatchBattle.from_teams(matchups).run()
+
+
+# ---------- API ----------
+
+_client = None
+
+
+def api_client():
+    """In-process client for rest.app (no spill file unless ACW_STORE_PATH is set)."""
+    global _client
+    if _client is None:
+        from fastapi.testclient import TestClient
+        from rest.app import app
+        _client = TestClient(app)
+    return _client
+
+
+def api_battle(size: int = 5):
+    client = api_client()
+    names = [f"K{i}" for i in range(size)]
+    battle_id = client.post("/battles", json={"team_a": names, "team_b": names}).json()["battle_id"]
+    return client, battle_id
+
+
+@benchmark("api", number=200, setup=api_client)
+def post_battles(client):
+    client.post("/battles", json={"team_a": ["A1", "A2"], "team_b": ["B1", "B2"]})
+
+
+BULK_SPECS = [{"team_a": ["A1", "A2"], "team_b": ["B1", "B2"]}] * 1000
+
+
+@benchmark("api", number=1, repeat=10, setup=api_client)
+def post_battles_bulk_1000(client):
+    client.post("/battles/bulk", json=BULK_SPECS)
+
+
+@benchmark("api", number=10, repeat=20, setup=api_battle)
+def post_turn(state):
+    client, battle_id = state
+    client.post(f"/battles/{battle_id}/turn")
+
+
+@benchmark("api", number=1, repeat=50, setup=api_battle)
+def post_autoplay(state):
+    client, battle_id = state
+    client.post(f"/battles/{battle_id}/autoplay")
@@ -0,0 +1,43 @@
+"""Print a battle from its binary recording.
+
+    python cli/replay.py battle.acwr              # the whole battle
+    python cli/replay.py battle.acwr --turn 40    # state at turn 40, from the nearest keyframe
+
+Recordings come from ``GET /battles/{battle_id}/recording`` on battles created
+with ``record=true``.
+"""
+import argparse
+import json
+import os
+import sys
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.model.battle.recording import Recording
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="recording file")
+    parser.add_argument("--turn", type=int, help="seek to this turn and print the battle summary there")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.recording, "rb") as f:
+            recording = Recording.from_bytes(f.read())
+        battle = recording.seek(args.turn) if args.turn is not None else recording.replay()
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.turn is None:
+        for line in battle.battle_log.render():
+            print(line)
+    summary = battle.get_battle_summary()
+    del summary["log"]
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
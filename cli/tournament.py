@@ -0,0 +1,65 @@
+"""Run an offline tournament between teams read from a JSONL file.
+
+    python cli/tournament.py teams.jsonl -o results.jsonl
+    python cli/tournament.py teams.jsonl -o results.csv --format swiss --rounds 7
+
+Each line of the teams file is ``{"id": "t1", "names": ["A", "B"], "level": 5}``.
+Results are appended to the output as they complete; rerunning the same
+command after an interruption resumes where it stopped. Pass --overwrite to
+start over in an existing output instead.
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.service.tournament import FORMATS, Tournament, load_teams, standings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("teams", help="JSONL file with one team per line")
+    parser.add_argument("-o", "--output", required=True, help="results file (.jsonl or .csv), also used to resume")
+    parser.add_argument("--format", choices=FORMATS, default="round-robin")
+    parser.add_argument("--rounds", type=int, help="Swiss rounds (default: log2 of the team count)")
+    parser.add_argument("--max-turns", type=int, default=1000, help="turn limit per battle; unfinished battles are draws")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="matches per worker task")
+    parser.add_argument("--overwrite", action="store_true", help="discard an existing output instead of resuming it")
+    parser.add_argument("--top", type=int, default=10, help="standings rows to print at the end")
+    args = parser.parse_args(argv)
+
+    try:
+        teams = load_teams(args.teams)
+        tournament = Tournament(teams, args.format, args.rounds, args.max_turns, args.workers, args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    played = 0
+    start = time.perf_counter()
+
+    def progress(_result):
+        nonlocal played
+        played += 1
+        if played % 1000 == 0:
+            print(f"⚔️ {played} matches played ({played / (time.perf_counter() - start):.0f}/s)", file=sys.stderr)
+
+    try:
+        results = tournament.run(args.output, on_result=progress, overwrite=args.overwrite)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(results)} results in {args.output} ({played} played now, {elapsed:.1f}s)")
+    print(f"\n{'#':>3} {'team':<20} {'pts':>7} {'W':>5} {'D':>5} {'L':>5}")
+    for rank, row in enumerate(standings(teams, results)[:args.top], 1):
+        print(f"{rank:>3} {row['team']:<20} {row['points']:>7.1f} {row['wins']:>5} {row['draws']:>5} {row['losses']:>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
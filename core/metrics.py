@@ -0,0 +1,143 @@
+"""Opt-in counters and histograms exposed in the Prometheus text format.
+
+Instrumentation is disabled unless ``ACW_METRICS`` is set to 1/true/yes. Hot
+paths guard every update with ``if REGISTRY.enabled:`` so that, when disabled,
+the only cost is one attribute check. Counter updates are not locked; under
+heavy thread contention a few increments may be lost, which is acceptable for
+monitoring.
+"""
+import bisect
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+                for labels, value in sorted(self.values.items())]
+
+
+class Gauge(Metric):
+    """Gauge whose value is read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], Union[float, Dict[LabelValues, float]]],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        value = self.read()
+        values = value if isinstance(value, dict) else {(): value}
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {v}" for labels, v in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, read: Callable, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, read, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry(enabled=os.environ.get("ACW_METRICS", "").lower() in ("1", "true", "yes"))
+
+TURNS = REGISTRY.counter("acw_turns_total", "Turns executed")
+METER_TICKS = REGISTRY.counter("acw_meter_ticks_total", "Turn-meter ticks advanced by Battle.next_turn")
+ABILITY_EXECUTIONS = REGISTRY.counter("acw_ability_executions_total", "Ability executions", ("ability",))
+# Only battles kept by the service; resolves, simulations and forks are not counted
+BATTLES_CREATED = REGISTRY.counter("acw_battles_created_total", "Stored battles created")
+BATTLES_FINISHED = REGISTRY.counter("acw_battles_finished_total", "Stored battles finished by end state", ("state",))
+HTTP_LATENCY = REGISTRY.histogram("acw_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
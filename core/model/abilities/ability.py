@@ -1,7 +1,6 @@
 from __future__ import annotations
-from typing import List, Optional, Tuple, Union
+from typing import List, Optional, Union
 from enum import Enum
-import random
 
 from core.model.characters.character import Character
 from core.model.battle.battle_character import BattleCharacter
@@ -16,41 +15,53 @@ class TargetType(Enum):
     ADJACENT_ALLIES = "adjacent_allies"
 
 class Ability:
+    """Stateless ability definition.
+
+    A single instance is shared by every character that knows the ability, so
+    per-battle state such as the remaining cooldown lives on BattleCharacter.
+    """
+    __slots__ = ("name", "description", "cooldown", "target_type")
+
     def __init__(self, 
                  name: str, 
                  description: str,
                  cooldown: int = 0,
-                 current_cooldown: int = 0,
                  target_type: TargetType = TargetType.SINGLE_ENEMY):
         self.name = name
         self.description = description
         self.cooldown = cooldown
-        self.current_cooldown = current_cooldown
         self.target_type = target_type
     
-    def execute(self, caster: Union[Character, BattleCharacter], target: Optional[Union[Character, BattleCharacter]] = None,
-                allies: List[Union[Character, BattleCharacter]] = None, enemies: List[Union[Character, BattleCharacter]] = None) -> str:
-        """Execute the ability"""
-        if self.current_cooldown > 0:
-            return f"{self.name} is on cooldown! ({self.current_cooldown} turns remaining)"
+    # Message rendered from the battle log; receives caster, target, ability and amount
+    message = "{caster} uses {ability}!"
+    # Whether the amount returned by execute() is damage (tallied by Battle.resolve)
+    deals_damage = True
 
-        # Set cooldown
-        self.current_cooldown = self.cooldown
+    def execute(self, caster: Union[Character, BattleCharacter], target: Optional[Union[Character, BattleCharacter]] = None,
+                allies: List[Union[Character, BattleCharacter]] = None, enemies: List[Union[Character, BattleCharacter]] = None) -> Optional[int]:
+        """Execute the ability and return the amount it applied (damage, healing...).
 
+        Returns None when the ability could not be applied (e.g. no target).
+        Cooldowns are checked by the caller (see BattleCharacter.use_ability).
+        """
         # Default behaviour: call _apply_effect which subclasses should override.
         return self._apply_effect(caster, target, allies, enemies)
     
     def _apply_effect(self, caster: Union[Character, BattleCharacter], target: Optional[Union[Character, BattleCharacter]],
-                     allies: List[Union[Character, BattleCharacter]], enemies: List[Union[Character, BattleCharacter]]) -> str:
-        """Override this method with specific ability logic. Default message works with either
-        Character or BattleCharacter caster types."""
-        caster_name = caster.character.name if isinstance(caster, BattleCharacter) else getattr(caster, 'name', 'Unknown')
-        return f"{caster_name} uses {self.name}!"
-    
-    def reduce_cooldown(self):
-        """Reduce cooldown by 1 at the start of each turn"""
-        if self.current_cooldown > 0:
-            self.current_cooldown -= 1
+                     allies: List[Union[Character, BattleCharacter]], enemies: List[Union[Character, BattleCharacter]]) -> Optional[int]:
+        """Override this method with specific ability logic."""
+        return 0
+
+    def render(self, caster_name: str, target_name: str, amount: int) -> str:
+        return self.message.format(caster=caster_name, target=target_name, ability=self.name, amount=amount)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "cooldown": self.cooldown,
+            "target_type": self.target_type.value,
+        }
     
     def __repr__(self):
-        return f"Ability(name={self.name}, cooldown={self.current_cooldown}/{self.cooldown})"
\ No newline at end of file
+        return f"Ability(name={self.name}, cooldown={self.cooldown})"
@@ -0,0 +1,271 @@
+"""Declarative ability definitions and the registry that compiles them.
+
+An ``AbilityDefinition`` is plain data (it can come from JSON via
+``from_dict``). ``register_ability`` compiles it once into a
+``CompiledAbility``: a target selector plus a flat tuple of effect steps
+(damage, heal, status) with every constant resolved up front, so casting an
+ability only runs those steps.
+"""
+from __future__ import annotations
+import json
+from enum import Enum
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.model.abilities.ability import Ability, TargetType
+from core.model.battle.status_effects import get_status_effect_type
+
+
+class DamageType(Enum):
+    PHYSICAL = "physical"  # mitigated by armor
+    MAGIC = "magic"        # mitigated by magic_resist
+    TRUE = "true"          # not mitigated
+
+
+def mitigate(amount: int, resistance: int) -> int:
+    """Damage left after armor/magic resist; every point adds 1% effective health."""
+    return amount * 100 // (100 + max(resistance, 0))
+
+
+class AbilityDefinition(NamedTuple):
+    """Data describing an ability.
+
+    Damage is ``damage * caster.damage + power * caster.ability_power +
+    flat_damage`` before mitigation; healing is ``heal_power *
+    caster.ability_power + heal``, given to ``heal_target`` (by default the
+    ability's targets, or the caster when the ability is aimed at enemies).
+    Every ``(effect, duration, value)`` in ``status`` is applied to each
+    target that is still alive.
+    """
+    name: str
+    description: str = ""
+    cooldown: int = 0
+    target_type: TargetType = TargetType.SINGLE_ENEMY
+    damage: float = 0.0
+    power: float = 0.0
+    flat_damage: int = 0
+    damage_type: DamageType = DamageType.PHYSICAL
+    heal: int = 0
+    heal_power: float = 0.0
+    status: Tuple[Tuple[str, int, Any], ...] = ()
+    message: str = "{caster} uses {ability}!"
+    heal_target: Optional[TargetType] = None
+
+    @property
+    def deals_damage(self) -> bool:
+        return bool(self.damage or self.power or self.flat_damage)
+
+    @property
+    def heals(self) -> bool:
+        return bool(self.heal or self.heal_power)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AbilityDefinition":
+        fields = dict(data)
+        unknown = set(fields) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown ability fields: {', '.join(sorted(unknown))}")
+        if "target_type" in fields:
+            fields["target_type"] = TargetType(fields["target_type"])
+        if fields.get("heal_target") is not None:
+            fields["heal_target"] = TargetType(fields["heal_target"])
+        if "damage_type" in fields:
+            fields["damage_type"] = DamageType(fields["damage_type"])
+        if "status" in fields:
+            fields["status"] = tuple(
+                (s["effect"], s["duration"], s.get("value")) if isinstance(s, dict) else tuple(s)
+                for s in fields["status"])
+        return cls(**fields)
+
+
+# ---------- Target selection ----------
+
+def _select_self(caster, target, allies, enemies):
+    return (caster,)
+
+
+def _select_single(caster, target, allies, enemies):
+    return (target,) if target is not None else ()
+
+
+def _select_all_enemies(caster, target, allies, enemies):
+    return tuple(enemies)
+
+
+def _select_all_allies(caster, target, allies, enemies):
+    return (caster, *allies)
+
+
+def _adjacent(pool: Sequence, target) -> Tuple:
+    if target is None:
+        return ()
+    if target not in pool:
+        return (target,)
+    i = pool.index(target)
+    return tuple(pool[j] for j in (i - 1, i, i + 1) if 0 <= j < len(pool))
+
+
+def _select_adjacent_enemies(caster, target, allies, enemies):
+    return _adjacent(enemies, target)
+
+
+def _select_adjacent_allies(caster, target, allies, enemies):
+    return _adjacent(allies, target)
+
+
+_SELECTORS = {
+    TargetType.SELF: _select_self,
+    TargetType.SINGLE_ENEMY: _select_single,
+    TargetType.SINGLE_ALLY: _select_single,
+    TargetType.ALL_ENEMIES: _select_all_enemies,
+    TargetType.ALL_ALLIES: _select_all_allies,
+    TargetType.ADJACENT_ENEMIES: _select_adjacent_enemies,
+    TargetType.ADJACENT_ALLIES: _select_adjacent_allies,
+}
+
+_ENEMY_TARGETS = {TargetType.SINGLE_ENEMY, TargetType.ALL_ENEMIES, TargetType.ADJACENT_ENEMIES}
+
+
+def _heal_selector(definition: AbilityDefinition) -> Optional[Callable]:
+    """Selector for the heal step, or None when it heals the ability's own targets."""
+    heal_target = definition.heal_target
+    aimed_at_enemies = definition.target_type in _ENEMY_TARGETS
+    if heal_target is None:
+        return _select_self if aimed_at_enemies else None
+    if heal_target in _ENEMY_TARGETS:
+        raise ValueError(f"{definition.name}: heal_target cannot be {heal_target.value}")
+    if aimed_at_enemies and heal_target not in (TargetType.SELF, TargetType.ALL_ALLIES):
+        # The chosen target is an enemy, so there is no ally to center on
+        raise ValueError(f"{definition.name}: abilities aimed at enemies can only heal self or all_allies")
+    return None if heal_target == definition.target_type else _SELECTORS[heal_target]
+
+
+# ---------- Effect steps ----------
+# Each step takes (caster, targets) and returns the amount it contributes. Steps
+# are compiled with their own selector when they do not act on the ability's targets.
+
+Step = Callable[[Any, Tuple], int]
+
+
+def _damage_step(definition: AbilityDefinition) -> Step:
+    scaling, power, flat = definition.damage, definition.power, definition.flat_damage
+
+    if definition.damage_type is DamageType.TRUE:
+        def deal(caster, targets):
+            stats = caster.character
+            raw = int(scaling * stats.damage + power * stats.ability_power + flat)
+            return sum(target.take_damage(raw) for target in targets)
+        return deal
+
+    physical = definition.damage_type is DamageType.PHYSICAL
+
+    def deal_mitigated(caster, targets):
+        stats = caster.character
+        raw = int(scaling * stats.damage + power * stats.ability_power + flat)
+        dealt = 0
+        for target in targets:
+            defence = target.character
+            dealt += target.take_damage(mitigate(raw, defence.armor if physical else defence.magic_resist))
+        return dealt
+    return deal_mitigated
+
+
+def _heal_step(definition: AbilityDefinition, counted: bool) -> Step:
+    power, flat = definition.heal_power, definition.heal
+
+    def heal(caster, targets):
+        amount = int(power * caster.character.ability_power + flat)
+        healed = sum(target.heal(amount) for target in targets)
+        return healed if counted else 0
+    return heal
+
+
+def _status_step(definition: AbilityDefinition) -> Step:
+    status = definition.status
+
+    def apply(caster, targets):
+        for target in targets:
+            if target.is_alive:
+                for effect, duration, value in status:
+                    target.add_status_effect(effect, duration, value)
+        return 0
+    return apply
+
+
+class CompiledAbility(Ability):
+    """Ability executing the pipeline compiled from an AbilityDefinition.
+
+    Works on BattleCharacters: the caster's stats are read from
+    ``caster.character`` and targets receive take_damage/heal/add_status_effect.
+    """
+    __slots__ = ("definition", "message", "deals_damage", "_select", "_steps")
+
+    def __init__(self, definition: AbilityDefinition):
+        super().__init__(definition.name, definition.description, definition.cooldown, definition.target_type)
+        for effect, _, _ in definition.status:
+            get_status_effect_type(effect)  # unknown effects fail at registration, not mid-battle
+        steps: List[Tuple[Optional[Callable], Step]] = []
+        if definition.deals_damage:
+            steps.append((None, _damage_step(definition)))
+        if definition.heals:
+            # The logged amount is the damage dealt, or the healing for pure heals
+            steps.append((_heal_selector(definition), _heal_step(definition, counted=not definition.deals_damage)))
+        if definition.status:
+            steps.append((None, _status_step(definition)))
+        self.definition = definition
+        self.message = definition.message
+        self.deals_damage = definition.deals_damage
+        self._select = _SELECTORS[definition.target_type]
+        self._steps = tuple(steps)
+
+    def execute(self, caster, target=None, allies=(), enemies=()) -> Optional[int]:
+        targets = self._select(caster, target, allies, enemies)
+        if not targets:
+            return None
+        amount = 0
+        for select, step in self._steps:
+            amount += step(caster, targets if select is None else select(caster, target, allies, enemies))
+        return amount
+
+    def __reduce__(self):
+        return _restore_ability, (self.definition,)
+
+    def __repr__(self):
+        return f"CompiledAbility(name={self.name}, cooldown={self.cooldown})"
+
+
+ABILITY_REGISTRY: Dict[str, CompiledAbility] = {}
+# Bumped by every registration, so anything derived from the registry can be cached
+_generation = 0
+
+
+def register_ability(definition: AbilityDefinition) -> CompiledAbility:
+    global _generation
+    ability = CompiledAbility(definition)
+    ABILITY_REGISTRY[definition.name] = ability
+    _generation += 1
+    return ability
+
+
+def ability_registry_generation() -> int:
+    return _generation
+
+
+def get_ability(name: str) -> CompiledAbility:
+    try:
+        return ABILITY_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown ability: {name}") from None
+
+
+def load_ability_definitions(path: str) -> List[CompiledAbility]:
+    """Register every ability of a JSON file holding a list of definitions."""
+    with open(path) as f:
+        return [register_ability(AbilityDefinition.from_dict(data)) for data in json.load(f)]
+
+
+def _restore_ability(definition: AbilityDefinition) -> CompiledAbility:
+    # Unpickled battles share the registered instance when the definition still matches
+    registered = ABILITY_REGISTRY.get(definition.name)
+    if registered is not None and registered.definition == definition:
+        return registered
+    return CompiledAbility(definition)
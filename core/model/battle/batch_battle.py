@@ -0,0 +1,192 @@
+from __future__ import annotations
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+from core.model.abilities.damage.basic import BASIC_ATTACK
+from core.model.battle.battle import Battle
+from core.model.battle.battle_state import BattleState
+from core.model.characters.character import Character
+
+# BattleState <-> int8 code used by the state array
+_STATES = (BattleState.SETUP, BattleState.ONGOING, BattleState.VICTORY, BattleState.DEFEAT, BattleState.DRAW)
+_SETUP, _ONGOING, _VICTORY, _DEFEAT, _DRAW = range(len(_STATES))
+
+
+class BatchBattle:
+    """Run many battles at once as NumPy struct-of-arrays.
+
+    Every battle is one row. Team A occupies the first ``width_a`` columns and
+    team B the remaining ones; shorter teams are padded with dead slots that
+    never act and are never targeted. Each call to ``tick`` performs one
+    turn-meter tick for all ongoing battles, and every battle whose tick
+    produces a ready character executes exactly one action, which mirrors
+    ``Battle.next_turn`` (first ability, first alive enemy, highest meter wins
+    with ties going to the earliest slot).
+
+    Only characters whose first ability is ``BASIC_ATTACK`` are supported, and
+    ``stun`` is the only status effect that can be carried over from a battle.
+    """
+    TURN_METER_THRESHOLD = Battle.TURN_METER_THRESHOLD
+
+    def __init__(self, count: int, width_a: int, width_b: int):
+        width = width_a + width_b
+        self.count = count
+        self.width_a = width_a
+        self.current_health = np.zeros((count, width), dtype=np.int64)
+        self.speed = np.zeros((count, width), dtype=np.int64)
+        self.damage = np.zeros((count, width), dtype=np.int64)
+        self.armor = np.zeros((count, width), dtype=np.int64)
+        self.turn_meter = np.zeros((count, width), dtype=np.float64)
+        self.alive = np.zeros((count, width), dtype=bool)
+        self.stunned_until = np.zeros((count, width), dtype=np.int64)  # turn on which the stun expires
+        self.state = np.full(count, _ONGOING, dtype=np.int8)
+        self.current_turn = np.zeros(count, dtype=np.int64)
+        self.actions = np.zeros(count, dtype=np.int64)
+        self.stalled = np.zeros(count, dtype=bool)
+        self._is_team_b = np.arange(width) >= width_a
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_teams(cls, matchups: Sequence[Tuple[List[Character], List[Character]]]) -> "BatchBattle":
+        """Build fresh battles (all meters at 0) straight from character lists."""
+        batch = cls(len(matchups), *cls._widths(matchups))
+        for row, (team_a, team_b) in enumerate(matchups):
+            for col, char in batch._columns(team_a, team_b):
+                batch._load_character(row, col, char)
+                batch.current_health[row, col] = char.health
+                batch.speed[row, col] = char.speed
+                batch.alive[row, col] = True
+        batch._finish_setup()
+        return batch
+
+    @classmethod
+    def from_battles(cls, battles: Sequence[Battle]) -> "BatchBattle":
+        """Snapshot existing (possibly already started) battles into a batch."""
+        batch = cls(len(battles), *cls._widths([(b.team_a, b.team_b) for b in battles]))
+        for row, battle in enumerate(battles):
+            if battle.rng is not None:
+                raise ValueError("Seeded battles pick random actions; not supported by BatchBattle")
+            for col, bc in batch._columns(battle.team_a, battle.team_b):
+                batch._load_character(row, col, bc.character)
+                batch.current_health[row, col] = bc.current_health
+                batch.speed[row, col] = bc.character.speed
+                batch.alive[row, col] = bc.is_alive
+                batch.turn_meter[row, col] = battle.meter(bc)
+                batch._load_status_effects(row, col, bc)
+            batch.state[row] = _STATES.index(battle.state)
+            batch.current_turn[row] = battle.current_turn
+        batch._finish_setup()
+        return batch
+
+    @staticmethod
+    def _widths(matchups) -> Tuple[int, int]:
+        width_a = max((len(a) for a, _ in matchups), default=0)
+        width_b = max((len(b) for _, b in matchups), default=0)
+        return width_a, width_b
+
+    def _columns(self, team_a, team_b):
+        for col, member in enumerate(team_a):
+            yield col, member
+        for col, member in enumerate(team_b):
+            yield self.width_a + col, member
+
+    def _load_character(self, row: int, col: int, char: Character):
+        if not char.abilities or char.abilities[0] is not BASIC_ATTACK:
+            raise ValueError(f"{char.name} does not have Basic Attack as first ability; not supported by BatchBattle")
+        self.damage[row, col] = char.damage
+        self.armor[row, col] = char.armor
+
+    def _load_status_effects(self, row: int, col: int, bc):
+        for name, effect in bc.status_effects.items():
+            if name != 'stun':
+                raise ValueError(f"{bc.character.name} has status effect {name!r}; not supported by BatchBattle")
+            self.stunned_until[row, col] = effect.expires_at
+
+    def _stunned(self, rows: np.ndarray) -> np.ndarray:
+        return self.current_turn[rows, None] < self.stunned_until[rows]
+
+    def _finish_setup(self):
+        self._refresh_stalled(np.arange(self.count))
+
+    # ---------- Simulation ----------
+
+    def tick(self, max_turns: Optional[int] = None) -> int:
+        """Advance every ongoing battle by one turn-meter tick.
+
+        Battles that already took ``max_turns`` actions are left untouched.
+        Returns the number of battles that executed an action on this tick.
+        """
+        rows = np.flatnonzero(self._active(max_turns))
+        if not rows.size:
+            return 0
+
+        alive = self.alive[rows]
+        meter = self.turn_meter[rows] + np.where(alive, self.speed[rows], 0)
+        self.turn_meter[rows] = meter
+
+        ready = alive & ~self._stunned(rows) & (meter >= self.TURN_METER_THRESHOLD)
+        acting = ready.any(axis=1)
+        if not acting.any():
+            return 0
+
+        rows = rows[acting]
+        actor = np.where(ready[acting], meter[acting], -np.inf).argmax(axis=1)
+        self.turn_meter[rows, actor] = 0
+        self.actions[rows] += 1
+
+        # First alive character of the opposing team
+        enemy_mask = self.alive[rows] & (self._is_team_b[None, :] != (actor >= self.width_a)[:, None])
+        has_enemy = enemy_mask.any(axis=1)
+        hit_rows, hit_actor = rows[has_enemy], actor[has_enemy]
+        target = enemy_mask[has_enemy].argmax(axis=1)
+
+        # Physical damage mitigated by armor, as in core.model.abilities.registry.mitigate
+        armor = np.maximum(self.armor[hit_rows, target], 0)
+        dealt = np.maximum(0, self.damage[hit_rows, hit_actor] * 100 // (100 + armor))
+        health = self.current_health[hit_rows, target] - dealt
+        killed = health <= 0
+        self.current_health[hit_rows, target] = np.maximum(health, 0)
+        self.alive[hit_rows[killed], target[killed]] = False
+
+        self._check_battle_end(rows)
+        ongoing = hit_rows[self.state[hit_rows] == _ONGOING]
+        self.current_turn[ongoing] += 1
+        self._refresh_stalled(rows)
+        return int(rows.size)
+
+    def run(self, max_turns: Optional[int] = None) -> "BatchBattle":
+        """Tick until every battle is finished, stalled or has taken ``max_turns`` actions."""
+        while self._active(max_turns).any():
+            self.tick(max_turns)
+        return self
+
+    def _active(self, max_turns: Optional[int]) -> np.ndarray:
+        active = (self.state == _ONGOING) & ~self.stalled
+        if max_turns is not None:
+            active &= self.actions < max_turns
+        return active
+
+    def _check_battle_end(self, rows: np.ndarray):
+        alive = self.alive[rows]
+        team_a_alive = (alive & ~self._is_team_b).any(axis=1)
+        team_b_alive = (alive & self._is_team_b).any(axis=1)
+        state = self.state[rows]
+        state = np.where(~team_a_alive & ~team_b_alive, _DRAW,
+                 np.where(~team_a_alive, _DEFEAT,
+                  np.where(~team_b_alive, _VICTORY, state)))
+        self.state[rows] = state
+
+    def _refresh_stalled(self, rows: np.ndarray):
+        """Flag battles in which nobody can ever fill their meter again."""
+        can_progress = self.alive[rows] & ~self._stunned(rows) & (self.speed[rows] > 0)
+        self.stalled[rows] = ~can_progress.any(axis=1)
+
+    # ---------- Results ----------
+
+    def states(self) -> List[BattleState]:
+        return [_STATES[code] for code in self.state]
+
+    def outcomes(self) -> List[Tuple[BattleState, int]]:
+        """(final state, turn count) per battle, in input order."""
+        return list(zip(self.states(), self.current_turn.tolist()))
@@ -1,68 +1,269 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
+import random
+from array import array
+from heapq import heappop, heappush
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from enum import Enum
+from core.model.abilities.ability import TargetType
 from core.model.battle.battle_character import BattleCharacter
+from core.model.battle.battle_log import BattleLog, EventType
 from core.model.battle.battle_state import BattleState
+from core.model.battle.status_effects import StatusEngine
+from core.model.battle.team_index import AliveIndex, TeamView
 from core.model.characters.character import Character
+from core.metrics import REGISTRY as METRICS, METER_TICKS, TURNS
+
+NOT_ONGOING = "Battle is not ongoing!"
+
+# (event kind, actor, ability index, target, amount) produced by a single action
+Action = Tuple[EventType, Optional[BattleCharacter], int, Optional[BattleCharacter], int]
+
+_ALLY_TARGETS = frozenset((TargetType.SELF, TargetType.SINGLE_ALLY, TargetType.ALL_ALLIES, TargetType.ADJACENT_ALLIES))
+
+
+class BattleOutcome(NamedTuple):
+    """Final result of a headless battle (see Battle.resolve)."""
+    state: BattleState
+    turns: int
+    survivors: List[Tuple[int, str, int]]  # (roster slot, name, current health)
+    damage_dealt: List[int]                # per roster slot
+
+    def to_dict(self) -> Dict:
+        return {
+            "state": self.state.value,
+            "turns": self.turns,
+            "survivors": [{"slot": slot, "name": name, "current_health": hp} for slot, name, hp in self.survivors],
+            "damage_dealt": self.damage_dealt,
+        }
+
 
 class Battle:
     TURN_METER_THRESHOLD = 1000  # Full meter
 
-    def __init__(self, team_a: List[Character], team_b: List[Character]):
-        self.team_a = [BattleCharacter(char) for char in team_a]
-        self.team_b = [BattleCharacter(char) for char in team_b]
+    def __init__(self, team_a: List[Character], team_b: List[Character], seed: Optional[int] = None):
+        self.team_a = [BattleCharacter(char, slot) for slot, char in enumerate(team_a)]
+        self.team_b = [BattleCharacter(char, len(team_a) + slot) for slot, char in enumerate(team_b)]
+        self.roster = self.team_a + self.team_b  # indexed by BattleCharacter.slot
+        # Team lookups are by slot: team A holds slots [0, len(team_a)), team B the rest
+        self._teams = (self.team_a, self.team_b)
+        self._offsets = (0, len(self.team_a))
+        self._alive = tuple(AliveIndex([bc.is_alive for bc in team]) for team in self._teams)
         self.state = BattleState.SETUP
         self.current_turn = 0
+        self.version = 0  # bumped on every mutation; used to cache serialized summaries
         self.active_character: Optional[BattleCharacter] = None
-        self.turn_meters: Dict[BattleCharacter, float] = {}
-        self.battle_log: List[str] = []
+        self.battle_log = BattleLog(self.roster)
+        self.effects = StatusEngine(self)
+        # Without a seed every character uses its first ability on the first alive enemy;
+        # with one, abilities and targets are drawn from this RNG, reproducibly
+        self.seed = seed
+        self.rng: Optional[random.Random] = random.Random(seed) if seed is not None else None
+        # Set by core.model.battle.recording.record to capture every action
+        self.recorder = None
         self.start_battle()
 
+    def fork(self) -> Battle:
+        """Independent copy of the battle for what-if previews and lookahead.
+
+        Characters, abilities and applied status effects never change during a
+        battle and are shared; only HPs, meters, cooldowns, alive indexes and
+        effect timers are copied. The fork starts with an empty log, so its
+        events are exactly the ones played on it.
+        """
+        fork = Battle.__new__(Battle)
+        fork.team_a = [bc.fork() for bc in self.team_a]
+        fork.team_b = [bc.fork() for bc in self.team_b]
+        fork.roster = fork.team_a + fork.team_b
+        for bc in fork.roster:
+            bc.battle = fork
+        fork._teams = (fork.team_a, fork.team_b)
+        fork._offsets = self._offsets
+        fork._alive = (self._alive[0].copy(), self._alive[1].copy())
+        fork.state = self.state
+        fork.current_turn = self.current_turn
+        fork.version = self.version
+        active = self.active_character
+        fork.active_character = fork.roster[active.slot] if active is not None else None
+        fork.battle_log = BattleLog(fork.roster)
+        fork.effects = self.effects.fork(fork)
+        fork.seed = self.seed
+        fork.rng = None
+        if self.rng is not None:
+            fork.rng = random.Random()
+            fork.rng.setstate(self.rng.getstate())
+        fork.recorder = None
+        fork._tick = self._tick
+        fork._meter_base = self._meter_base[:]
+        fork._meter_gain = self._meter_gain[:]
+        fork._ready = {gain: heap[:] for gain, heap in self._ready.items()}
+        return fork
+
+    def __getstate__(self):
+        # Stores keep the recording next to the battle and resume it on load,
+        # so saving a battle does not pickle its whole recording again
+        state = self.__dict__.copy()
+        state["recorder"] = None
+        return state
+
     def start_battle(self):
         """Start the battle with all turn meters at 0 and determine first active character."""
         self.state = BattleState.ONGOING
 
         # Initialize turn meters
-        for bc in self.team_a + self.team_b:
-            self.turn_meters[bc] = 0
+        self._init_schedule()
 
         # First turn deterministic: highest speed, then highest damage
-        all_chars = self.team_a + self.team_b
-        first_char = max(all_chars, key=lambda bc: (bc.character.speed, bc.character.damage))
+        first_char = max(self.roster, key=lambda bc: (bc.character.speed, bc.character.damage))
         self.active_character = first_char
 
     def next_turn(self) -> str:
         """Progress the battle to the next action; always returns a character turn."""
+        event = self.step()
+        return NOT_ONGOING if event is None else self.battle_log.render_event(event)
+
+    def step(self) -> Optional[int]:
+        """Progress the battle to the next action without rendering any text.
+
+        Returns the index of the logged event, or None if the battle is not ongoing.
+        """
         if self.state != BattleState.ONGOING:
-            return "Battle is not ongoing!"
-
-        # Keep ticking until at least one character reaches the threshold
-        while True:
-            # Step 1: Increase turn meters for all alive characters
-            for bc in self.team_a + self.team_b:
-                if bc.is_alive:
-                    self.turn_meters[bc] += bc.calculate_turn_meter_gain()
-
-            # Step 2: Check who can act
-            ready_to_act = [bc for bc in self.team_a + self.team_b
-                            if bc.is_alive and bc.can_take_action() and self.turn_meters[bc] >= self.TURN_METER_THRESHOLD]
-
-            if ready_to_act:
-                # Pick the character with the highest turn meter
-                active_bc = max(ready_to_act, key=lambda bc: self.turn_meters[bc])
-                self.active_character = active_bc
-                self.turn_meters[active_bc] = 0  # reset after acting
-
-                # Step 3: Execute the turn
-                enemies = self._get_enemies_bc(active_bc)
-                if not enemies:
-                    self._check_battle_end()
-                    return "❌ No enemies left!"
-
-                ability_index = 0  # for simplicity, pick first ability
-                target_index = 0   # first alive enemy
-                result = self.execute_turn(ability_index, "enemy", target_index)
-                return result
+            return None
+        turn = self.current_turn
+        action = self._take_turn()
+        if self.recorder is not None:
+            self.recorder.on_step(action)
+        return self._log(turn, *action)
+
+    def resolve(self, max_turns: Optional[int] = None) -> BattleOutcome:
+        """Play the battle to completion without logging or rendering anything.
+
+        Stops early after ``max_turns`` actions or when nobody can act anymore.
+        """
+        damage_dealt = [0] * len(self.roster)
+        turns = 0
+        while self.state == BattleState.ONGOING and (max_turns is None or turns < max_turns):
+            action = self._take_turn()
+            if self.recorder is not None:
+                self.recorder.on_step(action)
+            kind, actor, ability_index, _, amount = action
+            if kind == EventType.ABILITY and actor.character.abilities[ability_index].deals_damage:
+                damage_dealt[actor.slot] += amount
+            elif kind == EventType.NO_ONE_CAN_ACT:
+                break
+            turns += 1
+
+        self.version += 1
+        survivors = [(bc.slot, bc.character.name, bc.current_health) for bc in self.roster if bc.is_alive]
+        return BattleOutcome(self.state, self.current_turn, survivors, damage_dealt)
+
+    def _take_turn(self) -> Action:
+        """Advance meters to the next actor and let it act."""
+        # Jump straight to the tick on which the next character becomes ready
+        ready = self._next_ready()
+        if ready is None:
+            return EventType.NO_ONE_CAN_ACT, None, -1, None, 0
+        tick, active_bc = ready
+        if METRICS.enabled:
+            METER_TICKS.inc(amount=tick - self._tick)
+        self._tick = tick
+
+        self.active_character = active_bc
+        self._set_meter(active_bc, 0)  # reset after acting
+        active_bc.reduce_cooldowns()
+
+        # Execute the turn
+        if not self._alive[1 - self._team_of(active_bc)].count:
+            self._check_battle_end()
+            return EventType.NO_ENEMIES, active_bc, -1, None, 0
+
+        if self.rng is None:
+            return self._act(0, "enemy", 0)  # first ability on the first alive enemy
+        return self._act(*self._choose_action(active_bc))
+
+    def _choose_action(self, bc: BattleCharacter) -> Tuple[int, str, int]:
+        """Random ready ability and random alive target on the side it aims at."""
+        abilities = bc.character.abilities
+        cooldowns = bc.cooldowns
+        ready = [i for i in range(len(abilities)) if not (cooldowns and cooldowns[i])]
+        ability_index = ready[self.rng.randrange(len(ready))] if ready else 0
+        target_team = "ally" if abilities and abilities[ability_index].target_type in _ALLY_TARGETS else "enemy"
+        team = self._team_of(bc)
+        alive = self._alive[team if target_team == "ally" else 1 - team].count
+        return ability_index, target_team, self.rng.randrange(alive) if alive else 0
+
+    # ---------- Turn meters ----------
+    #
+    # Meters are stored lazily as ``base + gain * tick`` against a battle-wide tick
+    # counter, so advancing time costs nothing. Characters able to act sit in one
+    # heap per gain value: within a heap meters keep their relative order as time
+    # passes, so only each heap's head can be the next actor. Heap entries are
+    # ``-base * len(roster) + slot`` (highest meter, then lowest slot first) and
+    # are dropped lazily once they no longer match the character's meter.
+
+    def _init_schedule(self):
+        size = len(self.roster)
+        self._tick = 0
+        self._meter_base = array('q', bytes(8 * size))
+        self._meter_gain = array('q', bytes(8 * size))
+        self._ready: Dict[int, List[int]] = {}  # gain -> heap of encoded entries
+        for bc in self.roster:
+            bc.battle = self
+            self._set_meter(bc, 0)
+
+    @property
+    def turn_meters(self) -> Dict[BattleCharacter, int]:
+        """Snapshot of every character's current turn meter."""
+        return {bc: self.meter(bc) for bc in self.roster}
+
+    def meter(self, bc: BattleCharacter) -> int:
+        return self._meter_base[bc.slot] + self._meter_gain[bc.slot] * self._tick
+
+    def _set_meter(self, bc: BattleCharacter, value: int):
+        slot = bc.slot
+        gain = bc.calculate_turn_meter_gain() if bc.is_alive else 0  # dead meters stay frozen
+        self._meter_gain[slot] = gain
+        self._meter_base[slot] = base = value - gain * self._tick
+        if bc.can_take_action():
+            heappush(self._ready.setdefault(gain, []), -base * len(self.roster) + slot)
+
+    def reschedule(self, bc: BattleCharacter):
+        """Re-anchor a character's meter after its gain or its ability to act changed."""
+        self._set_meter(bc, self.meter(bc))
+
+    def _next_ready(self) -> Optional[Tuple[int, BattleCharacter]]:
+        """Tick on which the next character acts and that character, or None if nobody ever will.
+
+        At least one tick always elapses. Among the characters ready on that tick the
+        highest meter wins, then the lowest slot, exactly like the former loop.
+        """
+        threshold = self.TURN_METER_THRESHOLD
+        earliest = self._tick + 1
+        roster, size = self.roster, len(self.roster)
+        heads = []
+        for gain, heap in list(self._ready.items()):
+            while heap:
+                neg_base, slot = divmod(heap[0], size)
+                if (self._meter_base[slot] == -neg_base and self._meter_gain[slot] == gain
+                        and roster[slot].can_take_action()):
+                    break
+                heappop(heap)
+            else:
+                del self._ready[gain]
+                continue
+            base = -neg_base
+            if gain > 0:
+                ready_at = max(earliest, -(-(threshold - base) // gain))
+            elif base + gain * earliest >= threshold:
+                ready_at = earliest
+            else:
+                continue
+            heads.append((ready_at, gain, base, slot))
+        if not heads:
+            return None
+
+        tick = min(head[0] for head in heads)
+        _, slot = max((base + gain * tick, -slot) for ready_at, gain, base, slot in heads if ready_at <= tick)
+        return tick, roster[-slot]
 
     def get_active_character(self) -> Optional[BattleCharacter]:
         return self.active_character
@@ -70,26 +271,35 @@ class Battle:
     def execute_turn(self, ability_index: int, target_team: str = "enemy", target_index: int = 0) -> str:
         """Execute a turn for the active character."""
         if self.state != BattleState.ONGOING:
-            return "Battle is not ongoing!"
-
+            return NOT_ONGOING
+        turn = self.current_turn
+        action = self._act(ability_index, target_team, target_index)
+        if self.recorder is not None:
+            self.recorder.on_execute(action, ability_index, target_team, target_index)
+        return self.battle_log.render_event(self._log(turn, *action))
+
+    def _act(self, ability_index: int, target_team: str, target_index: int) -> Action:
+        """Execute a turn for the active character without logging it."""
         active_bc = self.get_active_character()
         if not active_bc or not active_bc.can_take_action():
-            return f"{active_bc.character.name if active_bc else 'No one'} cannot act!"
+            return EventType.CANNOT_ACT, active_bc, -1, None, 0
 
         target_bc = self._get_target(active_bc, target_team, target_index)
         if not target_bc:
-            return "No valid target!"
+            return EventType.NO_VALID_TARGET, active_bc, -1, None, 0
 
         allies = self._get_allies_bc(active_bc)
         enemies = self._get_enemies_bc(active_bc)
 
-        result = active_bc.use_ability(ability_index, target_bc, allies, enemies)
+        kind, amount = active_bc.use_ability(ability_index, target_bc, allies, enemies)
+        if METRICS.enabled:
+            TURNS.inc()
 
         # Update death status immediately
-        self._update_death_status()
+        self._update_death_status(target_bc, active_bc)
 
         # Process end-of-turn effects
-        self._process_end_of_turn(active_bc)
+        self.effects.end_of_turn(self.current_turn)
 
         # Check if battle ended
         self._check_battle_end()
@@ -98,46 +308,59 @@ class Battle:
         if self.state == BattleState.ONGOING:
             self.current_turn += 1
 
-        return result
+        return kind, active_bc, ability_index, target_bc, amount
 
     # ---------- Helper Methods ----------
 
+    def _log(self, turn: int, kind: EventType, actor: Optional[BattleCharacter] = None, ability_index: int = -1,
+             target: Optional[BattleCharacter] = None, amount: int = 0) -> int:
+        self.version += 1
+        return self.battle_log.append(turn, kind,
+                                      actor.slot if actor else -1, ability_index,
+                                      target.slot if target else -1, amount,
+                                      target.current_health if target else 0)
+
+    def _team_of(self, bc: BattleCharacter) -> int:
+        return 0 if bc.slot < self._offsets[1] else 1
+
     def _get_target(self, active_bc: BattleCharacter, target_team: str, target_index: int) -> Optional[BattleCharacter]:
-        target_pool = self.team_b if active_bc in self.team_a else self.team_a
-        if target_team == "ally":
-            target_pool = self.team_a if active_bc in self.team_a else self.team_b
+        team = self._team_of(active_bc)
+        if target_team != "ally":
+            team = 1 - team
 
-        alive_targets = [bc for bc in target_pool if bc.is_alive]
-        if not alive_targets:
+        alive = self._alive[team]
+        if not alive.count:
             return None
 
-        return alive_targets[target_index] if 0 <= target_index < len(alive_targets) else alive_targets[0]
+        return self._teams[team][alive.kth(target_index if 0 <= target_index < alive.count else 0)]
+
+    def _get_allies_bc(self, character: BattleCharacter) -> TeamView:
+        team = self._team_of(character)
+        offset = self._offsets[team]
+        return TeamView(self._teams[team], self._alive[team], offset, exclude=character.slot - offset)
 
-    def _get_allies_bc(self, character: BattleCharacter) -> List[BattleCharacter]:
-        team = self.team_a if character in self.team_a else self.team_b
-        return [bc for bc in team if bc.is_alive and bc != character]
+    def _get_enemies_bc(self, character: BattleCharacter) -> TeamView:
+        team = 1 - self._team_of(character)
+        return TeamView(self._teams[team], self._alive[team], self._offsets[team])
 
-    def _get_enemies_bc(self, character: BattleCharacter) -> List[BattleCharacter]:
-        team = self.team_b if character in self.team_a else self.team_a
-        return [bc for bc in team if bc.is_alive]
+    def on_character_death(self, bc: BattleCharacter):
+        """Called by BattleCharacter.take_damage when ``bc`` dies."""
+        team = self._team_of(bc)
+        self._alive[team].discard(bc.slot - self._offsets[team])
+        self.effects.clear(bc)
+        self.reschedule(bc)
 
-    def _update_death_status(self):
-        for bc in self.team_a + self.team_b:
+    def _update_death_status(self, *characters: BattleCharacter):
+        # Deaths through take_damage are reported as they happen; this only catches
+        # health that was lowered directly on the characters involved in the action
+        for bc in characters:
             if bc.current_health <= 0 and bc.is_alive:
                 bc.is_alive = False
-
-    def _process_end_of_turn(self, character: BattleCharacter):
-        to_remove = []
-        for eff, data in character.status_effects.items():
-            data['duration'] -= 1
-            if data['duration'] <= 0:
-                to_remove.append(eff)
-        for eff in to_remove:
-            del character.status_effects[eff]
+                self.on_character_death(bc)
 
     def _check_battle_end(self):
-        team_a_alive = any(bc.is_alive for bc in self.team_a)
-        team_b_alive = any(bc.is_alive for bc in self.team_b)
+        team_a_alive = self._alive[0].count > 0
+        team_b_alive = self._alive[1].count > 0
 
         if not team_a_alive and not team_b_alive:
             self.state = BattleState.DRAW
@@ -150,27 +373,40 @@ class Battle:
         return {
             "state": self.state.value,
             "turn": self.current_turn,
-            "team_a": [bc for bc in self.team_a],
-            "team_b": [bc for bc in self.team_b],
+            "version": self.version,
+            "team_a": [bc.to_dict() for bc in self.team_a],
+            "team_b": [bc.to_dict() for bc in self.team_b],
+            "active_character": str(self.get_active_character()) if self.get_active_character() else None,
+            "log": self.battle_log.render(-5)
+        }
+
+    def get_battle_delta(self, since_turn: int) -> Dict:
+        """Compact view for pollers: current HPs plus every event from ``since_turn`` on."""
+        return {
+            "state": self.state.value,
+            "turn": self.current_turn,
+            "version": self.version,
+            "since_turn": since_turn,
+            "characters": [{"slot": bc.slot, "current_health": bc.current_health, "is_alive": bc.is_alive}
+                           for bc in self.roster],
             "active_character": str(self.get_active_character()) if self.get_active_character() else None,
-            "log": self.battle_log[-5:]
+            "log": self.battle_log.render(self.battle_log.first_at_turn(since_turn)),
         }
 
     def auto_play_round(self) -> List[str]:
         """Auto-play with safety limits."""
-        results = []
         if self.state != BattleState.ONGOING:
-            return ["Battle is not ongoing!"]
+            return [NOT_ONGOING]
 
         max_turns = 50
         turns_played = 0
+        first_event = len(self.battle_log)
 
         while self.state == BattleState.ONGOING and turns_played < max_turns:
-            result = self.next_turn()
-            results.append(result)
+            self.step()
             turns_played += 1
 
         if turns_played >= max_turns:
-            results.append("⚠️ Auto-play stopped: reached turn limit")
+            self._log(self.current_turn, EventType.TURN_LIMIT)
 
-        return results
+        return self.battle_log.render(first_event)
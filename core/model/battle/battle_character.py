@@ -1,15 +1,57 @@
-from typing import List, Optional, Any
+from array import array
+from types import MappingProxyType
+from typing import Optional, Any, Sequence, Tuple
+from core.model.battle.battle_log import EventType
+from core.model.battle.status_effects import BUFF, DEBUFF, StatusEffect, get_status_effect_type
 from core.model.characters.character import Character
+from core.metrics import REGISTRY as METRICS, ABILITY_EXECUTIONS
+
+# Shared read-only placeholder; a real dict is only allocated on first write
+_EMPTY = MappingProxyType({})
 
 class BattleCharacter:
-    def __init__(self, character: Character):
+    __slots__ = ("character", "current_health", "is_alive", "status_effects",
+                 "next_turn_meter", "cooldowns", "slot", "battle")
+
+    def __init__(self, character: Character, slot: int = -1):
         self.character: Character = character
         self.current_health: int = character.health
         self.is_alive: bool = True
-        self.status_effects = {}
-        self.active_buffs = {}
-        self.active_debuffs = {}
+        # Effect name -> StatusEffect, managed by the battle's StatusEngine
+        self.status_effects = _EMPTY
         self.next_turn_meter = 0
+        # Cooldown ticks left per ability index, allocated once an ability with a cooldown is used.
+        # Ticks happen at the start of each of the character's turns and the ability is usable
+        # at 0, so a cooldown of N is stored as N + 1 to block the next N turns.
+        self.cooldowns: Optional[array] = None
+        # Position in the battle roster (team A then team B), used by the battle log
+        self.slot = slot
+        # Owning battle, notified of deaths and stun changes to keep its indexes current
+        self.battle = None
+
+    def __getstate__(self):
+        # Mapping proxies cannot be pickled; store the shared placeholder as None
+        return tuple(None if value is _EMPTY else value
+                     for value in (getattr(self, name) for name in self.__slots__))
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            if value is None and name == "status_effects":
+                value = _EMPTY
+            setattr(self, name, value)
+
+    def fork(self) -> "BattleCharacter":
+        """Copy of the per-battle state; the character itself and its effects are shared."""
+        clone = BattleCharacter.__new__(BattleCharacter)
+        clone.character = self.character
+        clone.current_health = self.current_health
+        clone.is_alive = self.is_alive
+        clone.status_effects = self.status_effects if self.status_effects is _EMPTY else dict(self.status_effects)
+        clone.next_turn_meter = self.next_turn_meter
+        clone.cooldowns = self.cooldowns[:] if self.cooldowns is not None else None
+        clone.slot = self.slot
+        clone.battle = None
+        return clone
 
     def __repr__(self):
         status = "Alive" if self.is_alive else "Dead"
@@ -23,7 +65,10 @@ class BattleCharacter:
         self.current_health -= actual_damage
         if self.current_health <= 0:
             self.current_health = 0
-            self.is_alive = False
+            if self.is_alive:
+                self.is_alive = False
+                if self.battle is not None:
+                    self.battle.on_character_death(self)
         return actual_damage
 
     def heal(self, amount: int) -> int:
@@ -33,101 +78,93 @@ class BattleCharacter:
         self.current_health += actual_heal
         return actual_heal
 
-    def add_status_effect(self, effect: str, duration: int, value: Any = None):
-        self.status_effects[effect] = {
-            'duration': duration,
-            'value': value
+    def to_dict(self) -> dict:
+        now = self.battle.current_turn if self.battle is not None else 0
+        effects = {name: effect.to_dict(now) for name, effect in self.status_effects.items()}
+        return {
+            "character": self.character.to_dict(),
+            "current_health": self.current_health,
+            "is_alive": self.is_alive,
+            "status_effects": effects,
+            "active_buffs": {name: effects[name] for name, effect in self.status_effects.items()
+                             if effect.type.category == BUFF},
+            "active_debuffs": {name: effects[name] for name, effect in self.status_effects.items()
+                               if effect.type.category == DEBUFF},
+            "next_turn_meter": self.next_turn_meter,
+            # Turns each ability stays unavailable
+            "cooldowns": [max(0, remaining - 1) for remaining in self.cooldowns] if self.cooldowns
+                         else [0] * len(self.character.abilities),
         }
 
+    def add_status_effect(self, effect: str, duration: int, value: Any = None) -> StatusEffect:
+        """Apply a registered status effect for ``duration`` battle turns."""
+        if self.battle is not None:
+            return self.battle.effects.apply(self, effect, duration, value)
+        # Outside of a battle there is no clock: the effect just sits there
+        status_effect = StatusEffect(get_status_effect_type(effect), value, duration)
+        self.attach_status_effect(status_effect)
+        return status_effect
+
+    def attach_status_effect(self, effect: StatusEffect):
+        if self.status_effects is _EMPTY:
+            self.status_effects = {}
+        self.status_effects[effect.type.name] = effect
+
+    def detach_status_effect(self, name: str):
+        del self.status_effects[name]
+
     def has_status_effect(self, effect: str) -> bool:
         return effect in self.status_effects
 
-    def process_start_of_turn(self):
-        # Process damage over time effects
-        if 'burn' in self.status_effects:
-            burn_data = self.status_effects['burn']
-            self.take_damage(burn_data['value'])
-            burn_data['duration'] -= 1
-            if burn_data['duration'] <= 0:
-                del self.status_effects['burn']
-
-        # Process stun
-        if 'stun' in self.status_effects:
-            self.status_effects['stun']['duration'] -= 1
-            if self.status_effects['stun']['duration'] <= 0:
-                del self.status_effects['stun']
-
     def can_take_action(self) -> bool:
-        return self.is_alive and not self.has_status_effect('stun')
+        if not self.is_alive:
+            return False
+        for effect in self.status_effects.values():
+            if effect.type.blocks_action:
+                return False
+        return True
 
     def calculate_turn_meter_gain(self) -> int:
-        base_gain = self.character.speed
+        gain = self.character.speed
         # Apply speed buffs/debuffs
-        if 'speed_buff' in self.active_buffs:
-            base_gain = int(base_gain * 1.3)  # 30% speed buff
-        if 'speed_debuff' in self.active_debuffs:
-            base_gain = int(base_gain * 0.7)  # 30% speed debuff
-        return base_gain
+        for effect in self.status_effects.values():
+            if effect.type.speed_multiplier != 1.0:
+                gain = int(gain * effect.type.speed_multiplier)
+        return gain
 
     def use_ability(self, ability_index: int, target: Optional['BattleCharacter'] = None,
-                    allies: List['BattleCharacter'] = None, enemies: List['BattleCharacter'] = None) -> str:
+                    allies: Sequence['BattleCharacter'] = None, enemies: Sequence['BattleCharacter'] = None) -> Tuple[EventType, int]:
         """Use ability from the character's ability list.
 
         Abilities are executed with BattleCharacter instances so they can call
-        methods like take_damage/heal/add_status_effect directly.
+        methods like take_damage/heal/add_status_effect directly. Returns the
+        event kind and amount for the battle log instead of a formatted message.
         """
         if not self.is_alive:
-            return f"{self.character.name} is dead and cannot act!"
+            return EventType.ACTOR_DEAD, 0
 
         if 0 <= ability_index < len(self.character.abilities):
             ability = self.character.abilities[ability_index]
+            if self.cooldowns and self.cooldowns[ability_index] > 0:
+                return EventType.ON_COOLDOWN, self.cooldowns[ability_index]
+            if ability.cooldown:
+                if self.cooldowns is None:
+                    self.cooldowns = array('H', bytes(2 * len(self.character.abilities)))
+                self.cooldowns[ability_index] = ability.cooldown + 1
 
             # Pass BattleCharacter objects directly so ability implementations
             # can operate on the battle state (take_damage/heal/etc.)
-            allies_list = allies if allies else []
-            enemies_list = enemies if enemies else []
-
-            result = ability.execute(self, target, allies_list, enemies_list)
-
-            # Optionally, if ability objects contain declarative fields (damage_amount, heal_amount, etc.)
-            # apply them here to BattleCharacters. That logic can be kept in ability implementations,
-            # but a small helper is provided below for shared behaviour.
-            return result
-        return "Invalid ability!"
-
-    def _apply_ability_effects(self, ability, target: Optional['BattleCharacter'], allies: List['BattleCharacter'], enemies: List['BattleCharacter']):
-        """Apply simple declarative ability effects to BattleCharacters.
-
-        This helper is intended for ability implementations to call when they want
-        a standardized effect application (damage/heal/status/aoe). It's not invoked
-        automatically; specific Ability subclasses should call it when appropriate.
-        """
-        # Apply damage to primary target
-        if target and hasattr(ability, 'damage_amount') and getattr(ability, 'damage_amount', 0) > 0:
-            actual_damage = target.take_damage(ability.damage_amount)
-            # use battle logging in higher-level code; print here for debug
-            print(f"DEBUG: {self.character.name} dealt {actual_damage} damage to {target.character.name}, new HP: {target.current_health}")
-
-        # Apply healing to target or self
-        if hasattr(ability, 'heal_amount') and getattr(ability, 'heal_amount', 0) > 0:
-            if target:
-                target.heal(ability.heal_amount)
-            else:
-                self.heal(ability.heal_amount)
-
-        # Apply status effects
-        if hasattr(ability, 'status_effects') and getattr(ability, 'status_effects'):
-            for effect, duration in ability.status_effects.items():
-                if target:
-                    target.add_status_effect(effect, duration)
-
-        # Apply AoE damage/heal if applicable
-        if hasattr(ability, 'aoe_damage') and getattr(ability, 'aoe_damage', 0) > 0:
-            if hasattr(ability, 'aoe_target') and ability.aoe_target == 'enemies':
-                for enemy in enemies:
-                    if enemy != target:  # Don't double-damage primary target
-                        enemy.take_damage(ability.aoe_damage)
-            elif hasattr(ability, 'aoe_target') and ability.aoe_target == 'allies':
-                for ally in allies:
-                    if ally != self:  # Don't double-heal/buff self
-                        ally.heal(ability.aoe_damage)  # Assuming aoe_damage is healing in this context
\ No newline at end of file
+            amount = ability.execute(self, target, allies or (), enemies or ())
+            if METRICS.enabled:
+                ABILITY_EXECUTIONS.inc(ability.name)
+            if amount is None:
+                return EventType.NO_TARGET, 0
+            return EventType.ABILITY, amount
+        return EventType.INVALID_ABILITY, 0
+
+    def reduce_cooldowns(self):
+        """Reduce every ability cooldown by 1 at the start of each turn"""
+        if self.cooldowns:
+            for i, remaining in enumerate(self.cooldowns):
+                if remaining > 0:
+                    self.cooldowns[i] = remaining - 1
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import struct
+from bisect import bisect_left
+from enum import IntEnum
+from typing import List, NamedTuple, Optional, Sequence
+
+
+class EventType(IntEnum):
+    ABILITY = 0           # actor used ability on target for amount, leaving target at hp
+    NO_TARGET = 1         # the ability found no target
+    NO_VALID_TARGET = 2   # the battle found no target for the actor
+    NO_ENEMIES = 3
+    NO_ONE_CAN_ACT = 4
+    CANNOT_ACT = 5
+    ACTOR_DEAD = 6
+    ON_COOLDOWN = 7       # amount holds the remaining cooldown
+    INVALID_ABILITY = 8
+    TURN_LIMIT = 9
+
+
+class BattleEvent(NamedTuple):
+    turn: int
+    kind: EventType
+    actor: int    # roster slot, -1 when not applicable
+    ability: int  # index into the actor's ability list, -1 when not applicable
+    target: int   # roster slot, -1 when not applicable
+    amount: int
+    hp: int       # target HP after the event
+
+
+_MESSAGES = {
+    EventType.NO_TARGET: "No target for {ability}!",
+    EventType.NO_VALID_TARGET: "No valid target!",
+    EventType.NO_ENEMIES: "❌ No enemies left!",
+    EventType.NO_ONE_CAN_ACT: "❌ No one can act!",
+    EventType.CANNOT_ACT: "{actor} cannot act!",
+    EventType.ACTOR_DEAD: "{actor} is dead and cannot act!",
+    EventType.ON_COOLDOWN: "{ability} is on cooldown! ({amount} turns remaining)",
+    EventType.INVALID_ABILITY: "Invalid ability!",
+    EventType.TURN_LIMIT: "⚠️ Auto-play stopped: reached turn limit",
+}
+
+
+class BattleLog:
+    """Compact, append-only log of battle events.
+
+    Events are packed into a single bytearray as fixed-size records, so logging
+    a turn costs one ``struct.pack`` and no string formatting. Text is only
+    produced by ``render`` when a caller actually needs it.
+    """
+    __slots__ = ("_roster", "_data")
+    _RECORD = struct.Struct("<iBhhhqq")
+
+    def __init__(self, roster: Sequence):
+        self._roster = roster  # BattleCharacters indexed by slot
+        self._data = bytearray()
+
+    def append(self, turn: int, kind: EventType, actor: int = -1, ability: int = -1,
+               target: int = -1, amount: int = 0, hp: int = 0) -> int:
+        """Record an event and return its index."""
+        self._data += self._RECORD.pack(turn, kind, actor, ability, target, amount, hp)
+        return len(self) - 1
+
+    def __len__(self) -> int:
+        return len(self._data) // self._RECORD.size
+
+    def __getitem__(self, index: int) -> BattleEvent:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        turn, kind, actor, ability, target, amount, hp = self._RECORD.unpack_from(self._data, index * self._RECORD.size)
+        return BattleEvent(turn, EventType(kind), actor, ability, target, amount, hp)
+
+    def first_at_turn(self, turn: int) -> int:
+        """Index of the first event logged on or after ``turn`` (turns never decrease)."""
+        size = self._RECORD.size
+        return bisect_left(range(len(self)), turn,
+                           key=lambda i: struct.unpack_from("<i", self._data, i * size)[0])
+
+    def events(self, start: int = 0, stop: Optional[int] = None) -> List[BattleEvent]:
+        return [self[i] for i in range(*slice(start, stop).indices(len(self)))]
+
+    def render(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Render events[start:stop] as the messages shown to players."""
+        return [self.render_event(event) for event in self.events(start, stop)]
+
+    def render_event(self, event) -> str:
+        if isinstance(event, int):
+            event = self[event]
+        actor = self._roster[event.actor] if event.actor >= 0 else None
+        actor_name = actor.character.name if actor else "No one"
+        abilities = actor.character.abilities if actor else ()
+        ability = abilities[event.ability] if 0 <= event.ability < len(abilities) else None
+        if event.kind == EventType.ABILITY:
+            target_name = self._roster[event.target].character.name if event.target >= 0 else "Unknown"
+            return ability.render(actor_name, target_name, event.amount)
+        return _MESSAGES[event.kind].format(actor=actor_name, ability=ability.name if ability else "",
+                                            amount=event.amount)
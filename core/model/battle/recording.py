@@ -0,0 +1,321 @@
+"""Compact binary recordings of battles, for replay, seeking and audits.
+
+A recording holds the starting roster, the battle seed and one packed
+6-byte record per action (``step`` or ``execute_turn``). Replaying re-runs
+the engine from the roster and seed, checking every action against the
+recorded one, so a recording that no longer matches the rules fails loudly
+instead of showing a different battle. Every ``keyframe_interval`` actions a
+snapshot of the battle state (a pickled ``Battle.fork``, characters referenced
+by roster slot) is kept so seeking does not have to replay from turn 0.
+
+File layout (little endian): ``b"ACWR"``, format version (u8), then three
+length-prefixed sections: the zlib-compressed JSON header (roster, seed,
+keyframe interval), the zlib-compressed action records, and the keyframes as
+``(action index u32, turn u32, length u32, zlib data)``. Keyframes are
+pickles and the header names character classes to import, so only load
+recordings from trusted sources.
+
+A battle does not pickle its recorder: stores keep the recording next to the
+battle and ``resume`` it when the battle is loaded. ``tail_bytes``/``extend``
+let a store append what was recorded since its last save instead of
+rewriting the whole recording.
+"""
+import importlib
+import io
+import json
+import pickle
+import struct
+import zlib
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.model.abilities.registry import get_ability
+from core.model.battle.battle import Action, Battle
+from core.model.battle.battle_state import BattleState
+from core.model.characters.character import Character, shared_stat_block
+from core.model.characters.element import CharacterElement
+
+MAGIC = b"ACWR"
+FORMAT_VERSION = 1
+
+# Action ops; execute_turn records which side was targeted
+STEP, EXECUTE_ENEMY, EXECUTE_ALLY = 0, 1, 2
+NONE_SLOT = 0xFFFF
+NONE_ABILITY = 0xFF
+
+_PREAMBLE = struct.Struct("<4sB")
+_LENGTH = struct.Struct("<I")
+_ACTION = struct.Struct("<BHBH")  # op, actor slot, ability index, target slot (or target index for execute)
+_KEYFRAME = struct.Struct("<III")  # action index, turn, data length
+_TAIL = struct.Struct("<II")  # first action index, length of the action records
+
+
+def _character_spec(char: Character) -> Dict:
+    cls = type(char)
+    return {
+        "class": f"{cls.__module__}:{cls.__qualname__}",
+        "name": char.name,
+        "level": char.level,
+        "element": char.char_element.value,
+        "stats": list(char.stats),
+        "abilities": [ability.name for ability in char.abilities],
+    }
+
+
+def _build_character(spec: Dict) -> Character:
+    module, _, qualname = spec["class"].partition(":")
+    cls = importlib.import_module(module)
+    for part in qualname.split("."):
+        cls = getattr(cls, part)
+    if not (isinstance(cls, type) and issubclass(cls, Character)):
+        raise ValueError(f"{spec['class']} is not a character class")
+    char = cls.__new__(cls)
+    char.name = spec["name"]
+    char.level = spec["level"]
+    char.char_element = CharacterElement(spec["element"])
+    char.stats = shared_stat_block(*spec["stats"])
+    char.abilities = tuple(get_ability(name) for name in spec["abilities"])
+    return char
+
+
+class _KeyframePickler(pickle.Pickler):
+    """Pickles battle state with characters replaced by their roster slot."""
+
+    def __init__(self, file, roster: Sequence[Character]):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._slots = {id(char): slot for slot, char in enumerate(roster)}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Character):
+            return self._slots.get(id(obj))
+        return None
+
+
+class _KeyframeUnpickler(pickle.Unpickler):
+    def __init__(self, file, roster: Sequence[Character]):
+        super().__init__(file)
+        self._roster = roster
+
+    def persistent_load(self, slot):
+        return self._roster[slot]
+
+
+class Recording:
+    """Roster, seed, packed actions and keyframes of one battle."""
+
+    def __init__(self, team_a: Sequence[Character], team_b: Sequence[Character], seed: Optional[int] = None,
+                 keyframe_interval: int = 256, actions: bytes = b"",
+                 keyframes: Sequence[Tuple[int, int, bytes]] = ()):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.team_a = list(team_a)
+        self.team_b = list(team_b)
+        self.seed = seed
+        self.keyframe_interval = keyframe_interval
+        self.actions = bytearray(actions)
+        # (actions applied before the snapshot, battle turn, compressed state), in action order
+        self.keyframes: List[Tuple[int, int, bytes]] = list(keyframes)
+
+    @property
+    def roster(self) -> List[Character]:
+        return self.team_a + self.team_b
+
+    def __len__(self) -> int:
+        return len(self.actions) // _ACTION.size
+
+    def action(self, index: int) -> Tuple[int, int, int, int]:
+        """(op, actor slot, ability index, target) of the ``index``-th action."""
+        return _ACTION.unpack_from(self.actions, index * _ACTION.size)
+
+    # ---------- Encoding ----------
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps({
+            "seed": self.seed,
+            "keyframe_interval": self.keyframe_interval,
+            "team_a": [_character_spec(char) for char in self.team_a],
+            "team_b": [_character_spec(char) for char in self.team_b],
+        }).encode()
+        out = bytearray(_PREAMBLE.pack(MAGIC, FORMAT_VERSION))
+        for section in (zlib.compress(header, 9), zlib.compress(bytes(self.actions), 9)):
+            out += _LENGTH.pack(len(section)) + section
+        out += _encode_keyframes(self.keyframes)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Recording":
+        try:
+            magic, version = _PREAMBLE.unpack_from(data)
+            if magic != MAGIC:
+                raise ValueError("Not a battle recording")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported recording format version {version}")
+            offset = _PREAMBLE.size
+            sections = []
+            for _ in range(2):
+                (length,) = _LENGTH.unpack_from(data, offset)
+                offset += _LENGTH.size
+                sections.append(zlib.decompress(data[offset:offset + length]))
+                offset += length
+            keyframes = _decode_keyframes(data, offset)
+        except (struct.error, zlib.error) as e:
+            raise ValueError(f"Corrupt battle recording: {e}") from None
+
+        header = json.loads(sections[0])
+        return cls([_build_character(spec) for spec in header["team_a"]],
+                   [_build_character(spec) for spec in header["team_b"]],
+                   header["seed"], header["keyframe_interval"], sections[1], keyframes)
+
+    def tail_bytes(self, actions_from: int, keyframes_from: int) -> bytes:
+        """Actions from index ``actions_from`` and keyframes from ``keyframes_from`` on, for ``extend``."""
+        actions = bytes(self.actions[actions_from * _ACTION.size:])
+        return _TAIL.pack(actions_from, len(actions)) + actions + _encode_keyframes(self.keyframes[keyframes_from:])
+
+    def extend(self, data: bytes):
+        """Append a ``tail_bytes`` chunk, which must start at the end of this recording."""
+        try:
+            actions_from, length = _TAIL.unpack_from(data)
+            if actions_from != len(self):
+                raise ValueError(f"Recording chunk starts at action {actions_from}, not {len(self)}")
+            offset = _TAIL.size + length
+            keyframes = _decode_keyframes(data, offset)
+        except struct.error as e:
+            raise ValueError(f"Corrupt recording chunk: {e}") from None
+        self.actions += data[_TAIL.size:offset]
+        self.keyframes += keyframes
+
+    # ---------- Keyframes ----------
+
+    def _snapshot(self, battle: Battle) -> bytes:
+        buffer = io.BytesIO()
+        _KeyframePickler(buffer, self.roster).dump(battle.fork())
+        return zlib.compress(buffer.getvalue(), 1)
+
+    def _restore(self, state: bytes) -> Battle:
+        return _KeyframeUnpickler(io.BytesIO(zlib.decompress(state)), self.roster).load()
+
+    # ---------- Playback ----------
+
+    def replay(self, turn: Optional[int] = None) -> Battle:
+        """Rebuild the battle from the start, with its full log, up to ``turn`` (default: the end)."""
+        if self.keyframes and self.keyframes[0][0] == 0:
+            # Recording started mid-battle; its first keyframe is the starting point
+            battle = self._restore(self.keyframes[0][2])
+        else:
+            battle = Battle(self.team_a, self.team_b, self.seed)
+        return self._play(battle, 0, turn)
+
+    def seek(self, turn: int) -> Battle:
+        """Battle as of the first moment it reached ``turn``, replayed from the nearest keyframe.
+
+        Only the actions after that keyframe are in the returned battle's log.
+        """
+        index = bisect_left([kf_turn for _, kf_turn, _ in self.keyframes], turn) - 1
+        if index < 0:
+            return self.replay(turn)
+        action_index, _, state = self.keyframes[index]
+        return self._play(self._restore(state), action_index, turn)
+
+    def _play(self, battle: Battle, start: int, turn: Optional[int]) -> Battle:
+        for index in range(start, len(self)):
+            if turn is not None and battle.current_turn >= turn:
+                break
+            op, actor, ability, target = self.action(index)
+            if op == STEP:
+                event = battle.step()
+                if event is None:
+                    raise ValueError(f"Recording diverges at action {index}: the battle is already over")
+                event = battle.battle_log[event]
+                played = _step_record(event.actor, event.ability, event.target)
+                if played != (actor, ability, target):
+                    raise ValueError(f"Recording diverges at action {index}: "
+                                     f"recorded {(actor, ability, target)}, replayed {played}")
+            else:
+                active = battle.active_character
+                if (active.slot if active else NONE_SLOT) != actor:
+                    raise ValueError(f"Recording diverges at action {index}: another character is active")
+                battle.execute_turn(ability, "ally" if op == EXECUTE_ALLY else "enemy", target)
+        return battle
+
+
+class BattleRecorder:
+    """Appends a battle's actions to a Recording as they are played (see ``record``)."""
+
+    def __init__(self, battle: Battle, keyframe_interval: int = 256, recording: Optional[Recording] = None):
+        self.battle = battle
+        # (chunks, actions, keyframes) a store has persisted so far; None until it first saves the recording
+        self.saved: Optional[Tuple[int, int, int]] = None
+        if recording is not None:
+            self.recording = recording
+            return
+        self.recording = Recording([bc.character for bc in battle.team_a], [bc.character for bc in battle.team_b],
+                                   battle.seed, keyframe_interval)
+        if not _pristine(battle):
+            self._keyframe()
+
+    def on_step(self, action: Action):
+        _, actor, ability_index, target, _ = action
+        self._append(STEP, *_step_record(actor.slot if actor else -1, ability_index, target.slot if target else -1))
+
+    def on_execute(self, action: Action, ability_index: int, target_team: str, target_index: int):
+        actor = action[1]
+        self._append(EXECUTE_ALLY if target_team == "ally" else EXECUTE_ENEMY,
+                     actor.slot if actor else NONE_SLOT,
+                     ability_index if 0 <= ability_index < NONE_ABILITY else NONE_ABILITY,
+                     target_index if 0 <= target_index < NONE_SLOT else NONE_SLOT)
+
+    def _append(self, op: int, actor: int, ability: int, target: int):
+        recording = self.recording
+        recording.actions += _ACTION.pack(op, actor, ability, target)
+        if len(recording) % recording.keyframe_interval == 0:
+            self._keyframe()
+
+    def _keyframe(self):
+        recording = self.recording
+        recording.keyframes.append((len(recording), self.battle.current_turn, recording._snapshot(self.battle)))
+
+
+def _encode_keyframes(keyframes: Sequence[Tuple[int, int, bytes]]) -> bytes:
+    out = bytearray(_LENGTH.pack(len(keyframes)))
+    for action_index, turn, state in keyframes:
+        out += _KEYFRAME.pack(action_index, turn, len(state)) + state
+    return bytes(out)
+
+
+def _decode_keyframes(data: bytes, offset: int) -> List[Tuple[int, int, bytes]]:
+    (count,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    keyframes = []
+    for _ in range(count):
+        action_index, turn, length = _KEYFRAME.unpack_from(data, offset)
+        offset += _KEYFRAME.size
+        keyframes.append((action_index, turn, bytes(data[offset:offset + length])))
+        offset += length
+    return keyframes
+
+
+def _step_record(actor: int, ability: int, target: int) -> Tuple[int, int, int]:
+    """Actor, ability and target of a step as stored, with -1 (none) mapped to the NONE_* markers."""
+    return (actor if actor >= 0 else NONE_SLOT, ability if ability >= 0 else NONE_ABILITY,
+            target if target >= 0 else NONE_SLOT)
+
+
+def _pristine(battle: Battle) -> bool:
+    """Whether ``Battle(team_a, team_b, seed)`` alone reproduces the current state."""
+    return (battle.version == 0 and battle.current_turn == 0 and battle.state == BattleState.ONGOING
+            and all(bc.current_health == bc.character.health and not bc.status_effects and not bc.cooldowns
+                    for bc in battle.roster))
+
+
+def record(battle: Battle, keyframe_interval: int = 256) -> Recording:
+    """Start recording ``battle``; the returned Recording grows as the battle is played."""
+    recorder = BattleRecorder(battle, keyframe_interval)
+    battle.recorder = recorder
+    return recorder.recording
+
+
+def resume(battle: Battle, recording: Recording) -> BattleRecorder:
+    """Keep appending to ``recording``, kept by a store apart from the unpickled ``battle``."""
+    recorder = BattleRecorder(battle, recording=recording)
+    battle.recorder = recorder
+    return recorder
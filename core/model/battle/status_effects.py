@@ -0,0 +1,194 @@
+"""Status effects: registered effect types and the per-battle engine running them.
+
+Durations are counted in battle turns. An effect applied during turn ``t`` with
+duration ``d`` ticks at the end of turns ``t`` to ``t + d - 1`` and is removed
+after the last one. Expirations wait in a timer wheel keyed by turn, and
+damage/heal ticks are summed per character and applied in one batch, so the
+end-of-turn cost depends on the effects that tick or expire, not on the roster.
+"""
+from typing import Dict, List, Optional, Tuple
+
+BUFF = "buff"
+DEBUFF = "debuff"
+
+DAMAGE = "damage"
+HEAL = "heal"
+
+
+class StatusEffectType:
+    """Behaviour shared by every instance of a named effect."""
+    __slots__ = ("name", "category", "tick", "blocks_action", "speed_multiplier")
+
+    def __init__(self, name: str, category: str = DEBUFF, tick: Optional[str] = None,
+                 blocks_action: bool = False, speed_multiplier: float = 1.0):
+        self.name = name
+        self.category = category                  # BUFF or DEBUFF
+        self.tick = tick                          # DAMAGE or HEAL by ``value`` each turn, or None
+        self.blocks_action = blocks_action        # the character cannot act while affected
+        self.speed_multiplier = speed_multiplier  # applied to the turn meter gain
+
+    @property
+    def affects_schedule(self) -> bool:
+        return self.blocks_action or self.speed_multiplier != 1.0
+
+    def __reduce__(self):
+        # Pickled by name so that restored battles share the registered type
+        return get_status_effect_type, (self.name,)
+
+    def __repr__(self):
+        return f"StatusEffectType({self.name!r})"
+
+
+STATUS_EFFECTS: Dict[str, StatusEffectType] = {}
+# Bumped by every registration, so anything derived from the registry can be cached
+_generation = 0
+
+
+def register_status_effect(effect_type: StatusEffectType) -> StatusEffectType:
+    global _generation
+    STATUS_EFFECTS[effect_type.name] = effect_type
+    _generation += 1
+    return effect_type
+
+
+def status_effect_generation() -> int:
+    return _generation
+
+
+def get_status_effect_type(name: str) -> StatusEffectType:
+    try:
+        return STATUS_EFFECTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown status effect: {name}") from None
+
+
+BURN = register_status_effect(StatusEffectType("burn", DEBUFF, tick=DAMAGE))
+REGEN = register_status_effect(StatusEffectType("regen", BUFF, tick=HEAL))
+STUN = register_status_effect(StatusEffectType("stun", DEBUFF, blocks_action=True))
+SPEED_BUFF = register_status_effect(StatusEffectType("speed_buff", BUFF, speed_multiplier=1.3))
+SPEED_DEBUFF = register_status_effect(StatusEffectType("speed_debuff", DEBUFF, speed_multiplier=0.7))
+
+
+class StatusEffect:
+    """One effect on one character; removed once the battle reaches ``expires_at``."""
+    __slots__ = ("type", "value", "expires_at")
+
+    def __init__(self, effect_type: StatusEffectType, value, expires_at: int):
+        self.type = effect_type
+        self.value = value
+        self.expires_at = expires_at
+
+    def to_dict(self, now: int) -> dict:
+        return {"duration": self.expires_at - now, "value": self.value}
+
+
+class TimerWheel:
+    """Items bucketed by the turn they are due on.
+
+    Buckets are reused cyclically; an item due more than ``size`` turns ahead
+    simply stays in its bucket for another lap.
+    """
+    __slots__ = ("_buckets", "_now")
+
+    def __init__(self, size: int = 32, now: int = -1):
+        self._buckets: List[List[Tuple[int, object]]] = [[] for _ in range(size)]
+        self._now = now  # last turn handed out by advance()
+
+    def copy(self) -> "TimerWheel":
+        clone = TimerWheel.__new__(TimerWheel)
+        clone._buckets = [bucket[:] for bucket in self._buckets]
+        clone._now = self._now
+        return clone
+
+    def schedule(self, turn: int, item):
+        turn = max(turn, self._now + 1)
+        self._buckets[turn % len(self._buckets)].append((turn, item))
+
+    def advance(self, turn: int) -> List:
+        """Items due on any turn up to ``turn`` that were not returned yet."""
+        due = []
+        size = len(self._buckets)
+        steps = min(turn - self._now, size)
+        for t in range(turn - steps + 1, turn + 1):
+            bucket = self._buckets[t % size]
+            if not bucket:
+                continue
+            keep = []
+            for entry in bucket:
+                if entry[0] <= turn:
+                    due.append(entry[1])
+                else:
+                    keep.append(entry)
+            self._buckets[t % size] = keep
+        self._now = max(self._now, turn)
+        return due
+
+
+class StatusEngine:
+    """Applies, ticks and expires the status effects of one battle."""
+    __slots__ = ("battle", "_wheel", "_ticking")
+
+    def __init__(self, battle):
+        self.battle = battle
+        self._wheel: Optional[TimerWheel] = None  # allocated with the first effect
+        self._ticking: Dict[Tuple[int, str], StatusEffect] = {}
+
+    def fork(self, battle) -> "StatusEngine":
+        """Engine for a forked battle. Effects never change once applied, so they are shared."""
+        clone = StatusEngine(battle)
+        if self._wheel is not None:
+            clone._wheel = self._wheel.copy()
+        clone._ticking = dict(self._ticking)
+        return clone
+
+    def apply(self, bc, name: str, duration: int, value=None) -> StatusEffect:
+        """Apply (or refresh) effect ``name`` on ``bc`` for ``duration`` turns."""
+        effect_type = get_status_effect_type(name)
+        now = self.battle.current_turn
+        effect = StatusEffect(effect_type, value, now + duration)
+        bc.attach_status_effect(effect)
+        if self._wheel is None:
+            self._wheel = TimerWheel(now=now - 1)
+        self._wheel.schedule(effect.expires_at - 1, (bc.slot, effect))
+        if effect_type.tick:
+            self._ticking[(bc.slot, name)] = effect
+        if effect_type.affects_schedule:
+            self.battle.reschedule(bc)
+        return effect
+
+    def remove(self, bc, name: str):
+        effect = bc.status_effects.get(name)
+        if effect is None:
+            return
+        bc.detach_status_effect(name)
+        self._ticking.pop((bc.slot, name), None)
+        if effect.type.affects_schedule:
+            self.battle.reschedule(bc)
+
+    def clear(self, bc):
+        for name in list(bc.status_effects):
+            self.remove(bc, name)
+
+    def end_of_turn(self, turn: int):
+        """Apply this turn's damage/heal ticks, then drop the effects that run out."""
+        if self._ticking:
+            self._apply_ticks()
+        if self._wheel is not None:
+            roster = self.battle.roster
+            for slot, effect in self._wheel.advance(turn):
+                bc = roster[slot]
+                # Refreshed or removed effects leave stale entries behind
+                if bc.status_effects.get(effect.type.name) is effect:
+                    self.remove(bc, effect.type.name)
+
+    def _apply_ticks(self):
+        damage: Dict[int, int] = {}
+        heal: Dict[int, int] = {}
+        for (slot, _), effect in self._ticking.items():
+            totals = damage if effect.type.tick == DAMAGE else heal
+            totals[slot] = totals.get(slot, 0) + (effect.value or 0)
+        roster = self.battle.roster
+        for slot, amount in damage.items():
+            roster[slot].take_damage(amount)
+        for slot, amount in heal.items():
+            roster[slot].heal(amount)
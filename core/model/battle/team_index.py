@@ -0,0 +1,145 @@
+from collections.abc import Sequence
+from typing import Iterator, List, Optional
+
+
+class AliveIndex:
+    """Alive flags of one team with O(log n) updates, rank and k-th alive lookup.
+
+    Positions are indexes within the team. Backed by a Fenwick tree over the
+    alive flags, so ``count`` is O(1) and finding the k-th alive member does
+    not require filtering the team.
+    """
+    __slots__ = ("_alive", "_tree", "count")
+
+    def __init__(self, alive: List[bool]):
+        size = len(alive)
+        self._alive = bytearray(alive)
+        tree = [0] * (size + 1)
+        for i in range(1, size + 1):
+            tree[i] += self._alive[i - 1]
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self.count = sum(self._alive)
+
+    def copy(self) -> "AliveIndex":
+        clone = AliveIndex.__new__(AliveIndex)
+        clone._alive = self._alive[:]
+        clone._tree = self._tree[:]
+        clone.count = self.count
+        return clone
+
+    def __len__(self) -> int:
+        return len(self._alive)
+
+    def __contains__(self, pos: int) -> bool:
+        return 0 <= pos < len(self._alive) and self._alive[pos] == 1
+
+    def __iter__(self) -> Iterator[int]:
+        """Alive positions in team order."""
+        alive = self._alive
+        pos = alive.find(1)
+        while pos != -1:
+            yield pos
+            pos = alive.find(1, pos + 1)
+
+    def _update(self, pos: int, delta: int):
+        tree = self._tree
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def discard(self, pos: int):
+        if self._alive[pos]:
+            self._alive[pos] = 0
+            self.count -= 1
+            self._update(pos, -1)
+
+    def add(self, pos: int):
+        if not self._alive[pos]:
+            self._alive[pos] = 1
+            self.count += 1
+            self._update(pos, 1)
+
+    def rank(self, pos: int) -> int:
+        """Number of alive members before ``pos``."""
+        tree = self._tree
+        total = 0
+        while pos > 0:
+            total += tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def kth(self, k: int) -> int:
+        """Position of the k-th (0-based) alive member; k must be below ``count``."""
+        tree = self._tree
+        pos = 0
+        remaining = k + 1
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] < remaining:
+                pos = nxt
+                remaining -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class TeamView(Sequence):
+    """Live, read-only sequence of the alive members of a team.
+
+    Optionally leaves out one member (the caster, for ally lists). Length and
+    indexing cost O(log n); iterating walks the alive members only.
+    """
+    __slots__ = ("_members", "_index", "_offset", "_exclude")
+
+    def __init__(self, members: List, index: AliveIndex, offset: int, exclude: Optional[int] = None):
+        self._members = members
+        self._index = index
+        self._offset = offset   # roster slot of the first member
+        self._exclude = exclude  # team position left out of the view
+
+    def _excluding(self) -> bool:
+        return self._exclude is not None and self._exclude in self._index
+
+    def __len__(self) -> int:
+        return self._index.count - self._excluding()
+
+    def __getitem__(self, k: int):
+        if isinstance(k, slice):
+            return list(self)[k]
+        size = len(self)
+        if k < 0:
+            k += size
+        if not 0 <= k < size:
+            raise IndexError("team view index out of range")
+        if self._excluding() and k >= self._index.rank(self._exclude):
+            k += 1
+        return self._members[self._index.kth(k)]
+
+    def __iter__(self):
+        members, exclude = self._members, self._exclude
+        for pos in self._index:
+            if pos != exclude:
+                yield members[pos]
+
+    def index(self, bc, start: int = 0, stop: Optional[int] = None) -> int:
+        if bc not in self:
+            raise ValueError(f"{bc!r} is not in the team view")
+        pos = bc.slot - self._offset
+        k = self._index.rank(pos)
+        if self._excluding() and self._exclude < pos:
+            k -= 1
+        if k < start or (stop is not None and k >= stop):
+            raise ValueError(f"{bc!r} is not in the team view")
+        return k
+
+    def __contains__(self, bc) -> bool:
+        pos = getattr(bc, "slot", -1) - self._offset
+        return (0 <= pos < len(self._members) and self._members[pos] is bc
+                and pos != self._exclude and pos in self._index)
+
+    def __repr__(self):
+        return f"TeamView({list(self)!r})"
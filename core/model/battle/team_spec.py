@@ -0,0 +1,34 @@
+from typing import Dict, List, Optional, Tuple
+
+from core.model.characters.character import Character
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+
+class TeamSpec:
+    """Picklable description of a team, used to rebuild it in other processes."""
+
+    def __init__(self, names: List[str], level: int = 5, element: CharacterElement = CharacterElement.FIRE):
+        self.names = list(names)
+        self.level = level
+        self.element = element
+
+    def build(self, shared: Optional[Dict[Tuple[str, int, CharacterElement], Character]] = None) -> List[Character]:
+        """Build the team's characters.
+
+        Characters never change during a battle, so callers building many teams
+        can pass a ``shared`` dict and every (name, level, element) is built once.
+        """
+        if shared is None:
+            return [Knight(name, self.level, self.element) for name in self.names]
+        team = []
+        for name in self.names:
+            key = (name, self.level, self.element)
+            char = shared.get(key)
+            if char is None:
+                char = shared[key] = Knight(name, self.level, self.element)
+            team.append(char)
+        return team
+
+    def __repr__(self):
+        return f"TeamSpec(names={self.names}, level={self.level}, element={self.element.value})"
@@ -1,8 +1,40 @@
 from enum import Enum
+from functools import lru_cache
+from typing import NamedTuple
 
 from core.model.characters.element import CharacterElement
 
+
+class StatBlock(NamedTuple):
+    """Immutable combat stats, shared between every character that has the same values."""
+    health: int
+    speed: int
+    damage: int
+    ability_power: int
+    armor: int
+    magic_resist: int
+
+
+@lru_cache(maxsize=4096)
+def shared_stat_block(health: int, speed: int, damage: int, ability_power: int, armor: int, magic_resist: int) -> StatBlock:
+    """Return the interned StatBlock for these values (flyweight)."""
+    return StatBlock(health, speed, damage, ability_power, armor, magic_resist)
+
+
+def _stat_property(field: str) -> property:
+    def getter(self):
+        return getattr(self.stats, field)
+
+    def setter(self, value):
+        # Copy-on-write: never mutate a block other characters may share
+        self.stats = shared_stat_block(*self.stats._replace(**{field: value}))
+
+    return property(getter, setter)
+
+
 class Character:
+    __slots__ = ("name", "level", "char_element", "stats", "abilities")
+
     def __init__(self, 
             name: str,
             level: int,
@@ -18,12 +50,24 @@ class Character:
         self.name: str = name
         self.level: int = level
         self.char_element: CharacterElement = char_element
-        self.health: int = health
-        self.speed: int = speed
-        self.damage: int = damage
-        self.ability_power: int = ability_power
-        self.armor: int = armor
-        self.magic_resist: int = magic_resist
-        
+        self.stats: StatBlock = shared_stat_block(health, speed, damage, ability_power, armor, magic_resist)
+        self.abilities = ()
+
+    health = _stat_property("health")
+    speed = _stat_property("speed")
+    damage = _stat_property("damage")
+    ability_power = _stat_property("ability_power")
+    armor = _stat_property("armor")
+    magic_resist = _stat_property("magic_resist")
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "level": self.level,
+            "char_element": self.char_element.value,
+            **self.stats._asdict(),
+            "abilities": [ability.to_dict() for ability in self.abilities],
+        }
+
     def __repr__(self) -> str:
-        return f"Character(name={self.name}, level={self.level}, char_element={self.char_element.value}, health={self.health}, speed={self.speed}, damage={self.damage}, ability_power={self.ability_power}, armor={self.armor}, magic_resist={self.magic_resist})"
\ No newline at end of file
+        return f"Character(name={self.name}, level={self.level}, char_element={self.char_element.value}, health={self.health}, speed={self.speed}, damage={self.damage}, ability_power={self.ability_power}, armor={self.armor}, magic_resist={self.magic_resist})"
@@ -1,17 +1,27 @@
-from core.model.abilities.damage.basic import BasicAttack
-from core.model.characters.character import Character, CharacterElement
+from functools import lru_cache
+
+from core.model.abilities.damage.basic import BASIC_ATTACK
+from core.model.characters.character import Character, CharacterElement, StatBlock, shared_stat_block
 class Knight(Character):
+    __slots__ = ()
+    ABILITIES = (BASIC_ATTACK,)
+
     def __init__(self, name: str, level: int, char_element: CharacterElement, **kwargs):
-        base_stats = {
-            'health': 120 + (level * 10),
-            'speed': 80,
-            'damage': 90 + (level * 5),
-            'ability_power': 20,
-            'armor': 100 + (level * 8),
-            'magic_resist': 60 + (level * 4),
-            **kwargs
-        }
-        super().__init__(name, level, char_element, **base_stats)
-        self.abilities = [
-            BasicAttack()
-        ]
\ No newline at end of file
+        base_stats = self.base_stats(level)
+        if kwargs:
+            base_stats = base_stats._replace(**kwargs)
+        super().__init__(name, level, char_element, *base_stats)
+        self.abilities = self.ABILITIES
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def base_stats(level: int) -> StatBlock:
+        """Stat block for a Knight of this level, computed once per level."""
+        return shared_stat_block(
+            120 + (level * 10),  # health
+            80,                  # speed
+            90 + (level * 5),    # damage
+            20,                  # ability_power
+            100 + (level * 8),   # armor
+            60 + (level * 4),    # magic_resist
+        )
@@ -0,0 +1,93 @@
+"""Lightweight sampling profiler for profiling individual requests.
+
+A background thread periodically snapshots the stacks of the threads working
+on the profiled request (``sys._current_frames``) and counts them in collapsed
+form (``outer;inner;leaf count``), which flamegraph tools read directly. The
+thread that starts the profiler is watched; other threads join with
+``track_thread`` while they run on the request's behalf, so concurrent
+requests served by other worker threads stay out of the profile.
+"""
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Set
+
+# Threads parked in these modules are idle (thread pools, event loop, locks)
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py", "thread.py", "base_events.py")
+
+
+# Profiler of the request the current context belongs to (copied into thread pool calls)
+_active: "ContextVar[Optional[SamplingProfiler]]" = ContextVar("active_profiler", default=None)
+
+
+@contextmanager
+def track_thread() -> Iterator[None]:
+    """Sample the current thread while inside the block, if its request is being profiled."""
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    profiler.threads.add(thread_id)
+    try:
+        yield
+    finally:
+        profiler.threads.discard(thread_id)
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.001, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.threads: Set[int] = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._token = None
+
+    def start(self):
+        self.threads.add(threading.get_ident())
+        self._token = _active.set(self)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+        self.threads.clear()
+        return self.stacks
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is None or frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format understood by flamegraph.pl / speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
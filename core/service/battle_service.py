@@ -1,36 +1,402 @@
+import asyncio
+import contextvars
+import math
+import os
+import random
+import threading
 import uuid
-from core.model.battle.battle import Battle, BattleState
+import weakref
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from core.metrics import REGISTRY as METRICS, BATTLES_CREATED, BATTLES_FINISHED
+from core.model.battle.battle import Battle, BattleOutcome, BattleState
+from core.model.battle.recording import record as record_battle
+from core.model.battle.team_spec import TeamSpec
 from core.model.characters.element import CharacterElement
-from core.model.characters.knight.knight import Knight
+from core.profiler import track_thread
+from core.service.battle_store import BattleStore, VersionConflictError
+from core.service.outcome_cache import OutcomeCache
+from core.service.spectators import SpectatorHub, Subscription, battle_delta, mark
+from core.service.summary_cache import SummaryCache
+
+
+def _simulate_chunk(team_a: TeamSpec, team_b: TeamSpec, seeds: List[int], max_turns: int) -> Tuple[Counter, Counter]:
+    """Play one battle per seed and tally end states and turn counts.
+
+    Module-level so it can be shipped to ProcessPoolExecutor workers. Every
+    battle draws its decisions from its own seeded RNG, so its result depends
+    only on its seed and not on which worker ran it.
+    """
+    outcomes: Counter = Counter()
+    turns: Counter = Counter()
+    for seed in seeds:
+        outcome = Battle(team_a.build(), team_b.build(), seed).resolve(max_turns)
+        outcomes[outcome.state] += 1
+        turns[outcome.turns] += 1
+    return outcomes, turns
+
+
+def _wilson_interval(successes: int, total: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion (95% by default)."""
+    if total == 0:
+        return 0.0, 0.0
+    p = successes / total
+    denom = 1 + z * z / total
+    centre = (p + z * z / (2 * total)) / denom
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _winrate_summary(iterations: int, seed: int, results: Iterable[Tuple[Counter, Counter]]) -> Dict:
+    outcomes: Counter = Counter()
+    turns: Counter = Counter()
+    for chunk_outcomes, chunk_turns in results:
+        outcomes.update(chunk_outcomes)
+        turns.update(chunk_turns)
+    wins = outcomes[BattleState.VICTORY]
+    losses = outcomes[BattleState.DEFEAT]
+    unfinished = outcomes[BattleState.ONGOING]
+    draws = outcomes[BattleState.DRAW] + unfinished
+    counts = {"win": wins, "draw": draws, "loss": losses}
+    return {
+        "iterations": iterations,
+        "seed": seed,
+        "counts": counts,
+        "rates": {k: v / iterations for k, v in counts.items()},
+        "confidence_intervals": {k: _wilson_interval(v, iterations) for k, v in counts.items()},
+        "unfinished": unfinished,
+        "turn_histogram": dict(sorted(turns.items())),
+    }
+
+
+class ServiceBusyError(RuntimeError):
+    """Raised when the autoplay queue is full; callers should retry later."""
+
+
+T = TypeVar("T")
+
+
+def _run_tracked(fn: Callable[..., T], *args) -> T:
+    """Executor job body: lets the profiler of the submitting request sample this thread."""
+    with track_thread():
+        return fn(*args)
+
 
 class BattleService:
-    def __init__(self):
-        self._battles = {}
+    def __init__(self, max_workers: Optional[int] = None, store: Optional[BattleStore] = None,
+                 autoplay_workers: int = 4, max_pending_autoplays: int = 64,
+                 outcome_cache: Optional[OutcomeCache] = None, max_conflict_retries: int = 5,
+                 spectators: Optional[SpectatorHub] = None):
+        self._store = store if store is not None else BattleStore()
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_lock = threading.Lock()
+        # One lock per battle, dropped automatically once nobody holds it
+        self._locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+        # Bounded executor for CPU-heavy autoplay; submissions beyond the limit are rejected
+        self._autoplay_executor = ThreadPoolExecutor(max_workers=autoplay_workers, thread_name_prefix="autoplay")
+        self._autoplay_slots = threading.BoundedSemaphore(max_pending_autoplays)
+        self._summaries = SummaryCache()
+        self._outcomes = outcome_cache if outcome_cache is not None else OutcomeCache()
+        self._max_conflict_retries = max_conflict_retries
+        self._spectators = spectators if spectators is not None else SpectatorHub()
 
-    def create_battle(self, team_a_names, team_b_names, level=5):
-        team_a = [Knight(name, level, CharacterElement.FIRE) for name in team_a_names]
-        team_b = [Knight(name, level, CharacterElement.WATER) for name in team_b_names]
-        battle = Battle(team_a, team_b)
+    def create_battle(self, team_a_names, team_b_names, level=5, seed: Optional[int] = None, record: bool = False):
+        """Create and store a battle; ``seed`` makes it pick random actions, ``record`` keeps a Recording."""
+        team_a = TeamSpec(team_a_names, level, CharacterElement.FIRE).build()
+        team_b = TeamSpec(team_b_names, level, CharacterElement.WATER).build()
+        battle = Battle(team_a, team_b, seed)
+        if record:
+            record_battle(battle)
         battle_id = str(uuid.uuid4())
-        self._battles[battle_id] = battle
+        self._put(battle_id, battle)
         return battle_id, battle
 
+    def create_battles(self, specs: Iterable[Tuple[List[str], List[str], int, Optional[int]]],
+                       autoplay_turns: Optional[int] = None, record: bool = False) -> Iterator[Dict]:
+        """Create one battle per ``(team_a_names, team_b_names, level, seed)``, in one pass.
+
+        Characters are shared by every battle of the call. With ``autoplay_turns``
+        each battle is played that many turns before it is stored, without
+        rendering its log. Yields ``{"battle_id", "state", "turn"}`` per spec as
+        soon as that battle is stored.
+        """
+        shared: Dict = {}
+        for team_a_names, team_b_names, level, seed in specs:
+            team_a = TeamSpec(team_a_names, level, CharacterElement.FIRE).build(shared)
+            team_b = TeamSpec(team_b_names, level, CharacterElement.WATER).build(shared)
+            battle = Battle(team_a, team_b, seed)
+            if record:
+                record_battle(battle)
+            # Nobody else can see the battle yet, so it is played without its lock
+            turns = 0
+            while autoplay_turns and battle.state == BattleState.ONGOING and turns < autoplay_turns:
+                battle.step()
+                turns += 1
+            battle_id = str(uuid.uuid4())
+            self._put(battle_id, battle)
+            yield {"battle_id": battle_id, "state": battle.state.value, "turn": battle.current_turn}
+
+    def _put(self, battle_id: str, battle: Battle):
+        self._store.put(battle_id, battle)
+        if METRICS.enabled:
+            BATTLES_CREATED.inc()
+            if battle.state != BattleState.ONGOING:
+                BATTLES_FINISHED.inc(battle.state.value)
+
     def get_battle(self, battle_id):
-        return self._battles.get(battle_id)
+        return self._store.get(battle_id)
 
-    def next_turn(self, battle_id):
+    def list_battles(self) -> Iterator[Tuple[str, Battle]]:
+        return self._store.items()
+
+    def store_stats(self) -> Dict:
+        return self._store.stats()
+
+    def outcome_cache_stats(self) -> Dict:
+        return self._outcomes.stats()
+
+    def spectator_stats(self) -> Dict:
+        return self._spectators.stats()
+
+    def subscribe(self, battle_id) -> Subscription:
+        """Start receiving a delta for every change to the battle; call from the consuming event loop."""
+        return self._spectators.subscribe(battle_id)
+
+    def unsubscribe(self, subscription: Subscription):
+        self._spectators.unsubscribe(subscription)
+
+    @contextmanager
+    def locked(self, battle_id):
+        """Serialize access to one battle; different battles do not contend."""
+        with self._locks_guard:
+            lock = self._locks.get(battle_id)
+            if lock is None:
+                lock = self._locks[battle_id] = threading.Lock()
+        with lock:
+            yield
+
+    def _require_battle(self, battle_id) -> Battle:
         battle = self.get_battle(battle_id)
         if not battle:
             raise ValueError("Battle not found")
-        return battle.next_turn()
+        return battle
+
+    def _mutate(self, battle_id, fn: Callable[[Battle], T]) -> T:
+        """Apply ``fn`` to the battle under its lock and save the result.
+
+        With a store shared between processes another worker may save the
+        battle first; the attempt is then discarded and ``fn`` replayed on
+        the fresh copy, up to ``max_conflict_retries`` times. Spectators of
+        the battle get one delta per saved change.
+        """
+        for attempt in range(self._max_conflict_retries + 1):
+            with self.locked(battle_id):
+                battle = self._require_battle(battle_id)
+                expected_version = battle.version
+                was_ongoing = battle.state == BattleState.ONGOING
+                before = mark(battle) if self._spectators.watching(battle_id) else None
+                result = fn(battle)
+                try:
+                    self._store.save(battle_id, battle, expected_version)
+                    if METRICS.enabled and was_ongoing and battle.state != BattleState.ONGOING:
+                        BATTLES_FINISHED.inc(battle.state.value)
+                    # Still under the lock, so spectators get deltas in version order
+                    if before is not None and battle.version != expected_version:
+                        self._spectators.publish(battle_id, battle_delta(battle, before))
+                    return result
+                except VersionConflictError:
+                    if attempt == self._max_conflict_retries:
+                        raise
+
+    def get_recording(self, battle_id) -> Optional[bytes]:
+        """Encoded Recording of the battle, or None if it was created without ``record``."""
+        with self.locked(battle_id):
+            recorder = self._require_battle(battle_id).recorder
+            return recorder.recording.to_bytes() if recorder is not None else None
+
+    def get_summary(self, battle_id) -> Dict:
+        with self.locked(battle_id):
+            return self._require_battle(battle_id).get_battle_summary()
+
+    def get_version(self, battle_id) -> int:
+        with self.locked(battle_id):
+            return self._require_battle(battle_id).version
+
+    def get_summary_json(self, battle_id) -> Tuple[int, bytes]:
+        """(version, serialized summary), served from the cache when unchanged."""
+        with self.locked(battle_id):
+            battle = self._require_battle(battle_id)
+            return battle.version, self._summaries.get(battle_id, battle)
+
+    def get_delta(self, battle_id, since_turn: int) -> Dict:
+        with self.locked(battle_id):
+            return self._require_battle(battle_id).get_battle_delta(since_turn)
+
+    def list_summaries_json(self, offset: int = 0, limit: int = 50,
+                            state: Optional[BattleState] = None) -> Tuple[int, List[Tuple[str, bytes]]]:
+        """Total matching battles and one page of (battle_id, serialized summary).
+
+        The store pages over ids first, so only the battles of the page are loaded.
+        """
+        total, ids = self._store.page_ids(offset, limit, state)
+        page = []
+        for battle_id in ids:
+            with self.locked(battle_id):
+                battle = self._store.peek(battle_id)
+                if battle is not None:
+                    page.append((battle_id, self._summaries.get(battle_id, battle)))
+        return total, page
+
+    def next_turn(self, battle_id):
+        return self.turn_with_summary(battle_id)[0]
+
+    def turn_with_summary(self, battle_id) -> Tuple[str, Dict]:
+        """Play one turn and summarize the battle atomically."""
+        return self._mutate(battle_id, lambda battle: (battle.next_turn(), battle.get_battle_summary()))
 
     def autoplay(self, battle_id, max_turns=50):
-        battle = self.get_battle(battle_id)
-        if not battle:
-            raise ValueError("Battle not found")
-        results = []
+        return self._mutate(battle_id, lambda battle: (self._autoplay(battle, max_turns), battle))
+
+    def autoplay_with_summary(self, battle_id, max_turns=50) -> Tuple[List[str], Dict]:
+        return self._mutate(battle_id,
+                            lambda battle: (self._autoplay(battle, max_turns), battle.get_battle_summary()))
+
+    def submit(self, fn: Callable[..., T], *args) -> Future:
+        """Run ``fn(*args)`` on the bounded autoplay executor.
+
+        Raises ServiceBusyError instead of queueing when too many jobs are
+        already pending, so callers can shed load. The job runs in a copy of
+        the caller's context, so a profiled request also samples its worker.
+        """
+        if not self._autoplay_slots.acquire(blocking=False):
+            raise ServiceBusyError("Too many pending autoplay requests")
+        try:
+            future = self._autoplay_executor.submit(contextvars.copy_context().run, _run_tracked, fn, *args)
+        except BaseException:
+            self._autoplay_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._autoplay_slots.release())
+        return future
+
+    def submit_autoplay(self, battle_id, max_turns=50) -> Future:
+        """Run autoplay_with_summary on the bounded autoplay executor (see submit)."""
+        return self.submit(self.autoplay_with_summary, battle_id, max_turns)
+
+    def _autoplay(self, battle: Battle, max_turns: int) -> List[str]:
+        first_event = len(battle.battle_log)
         turns = 0
         while battle.state == BattleState.ONGOING and turns < max_turns:
-            results.append(battle.next_turn())
+            battle.step()
             turns += 1
-        return results, battle
\ No newline at end of file
+        # Text is only rendered here, once, for the API response
+        return battle.battle_log.render(first_event)
+
+    def autoplay_iter(self, battle_id, max_turns=50) -> Iterator[Dict]:
+        """Like autoplay, but yields each turn as soon as it has been played.
+
+        The battle is looked up eagerly so a missing battle raises ValueError
+        before the first turn is requested. Turns are only played while the
+        consumer keeps pulling, so stopping the iteration stops the battle.
+        """
+        self._require_battle(battle_id)
+
+        def play_one(battle: Battle) -> Optional[Dict]:
+            if battle.state != BattleState.ONGOING:
+                return None
+            event = battle.step()
+            return {
+                "turn": battle.current_turn,
+                "state": battle.state.value,
+                "result": battle.battle_log.render_event(event),
+            }
+
+        def turns():
+            played = 0
+            while played < max_turns:
+                # One locked load-play-save per turn, never across a yield, so other requests can interleave
+                frame = self._mutate(battle_id, play_one)
+                if frame is None:
+                    return
+                played += 1
+                yield frame
+
+        return turns()
+
+    def preview(self, battle_id, turns: int = 10) -> Tuple[List[str], Dict]:
+        """Play ``turns`` turns on a fork of the battle; the stored battle is left untouched."""
+        with self.locked(battle_id):
+            fork = self._require_battle(battle_id).fork()
+        # The fork is private to this call, so it is played outside the lock
+        return self._autoplay(fork, turns), fork.get_battle_summary()
+
+    def resolve(self, team_a_names, team_b_names, level=5, max_turns=1000,
+                seed: Optional[int] = None) -> BattleOutcome:
+        """Play a battle headlessly; nothing is stored, logged or rendered.
+
+        Unseeded battles are deterministic, so repeated matchups are answered
+        from the outcome cache. Seeded ones are cheap to repeat as well, but
+        every seed is a different battle, so they are always simulated.
+        """
+        team_a = TeamSpec(team_a_names, level, CharacterElement.FIRE).build()
+        team_b = TeamSpec(team_b_names, level, CharacterElement.WATER).build()
+        if seed is not None:
+            return Battle(team_a, team_b, seed).resolve(max_turns)
+        return self._outcomes.resolve(team_a, team_b, max_turns)
+
+    def simulate_winrate(self, team_a: TeamSpec, team_b: TeamSpec, iterations: int = 1000,
+                         seed: int = 0, max_turns: int = 50, workers: Optional[int] = None) -> Dict:
+        """Monte Carlo win rate of team A against team B.
+
+        Each battle gets its own seed drawn from ``seed``, so the same request
+        always produces the same result regardless of how battles are spread
+        across worker processes. Battles still ongoing after ``max_turns`` count
+        as draws and are also reported as ``unfinished``.
+        """
+        chunks = self._winrate_chunks(iterations, seed, workers)
+        if len(chunks) == 1:
+            return _winrate_summary(iterations, seed, [_simulate_chunk(team_a, team_b, chunks[0], max_turns)])
+        pool = self._get_process_pool()
+        futures = [pool.submit(_simulate_chunk, team_a, team_b, chunk, max_turns) for chunk in chunks]
+        return _winrate_summary(iterations, seed, (future.result() for future in futures))
+
+    async def simulate_winrate_async(self, team_a: TeamSpec, team_b: TeamSpec, iterations: int = 1000,
+                                     seed: int = 0, max_turns: int = 50, workers: Optional[int] = None) -> Dict:
+        """simulate_winrate for the event loop: awaits the worker processes instead of blocking a thread."""
+        chunks = self._winrate_chunks(iterations, seed, workers)
+        loop = asyncio.get_running_loop()
+        pool = self._get_process_pool()
+        results = await asyncio.gather(*(loop.run_in_executor(pool, _simulate_chunk, team_a, team_b, chunk, max_turns)
+                                         for chunk in chunks))
+        return _winrate_summary(iterations, seed, results)
+
+    def _winrate_chunks(self, iterations: int, seed: int, workers: Optional[int]) -> List[List[int]]:
+        """One seed per battle drawn from ``seed``, split into chunks for the worker processes."""
+        if iterations <= 0:
+            raise ValueError("iterations must be positive")
+        seed_rng = random.Random(seed)
+        seeds = [seed_rng.getrandbits(64) for _ in range(iterations)]
+        workers = min(workers or self._max_workers, iterations)
+        if workers <= 1:
+            return [seeds]
+        chunk_size = math.ceil(iterations / (workers * 4))
+        return [seeds[i:i + chunk_size] for i in range(0, iterations, chunk_size)]
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        # Locked so that concurrent first requests do not each start a pool
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self._max_workers)
+            return self._process_pool
+
+    def shutdown(self):
+        self._autoplay_executor.shutdown()
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+        self._store.close()
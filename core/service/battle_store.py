@@ -0,0 +1,342 @@
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.model.battle.battle import Battle
+from core.model.battle.battle_state import BattleState
+from core.model.battle.recording import Recording, resume
+
+FINISHED_STATES = (BattleState.VICTORY, BattleState.DEFEAT, BattleState.DRAW)
+
+
+def encode_recording(battle: Battle) -> Optional[bytes]:
+    """The battle's recording, which its pickle leaves out (see Battle.__getstate__)."""
+    return battle.recorder.recording.to_bytes() if battle.recorder is not None else None
+
+
+def load_battle(data: bytes, recording: Optional[bytes]) -> Battle:
+    """Unpickle a battle and resume its recording, if it had one."""
+    battle = pickle.loads(data)
+    if recording is not None:
+        resume(battle, Recording.from_bytes(recording))
+    return battle
+
+
+class VersionConflictError(RuntimeError):
+    """Raised by ``save`` when the stored battle changed since it was loaded."""
+
+
+class BattleStore:
+    """Unbounded in-memory battle store. Battles are kept until explicitly deleted."""
+
+    def __init__(self):
+        self._battles: Dict[str, Battle] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, battle_id: str) -> Optional[Battle]:
+        battle = self._battles.get(battle_id)
+        if battle is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return battle
+
+    def put(self, battle_id: str, battle: Battle):
+        self._battles[battle_id] = battle
+
+    def save(self, battle_id: str, battle: Battle, expected_version: int):
+        """Persist a battle mutated since ``get`` returned it at ``expected_version``.
+
+        In-memory stores hand out the live object, so there is nothing to do;
+        shared stores write it back and raise VersionConflictError if another
+        process saved a newer version first.
+        """
+
+    def delete(self, battle_id: str):
+        self._battles.pop(battle_id, None)
+
+    def items(self) -> Iterator[Tuple[str, Battle]]:
+        return iter(list(self._battles.items()))
+
+    def peek(self, battle_id: str) -> Optional[Battle]:
+        """Read a battle without counting it as an access (it must not be mutated)."""
+        return self._battles.get(battle_id)
+
+    def page_ids(self, offset: int, limit: int, state: Optional[BattleState] = None) -> Tuple[int, List[str]]:
+        """Number of battles (in ``state``, if given) and the ids of one page of them, in ``items`` order."""
+        ids = [battle_id for battle_id, battle in list(self._battles.items())
+               if state is None or battle.state == state]
+        return len(ids), ids[offset:offset + limit]
+
+    def __contains__(self, battle_id: str) -> bool:
+        return battle_id in self._battles
+
+    def __len__(self) -> int:
+        return len(self._battles)
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self),
+            "resident": len(self._battles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        pass
+
+
+# ---------- Eviction policies ----------
+# A policy receives the resident battles ordered from least to most recently
+# used and returns the id of the battle to evict.
+
+def evict_lru(battles: "OrderedDict[str, Battle]") -> str:
+    return next(iter(battles))
+
+
+def evict_finished_first(battles: "OrderedDict[str, Battle]") -> str:
+    """Evict the least recently used finished battle, falling back to plain LRU."""
+    for battle_id, battle in battles.items():
+        if battle.state in FINISHED_STATES:
+            return battle_id
+    return evict_lru(battles)
+
+
+EVICTION_POLICIES: Dict[str, Callable[["OrderedDict[str, Battle]"], str]] = {
+    "lru": evict_lru,
+    "finished_first": evict_finished_first,
+}
+
+
+class BoundedBattleStore(BattleStore):
+    """Battle store with a size cap, idle TTL and spill-to-disk.
+
+    At most ``max_size`` battles stay in memory. Battles idle for longer than
+    ``ttl`` seconds, or picked by the eviction policy when the store is full,
+    are pickled into a SQLite file and transparently reloaded by ``get``.
+    Without a ``spill_path`` evicted battles are dropped. Spilled battles not
+    read back within ``spill_ttl`` seconds are deleted from the file.
+    """
+    PURGE_INTERVAL = 60.0  # seconds between sweeps of expired spilled battles
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None,
+                 policy: str = "finished_first", spill_path: Optional[str] = None,
+                 spill_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        super().__init__()
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.policy = policy
+        self._evict = EVICTION_POLICIES[policy]
+        self._clock = clock
+        # Spill times outlive the process, so they use the wall clock
+        self._wall_clock = wall_clock
+        self.spill_ttl = spill_ttl
+        self._next_purge = 0.0
+        self._battles: "OrderedDict[str, Battle]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self.disk_hits = 0
+        self.expired = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if spill_path:
+            self._db = sqlite3.connect(spill_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS battles "
+                             "(id TEXT PRIMARY KEY, state TEXT, data BLOB, spilled_at REAL, recording BLOB)")
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(battles)")}
+            if "spilled_at" not in columns:
+                # Files written before spill_ttl existed; their rows count as spilled now
+                self._db.execute("ALTER TABLE battles ADD COLUMN spilled_at REAL")
+                self._db.execute("UPDATE battles SET spilled_at = ?", (wall_clock(),))
+            if "recording" not in columns:
+                # Older rows pickled their recorder inside the battle
+                self._db.execute("ALTER TABLE battles ADD COLUMN recording BLOB")
+            self._db.execute("CREATE INDEX IF NOT EXISTS battles_spilled_at ON battles (spilled_at)")
+            self._db.commit()
+
+    def get(self, battle_id: str) -> Optional[Battle]:
+        with self._lock:
+            self._expire_idle()
+            battle = self._battles.get(battle_id)
+            if battle is not None:
+                self.hits += 1
+                self._touch(battle_id)
+                return battle
+
+            battle = self._load(battle_id)
+            if battle is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(battle_id, battle)
+            return battle
+
+    def put(self, battle_id: str, battle: Battle):
+        with self._lock:
+            self._expire_idle()
+            self._insert(battle_id, battle)
+
+    def save(self, battle_id: str, battle: Battle, expected_version: int):
+        """Put a battle mutated since ``get`` back in place if it was evicted meanwhile.
+
+        ``get`` hands out the live object, but the per-battle lock does not stop
+        another request or the TTL from spilling it halfway through a turn. The
+        spilled pickle is then stale, so the live battle replaces it.
+        """
+        with self._lock:
+            if self._battles.get(battle_id) is battle:
+                return
+            if self._db is not None:
+                self._db.execute("DELETE FROM battles WHERE id = ?", (battle_id,))
+                self._db.commit()
+            self._insert(battle_id, battle)
+
+    def delete(self, battle_id: str):
+        with self._lock:
+            self._battles.pop(battle_id, None)
+            self._last_access.pop(battle_id, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM battles WHERE id = ?", (battle_id,))
+                self._db.commit()
+
+    def items(self) -> Iterator[Tuple[str, Battle]]:
+        """Resident battles first, then spilled ones (loaded without being promoted)."""
+        with self._lock:
+            resident = list(self._battles.items())
+            spilled = (self._db.execute("SELECT id, data, recording FROM battles").fetchall()
+                       if self._db is not None else [])
+        yield from resident
+        for battle_id, data, recording in spilled:
+            yield battle_id, load_battle(data, recording)
+
+    def peek(self, battle_id: str) -> Optional[Battle]:
+        """Resident battle, or a spilled one loaded without bringing it back into memory."""
+        with self._lock:
+            battle = self._battles.get(battle_id)
+            if battle is not None or self._db is None:
+                return battle
+            row = self._db.execute("SELECT data, recording FROM battles WHERE id = ?", (battle_id,)).fetchone()
+        return load_battle(*row) if row is not None else None
+
+    def page_ids(self, offset: int, limit: int, state: Optional[BattleState] = None) -> Tuple[int, List[str]]:
+        """Like BattleStore.page_ids; spilled battles are paged in SQL, never unpickled."""
+        with self._lock:
+            resident = [battle_id for battle_id, battle in self._battles.items()
+                        if state is None or battle.state == state]
+            page = resident[offset:offset + limit]
+            if self._db is None:
+                return len(resident), page
+            where, params = ("WHERE state = ?", (state.value,)) if state is not None else ("", ())
+            spilled = self._db.execute(f"SELECT COUNT(*) FROM battles {where}", params).fetchone()[0]
+            if len(page) < limit:
+                skip = max(0, offset - len(resident))
+                page += [row[0] for row in self._db.execute(
+                    f"SELECT id FROM battles {where} ORDER BY rowid LIMIT ? OFFSET ?",
+                    params + (limit - len(page), skip))]
+            return len(resident) + spilled, page
+
+    def __contains__(self, battle_id: str) -> bool:
+        with self._lock:
+            if battle_id in self._battles:
+                return True
+            if self._db is None:
+                return False
+            return self._db.execute("SELECT 1 FROM battles WHERE id = ?", (battle_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return len(self._battles) + self._spilled_count()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            spilled = self._spilled_count()
+            return {
+                "size": len(self._battles) + spilled,
+                "resident": len(self._battles),
+                "spilled": spilled,
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "policy": self.policy,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ---------- Helper Methods ----------
+
+    def _touch(self, battle_id: str):
+        self._battles.move_to_end(battle_id)
+        self._last_access[battle_id] = self._clock()
+
+    def _insert(self, battle_id: str, battle: Battle):
+        self._battles[battle_id] = battle
+        self._touch(battle_id)
+        while len(self._battles) > self.max_size:
+            self._spill(self._evict(self._battles))
+
+    def _expire_idle(self):
+        self._purge_spilled()
+        if self.ttl is None:
+            return
+        deadline = self._clock() - self.ttl
+        # Resident battles are ordered by last access, so expired ones are at the front
+        while self._battles:
+            oldest = next(iter(self._battles))
+            if self._last_access[oldest] > deadline:
+                break
+            self._spill(oldest)
+
+    def _spill(self, battle_id: str):
+        battle = self._battles.pop(battle_id)
+        self._last_access.pop(battle_id, None)
+        self.evictions += 1
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO battles (id, state, data, spilled_at, recording) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (battle_id, battle.state.value, pickle.dumps(battle, pickle.HIGHEST_PROTOCOL),
+                              self._wall_clock(), encode_recording(battle)))
+            self._db.commit()
+
+    def _purge_spilled(self):
+        """Delete spilled battles older than ``spill_ttl``, at most once per PURGE_INTERVAL."""
+        if self._db is None or self.spill_ttl is None:
+            return
+        now = self._wall_clock()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + min(self.PURGE_INTERVAL, self.spill_ttl)
+        cursor = self._db.execute("DELETE FROM battles WHERE spilled_at < ?", (now - self.spill_ttl,))
+        self._db.commit()
+        self.expired += cursor.rowcount
+
+    def _load(self, battle_id: str) -> Optional[Battle]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT data, recording FROM battles WHERE id = ?", (battle_id,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("DELETE FROM battles WHERE id = ?", (battle_id,))
+        self._db.commit()
+        return load_battle(*row)
+
+    def _spilled_count(self) -> int:
+        if self._db is None:
+            return 0
+        return self._db.execute("SELECT COUNT(*) FROM battles").fetchone()[0]
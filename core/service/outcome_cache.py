@@ -0,0 +1,147 @@
+"""Memoized outcomes of deterministic headless battles.
+
+With the current rules a battle is fully determined by the two team
+compositions, so ``Battle.resolve`` results can be reused. Entries are keyed
+by a canonical signature of both teams and tagged with a hash of the rules;
+any change to the engine sources, ability definitions or status effect types
+produces a new hash and drops the cache. The hash is only recomputed when an
+ability or status effect type is (re)registered.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.model.abilities.registry import ABILITY_REGISTRY, ability_registry_generation
+from core.model.battle.battle import Battle, BattleOutcome
+from core.model.battle.status_effects import STATUS_EFFECTS, status_effect_generation
+from core.model.characters.character import Character
+
+# Modules whose code defines the battle rules
+_RULE_MODULES = (
+    "core.model.battle.battle",
+    "core.model.battle.battle_character",
+    "core.model.battle.battle_log",
+    "core.model.battle.battle_state",
+    "core.model.battle.status_effects",
+    "core.model.battle.team_index",
+    "core.model.abilities.ability",
+    "core.model.abilities.registry",
+    "core.model.characters.character",
+    "core.model.characters.element",
+    "core.model.characters.knight.knight",
+)
+
+TeamSignature = Tuple[Tuple, ...]
+
+
+def team_signature(team: Sequence[Character]) -> TeamSignature:
+    """Everything about a team that can change a battle: class, level, element, stats, abilities and order."""
+    return tuple((type(char).__qualname__, char.level, char.char_element.value, tuple(char.stats),
+                  tuple(ability.name for ability in char.abilities))
+                 for char in team)
+
+
+@lru_cache(maxsize=None)
+def _sources_digest() -> str:
+    digest = hashlib.sha256()
+    for name in _RULE_MODULES:
+        with open(sys.modules[name].__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# ((ability generation, status effect generation), version) of the last computation
+_rules_version: Tuple[Tuple[int, int], str] = ((-1, -1), "")
+
+
+def rules_version() -> str:
+    """Hash of the engine sources plus every registered ability and status effect type."""
+    global _rules_version
+    generations = (ability_registry_generation(), status_effect_generation())
+    cached_generations, version = _rules_version
+    if cached_generations == generations:
+        return version
+    digest = hashlib.sha256(_sources_digest().encode())
+    for name in sorted(ABILITY_REGISTRY):
+        digest.update(repr(ABILITY_REGISTRY[name].definition).encode())
+    for name in sorted(STATUS_EFFECTS):
+        effect = STATUS_EFFECTS[name]
+        digest.update(repr((name, effect.category, effect.tick, effect.blocks_action,
+                            effect.speed_multiplier)).encode())
+    # Generations were read first: a registration made meanwhile only forces another computation
+    _rules_version = (generations, digest.hexdigest()[:16])
+    return _rules_version[1]
+
+
+class OutcomeCache:
+    """Bounded LRU of battle outcomes per (team A, team B, max_turns) signature.
+
+    Survivor names are not part of the key: they are stored by slot and filled
+    in from the teams of each lookup.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        # key -> (state, turns, [(slot, hp)], damage_dealt)
+        self._entries: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = rules_version()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def resolve(self, team_a: List[Character], team_b: List[Character], max_turns: Optional[int] = None) -> BattleOutcome:
+        """Outcome of ``Battle(team_a, team_b).resolve(max_turns)``, simulated only on a miss."""
+        key = (team_signature(team_a), team_signature(team_b), max_turns)
+        version = rules_version()
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+                self.invalidations += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            outcome = Battle(team_a, team_b).resolve(max_turns)
+            entry = (outcome.state, outcome.turns, [(slot, hp) for slot, _, hp in outcome.survivors],
+                     outcome.damage_dealt)
+            with self._lock:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return outcome
+
+        state, turns, survivors, damage_dealt = entry
+        roster = list(team_a) + list(team_b)
+        return BattleOutcome(state, turns, [(slot, roster[slot].name, hp) for slot, hp in survivors],
+                             list(damage_dealt))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "rules_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,241 @@
+"""Battle store shared by several worker processes through sharded SQLite files.
+
+Every battle lives in exactly one shard, picked by ``crc32(battle_id) %
+shards``, so all workers route a battle to the same file and writes to
+different shards never contend. Battles are stored as zlib-compressed pickles
+next to their version; ``save`` is a compare-and-swap on that version, so two
+workers playing the same battle cannot silently overwrite each other.
+
+Recordings are not part of the pickle. They are stored as chunks: the full
+recording when the battle is put, then one chunk with the actions and
+keyframes added by each save, written in the same transaction as the battle.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.model.battle.battle import Battle
+from core.model.battle.battle_state import BattleState
+from core.model.battle.recording import Recording, resume
+from core.service.battle_store import BattleStore, VersionConflictError
+
+
+def serialize_battle(battle: Battle) -> bytes:
+    return zlib.compress(pickle.dumps(battle, pickle.HIGHEST_PROTOCOL), 1)
+
+
+def deserialize_battle(data: bytes) -> Battle:
+    return pickle.loads(zlib.decompress(data))
+
+
+def shard_for(battle_id: str, shards: int) -> int:
+    return zlib.crc32(battle_id.encode()) % shards
+
+
+class ShardedBattleStore(BattleStore):
+    """SQLite-backed store that any number of processes can open at once.
+
+    Each process keeps up to ``cache_size`` decoded battles; a cached battle is
+    reused as long as its stored version has not moved, which costs one
+    indexed read instead of a decode.
+    """
+
+    MAX_RECORDING_CHUNKS = 64  # past this many chunks a save rewrites the recording as one
+
+    def __init__(self, directory: str, shards: int = 8, cache_size: int = 1024, timeout: float = 30.0):
+        super().__init__()
+        if shards <= 0:
+            raise ValueError("shards must be positive")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shards = shards
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[int, Battle]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.conflicts = 0
+        self._dbs: List[sqlite3.Connection] = []
+        for shard in range(shards):
+            db = sqlite3.connect(os.path.join(directory, f"shard-{shard}.db"), timeout=timeout,
+                                 check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS battles "
+                       "(id TEXT PRIMARY KEY, version INTEGER NOT NULL, state TEXT NOT NULL, data BLOB NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS recording_chunks "
+                       "(id TEXT NOT NULL, chunk INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (id, chunk))")
+            self._dbs.append(db)
+
+    def _db(self, battle_id: str) -> sqlite3.Connection:
+        return self._dbs[shard_for(battle_id, self.shards)]
+
+    def get(self, battle_id: str) -> Optional[Battle]:
+        with self._lock:
+            db = self._db(battle_id)
+            row = db.execute("SELECT version FROM battles WHERE id = ?", (battle_id,)).fetchone()
+            if row is None:
+                self._cache.pop(battle_id, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            cached = self._cache.get(battle_id)
+            # Reuse only if nobody saved since, and the copy was not mutated without being saved
+            if cached is not None and cached[0] == row[0] == cached[1].version:
+                self._cache.move_to_end(battle_id)
+                return cached[1]
+
+            # One read transaction, so the recording matches the battle version read
+            db.execute("BEGIN")
+            try:
+                row = db.execute("SELECT version, data FROM battles WHERE id = ?", (battle_id,)).fetchone()
+                chunks = [chunk for (chunk,) in db.execute(
+                    "SELECT data FROM recording_chunks WHERE id = ? ORDER BY chunk", (battle_id,))]
+            finally:
+                db.execute("COMMIT")
+            if row is None:
+                return None
+            battle = deserialize_battle(row[1])
+            if chunks:
+                recording = Recording.from_bytes(chunks[0])
+                for chunk in chunks[1:]:
+                    recording.extend(chunk)
+                resume(battle, recording).saved = (len(chunks), len(recording), len(recording.keyframes))
+            self._remember(battle_id, row[0], battle)
+            return battle
+
+    def put(self, battle_id: str, battle: Battle):
+        with self._lock:
+            db = self._db(battle_id)
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("INSERT OR REPLACE INTO battles (id, version, state, data) VALUES (?, ?, ?, ?)",
+                           (battle_id, battle.version, battle.state.value, serialize_battle(battle)))
+                saved = self._save_recording(db, battle_id, battle, replace=True)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            if saved is not None:
+                battle.recorder.saved = saved
+            self._remember(battle_id, battle.version, battle)
+
+    def save(self, battle_id: str, battle: Battle, expected_version: int):
+        if battle.version == expected_version:
+            return
+        with self._lock:
+            db = self._db(battle_id)
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = db.execute(
+                    "UPDATE battles SET version = ?, state = ?, data = ? WHERE id = ? AND version = ?",
+                    (battle.version, battle.state.value, serialize_battle(battle), battle_id, expected_version))
+                saved = self._save_recording(db, battle_id, battle, replace=False) if cursor.rowcount else None
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if cursor.rowcount == 0:
+                db.execute("ROLLBACK")
+                # Our copy is stale (or the battle is gone); never serve it again
+                self._cache.pop(battle_id, None)
+                self.conflicts += 1
+                raise VersionConflictError(f"Battle {battle_id} changed since version {expected_version}")
+            db.execute("COMMIT")
+            if saved is not None:
+                battle.recorder.saved = saved
+            self._remember(battle_id, battle.version, battle)
+
+    def delete(self, battle_id: str):
+        with self._lock:
+            db = self._db(battle_id)
+            db.execute("DELETE FROM battles WHERE id = ?", (battle_id,))
+            db.execute("DELETE FROM recording_chunks WHERE id = ?", (battle_id,))
+            self._cache.pop(battle_id, None)
+
+    def items(self) -> Iterator[Tuple[str, Battle]]:
+        for shard in range(self.shards):
+            with self._lock:
+                ids = [row[0] for row in self._dbs[shard].execute("SELECT id FROM battles ORDER BY rowid")]
+            for battle_id in ids:
+                battle = self.get(battle_id)
+                if battle is not None:
+                    yield battle_id, battle
+
+    def peek(self, battle_id: str) -> Optional[Battle]:
+        return self.get(battle_id)
+
+    def page_ids(self, offset: int, limit: int, state: Optional[BattleState] = None) -> Tuple[int, List[str]]:
+        """Count and page of ids in ``items`` order, computed in SQL shard by shard."""
+        where, params = ("WHERE state = ?", (state.value,)) if state is not None else ("", ())
+        total = 0
+        page: List[str] = []
+        with self._lock:
+            for db in self._dbs:
+                count = db.execute(f"SELECT COUNT(*) FROM battles {where}", params).fetchone()[0]
+                skip = max(0, offset - total)
+                if len(page) < limit and skip < count:
+                    page += [row[0] for row in db.execute(
+                        f"SELECT id FROM battles {where} ORDER BY rowid LIMIT ? OFFSET ?",
+                        params + (limit - len(page), skip))]
+                total += count
+        return total, page
+
+    def __contains__(self, battle_id: str) -> bool:
+        with self._lock:
+            return self._db(battle_id).execute("SELECT 1 FROM battles WHERE id = ?", (battle_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(db.execute("SELECT COUNT(*) FROM battles").fetchone()[0] for db in self._dbs)
+
+    def stats(self) -> Dict:
+        size = len(self)
+        with self._lock:
+            return {
+                "size": size,
+                "resident": len(self._cache),
+                "shards": self.shards,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "conflicts": self.conflicts,
+            }
+
+    def close(self):
+        with self._lock:
+            for db in self._dbs:
+                db.close()
+            self._dbs = []
+            self._cache.clear()
+
+    def _save_recording(self, db: sqlite3.Connection, battle_id: str, battle: Battle,
+                        replace: bool) -> Optional[Tuple[int, int, int]]:
+        """Write what the battle recorded since its last save; returns the recorder's new ``saved`` mark."""
+        recorder = battle.recorder
+        if recorder is None:
+            if replace:
+                db.execute("DELETE FROM recording_chunks WHERE id = ?", (battle_id,))
+            return None
+        recording = recorder.recording
+        mark = (len(recording), len(recording.keyframes))
+        saved = recorder.saved
+        if replace or saved is None or saved[0] >= self.MAX_RECORDING_CHUNKS:
+            db.execute("DELETE FROM recording_chunks WHERE id = ?", (battle_id,))
+            db.execute("INSERT INTO recording_chunks (id, chunk, data) VALUES (?, 0, ?)",
+                       (battle_id, recording.to_bytes()))
+            return (1, *mark)
+        chunks, actions, keyframes = saved
+        if (actions, keyframes) == mark:
+            return saved
+        db.execute("INSERT INTO recording_chunks (id, chunk, data) VALUES (?, ?, ?)",
+                   (battle_id, chunks, recording.tail_bytes(actions, keyframes)))
+        return (chunks + 1, *mark)
+
+    def _remember(self, battle_id: str, version: int, battle: Battle):
+        self._cache[battle_id] = (version, battle)
+        self._cache.move_to_end(battle_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,147 @@
+"""Fan-out of battle updates to live spectators.
+
+Battles are played on worker threads while spectators are served by the
+event loop, so every mutation of a watched battle is turned into one delta,
+encoded to JSON once, and handed to the loop of each subscriber in a single
+call. Every subscriber has a bounded queue: a spectator that cannot keep up
+has its backlog dropped and is sent a fresh snapshot instead, so a slow
+client never holds memory for the whole battle or stalls the others.
+
+Only subscribers of this process are reached; with several uvicorn workers a
+spectator sees the turns played by the worker it is connected to.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from core.model.battle.battle import Battle
+
+# Queued instead of the dropped backlog; the consumer answers it with a snapshot
+RESYNC = (-1, -1, b"")
+
+Frame = Tuple[int, int, bytes]  # (version before, version after, encoded message)
+
+
+class BattleMark(NamedTuple):
+    """What a battle looked like before a mutation, to diff against afterwards."""
+    version: int
+    health: Tuple[int, ...]
+    alive: Tuple[bool, ...]
+    events: int
+
+
+def mark(battle: Battle) -> BattleMark:
+    roster = battle.roster
+    return BattleMark(battle.version, tuple(bc.current_health for bc in roster),
+                      tuple(bc.is_alive for bc in roster), len(battle.battle_log))
+
+
+def battle_delta(battle: Battle, before: BattleMark) -> Dict:
+    """Characters whose HP or alive flag changed since ``before``, plus the events logged since."""
+    active = battle.get_active_character()
+    return {
+        "type": "delta",
+        "state": battle.state.value,
+        "turn": battle.current_turn,
+        "version": battle.version,
+        "from_version": before.version,
+        "characters": [{"slot": bc.slot, "current_health": bc.current_health, "is_alive": bc.is_alive}
+                       for bc in battle.roster
+                       if bc.current_health != before.health[bc.slot] or bc.is_alive != before.alive[bc.slot]],
+        "active_character": str(active) if active else None,
+        "log": battle.battle_log.render(before.events),
+    }
+
+
+class Subscription:
+    """One spectator: a bounded queue of frames fed from any thread."""
+
+    def __init__(self, battle_id: str, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.battle_id = battle_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Frame]" = asyncio.Queue(max_queue)
+
+    def _offer(self, frame: Frame) -> bool:
+        """Runs on the subscriber's loop; False if the backlog had to be dropped."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+    async def get(self) -> Frame:
+        return await self.queue.get()
+
+
+class SpectatorHub:
+    """Subscribers per battle; ``publish`` may be called from any thread."""
+
+    def __init__(self, max_queue: int = 64):
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.resyncs = 0
+
+    def subscribe(self, battle_id: str) -> Subscription:
+        """Register a spectator; must be called from the event loop that will consume it."""
+        subscription = Subscription(battle_id, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers[battle_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.battle_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.battle_id]
+
+    def watching(self, battle_id: str) -> bool:
+        """Cheap check so unwatched battles skip building deltas altogether."""
+        return battle_id in self._subscribers
+
+    def publish(self, battle_id: str, message: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(battle_id, ()))
+        if not subscribers:
+            return
+        frame = (message["from_version"], message["version"], json.dumps(message).encode())
+        self.published += 1
+        # One wake-up per event loop rather than one per spectator
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, group, frame)
+            except RuntimeError:
+                # The loop was closed under us; its spectators are gone too
+                pass
+
+    def _deliver(self, subscriptions: List[Subscription], frame: Frame):
+        for subscription in subscriptions:
+            if not subscription._offer(frame):
+                self.resyncs += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "battles": len(self._subscribers),
+                "spectators": sum(len(subscribers) for subscribers in self._subscribers.values()),
+                "published": self.published,
+                "resyncs": self.resyncs,
+            }
+
+
+def snapshot_frame(version: int, summary_json: bytes) -> bytes:
+    """Full-state frame built around an already serialized battle summary."""
+    return b'{"type": "snapshot", "version": %d, "battle": %s}' % (version, summary_json)
@@ -0,0 +1,43 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from core.model.battle.battle import Battle
+
+
+class SummaryCache:
+    """Serialized battle summaries, cached per battle version.
+
+    Only the latest version of each battle is kept and the cache holds at most
+    ``max_entries`` battles, evicting the least recently read one.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, battle_id: str, battle: Battle) -> bytes:
+        """JSON-encoded ``battle.get_battle_summary()``, re-serialized only when the version changed."""
+        with self._lock:
+            entry = self._entries.get(battle_id)
+            if entry is not None and entry[0] == battle.version:
+                self._entries.move_to_end(battle_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        payload = json.dumps(battle.get_battle_summary()).encode()
+        with self._lock:
+            self._entries[battle_id] = (battle.version, payload)
+            self._entries.move_to_end(battle_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def discard(self, battle_id: str):
+        with self._lock:
+            self._entries.pop(battle_id, None)
@@ -0,0 +1,309 @@
+"""Offline round-robin and Swiss tournaments between teams.
+
+Matches are played headlessly (``Battle.resolve``) across a process pool and
+every result is appended to the output file (JSONL or CSV) as soon as its
+chunk completes. The output doubles as the checkpoint: restarting with the
+same teams and settings skips every match already recorded there. An output
+written by anything else (no checkpoint next to it) is only replaced on request.
+"""
+import csv
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from core.model.battle.battle import Battle
+from core.model.battle.battle_state import BattleState
+from core.model.battle.team_spec import TeamSpec
+from core.model.characters.element import CharacterElement
+from core.service.outcome_cache import rules_version
+
+FORMATS = ("round-robin", "swiss")
+RESULT_FIELDS = ("match", "round", "team_a", "team_b", "winner", "state", "turns", "survivors_a", "survivors_b")
+POINTS = {"win": 1.0, "draw": 0.5, "loss": 0.0}
+
+
+class Team(NamedTuple):
+    id: str
+    spec: TeamSpec
+
+
+class Match(NamedTuple):
+    id: str
+    round: int
+    team_a: int  # index into the team list
+    team_b: int
+
+
+def load_teams(path: str) -> List[Team]:
+    """Teams from a JSONL file: ``{"id": ..., "names": [...], "level": 5, "element": "fire"}`` per line.
+
+    ``id`` defaults to the line number; ``level`` and ``element`` are optional.
+    """
+    teams = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if not data.get("names"):
+                raise ValueError(f"{path}:{line_no}: team has no names")
+            element = CharacterElement(data.get("element", CharacterElement.FIRE.value))
+            teams.append(Team(str(data.get("id", line_no)), TeamSpec(data["names"], data.get("level", 5), element)))
+    ids = [team.id for team in teams]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{path}: duplicate team ids")
+    return teams
+
+
+# ---------- Pairings ----------
+
+def round_robin(teams: List[Team]) -> List[Match]:
+    """Every ordered pair, so each team plays every other one from both sides."""
+    return [Match(f"{a.id}|{b.id}", 0, i, j)
+            for i, a in enumerate(teams) for j, b in enumerate(teams) if i != j]
+
+
+def swiss_round(teams: List[Team], round_no: int, results: List[Dict]) -> Tuple[List[Match], Optional[int]]:
+    """Pairings of one Swiss round from the results of the previous ones.
+
+    Teams are ranked by points (input order breaks ties) and the best unpaired
+    team meets the next best one it has not played yet. With an odd count the
+    lowest ranked team without a bye sits out. Returns (matches, bye team index).
+    """
+    index = {team.id: i for i, team in enumerate(teams)}
+    points = [0.0] * len(teams)
+    played: Set[Tuple[int, int]] = set()
+    byes: Set[int] = set()
+    for result in results:
+        if result["team_b"] is None:
+            byes.add(index[result["team_a"]])
+            points[index[result["team_a"]]] += POINTS["win"]
+            continue
+        a, b = index[result["team_a"]], index[result["team_b"]]
+        played.update(((a, b), (b, a)))
+        points[a] += _points(result, result["team_a"])
+        points[b] += _points(result, result["team_b"])
+
+    ranking = sorted(range(len(teams)), key=lambda i: (-points[i], i))
+    bye = None
+    if len(ranking) % 2:
+        bye = next((i for i in reversed(ranking) if i not in byes), ranking[-1])
+        ranking.remove(bye)
+
+    matches = []
+    unpaired = list(ranking)
+    while unpaired:
+        a = unpaired.pop(0)
+        # Rematch only when everyone left has already been played
+        b = next((b for b in unpaired if (a, b) not in played), unpaired[0])
+        unpaired.remove(b)
+        matches.append(Match(f"r{round_no}:{teams[a].id}|{teams[b].id}", round_no, a, b))
+    return matches, bye
+
+
+def _points(result: Dict, team_id: str) -> float:
+    if result["winner"] is None:
+        return POINTS["draw"]
+    return POINTS["win"] if result["winner"] == team_id else POINTS["loss"]
+
+
+# ---------- Workers ----------
+
+_worker_teams: List[Team] = []
+
+
+def _init_worker(teams: List[Team]):
+    global _worker_teams
+    _worker_teams = teams
+
+
+def _play_chunk(matches: List[Match], max_turns: int) -> List[Dict]:
+    """Play a chunk of matches. Module-level so it can run in pool workers."""
+    return [play_match(_worker_teams, match, max_turns) for match in matches]
+
+
+def play_match(teams: List[Team], match: Match, max_turns: int) -> Dict:
+    team_a, team_b = teams[match.team_a], teams[match.team_b]
+    outcome = Battle(team_a.spec.build(), team_b.spec.build()).resolve(max_turns)
+    size_a = len(team_a.spec.names)
+    winner = {BattleState.VICTORY: team_a.id, BattleState.DEFEAT: team_b.id}.get(outcome.state)
+    return {
+        "match": match.id,
+        "round": match.round,
+        "team_a": team_a.id,
+        "team_b": team_b.id,
+        "winner": winner,
+        "state": outcome.state.value,
+        "turns": outcome.turns,
+        "survivors_a": sum(1 for slot, _, _ in outcome.survivors if slot < size_a),
+        "survivors_b": sum(1 for slot, _, _ in outcome.survivors if slot >= size_a),
+    }
+
+
+# ---------- Result files ----------
+
+class ResultWriter:
+    """Append-only JSONL or CSV result file that can be reopened to resume a run."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.csv = path.endswith(".csv")
+        self.completed: List[Dict] = list(self._read_existing())
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="")
+        self._csv_writer = csv.DictWriter(self._file, RESULT_FIELDS) if self.csv else None
+        if self._csv_writer and new_file:
+            self._csv_writer.writeheader()
+
+    def _read_existing(self) -> Iterator[Dict]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            # A run killed mid-write leaves a partial last line behind; drop it
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+        lines = data[:end].decode().splitlines()
+        if self.csv:
+            for row in csv.DictReader(lines):
+                yield {**row, "round": int(row["round"]), "turns": int(row["turns"]),
+                       "survivors_a": int(row["survivors_a"]), "survivors_b": int(row["survivors_b"]),
+                       "winner": row["winner"] or None, "team_b": row["team_b"] or None}
+        else:
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+    def write(self, results: Iterable[Dict]):
+        for result in results:
+            if self._csv_writer:
+                self._csv_writer.writerow(result)
+            else:
+                self._file.write(json.dumps(result) + "\n")
+            self.completed.append(result)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _config_digest(teams: List[Team], fmt: str, rounds: int, max_turns: int) -> str:
+    config = {
+        "teams": [(team.id, team.spec.names, team.spec.level, team.spec.element.value) for team in teams],
+        "format": fmt,
+        "rounds": rounds,
+        "max_turns": max_turns,
+        "rules": rules_version(),
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+# ---------- Runner ----------
+
+class Tournament:
+    def __init__(self, teams: List[Team], fmt: str = "round-robin", rounds: Optional[int] = None,
+                 max_turns: int = 1000, workers: Optional[int] = None, chunk_size: int = 64):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown tournament format: {fmt}")
+        if len(teams) < 2:
+            raise ValueError("A tournament needs at least two teams")
+        self.teams = teams
+        self.format = fmt
+        self.rounds = rounds or (max(1, math.ceil(math.log2(len(teams)))) if fmt == "swiss" else 1)
+        self.max_turns = max_turns
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def run(self, output: str, on_result: Optional[Callable[[Dict], None]] = None,
+            overwrite: bool = False) -> List[Dict]:
+        """Play every match not yet in ``output`` and return all results, old and new.
+
+        A ``<output>.checkpoint`` file records the tournament settings; resuming
+        with different teams, settings or rules, or into an existing output
+        without a checkpoint, raises ValueError. ``overwrite`` discards the
+        existing output and starts over instead.
+        """
+        self._check_checkpoint(output, overwrite)
+        writer = ResultWriter(output)
+        try:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.teams,)) as pool:
+                if self.format == "round-robin":
+                    self._play(pool, round_robin(self.teams), writer, on_result)
+                else:
+                    for round_no in range(1, self.rounds + 1):
+                        previous = [r for r in writer.completed if r["round"] < round_no]
+                        matches, bye = swiss_round(self.teams, round_no, previous)
+                        if bye is not None:
+                            matches_done = {r["match"] for r in writer.completed}
+                            bye_id = f"r{round_no}:{self.teams[bye].id}|bye"
+                            if bye_id not in matches_done:
+                                self._emit(writer, [self._bye_result(bye_id, round_no, bye)], on_result)
+                        self._play(pool, matches, writer, on_result)
+            return writer.completed
+        finally:
+            writer.close()
+
+    def _play(self, pool: ProcessPoolExecutor, matches: List[Match], writer: ResultWriter,
+              on_result: Optional[Callable[[Dict], None]]):
+        done = {result["match"] for result in writer.completed}
+        pending = [match for match in matches if match.id not in done]
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        futures = {pool.submit(_play_chunk, chunk, self.max_turns) for chunk in chunks}
+        while futures:
+            finished, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                self._emit(writer, future.result(), on_result)
+
+    @staticmethod
+    def _emit(writer: ResultWriter, results: List[Dict], on_result: Optional[Callable[[Dict], None]]):
+        writer.write(results)
+        if on_result:
+            for result in results:
+                on_result(result)
+
+    def _bye_result(self, match_id: str, round_no: int, team: int) -> Dict:
+        team_id = self.teams[team].id
+        return {"match": match_id, "round": round_no, "team_a": team_id, "team_b": None, "winner": team_id,
+                "state": "bye", "turns": 0, "survivors_a": len(self.teams[team].spec.names), "survivors_b": 0}
+
+    def _check_checkpoint(self, output: str, overwrite: bool = False):
+        path = output + ".checkpoint"
+        digest = _config_digest(self.teams, self.format, self.rounds, self.max_turns)
+        if overwrite:
+            if os.path.exists(output):
+                os.remove(output)
+        elif os.path.exists(output) and os.path.getsize(output):
+            if not os.path.exists(path):
+                raise ValueError(f"{output} already exists and is not a tournament checkpoint; "
+                                 "rerun with --overwrite to discard it")
+            with open(path) as f:
+                if json.load(f).get("config") != digest:
+                    raise ValueError(f"{output} belongs to a tournament with different teams, settings or rules")
+        with open(path, "w") as f:
+            json.dump({"config": digest, "format": self.format, "rounds": self.rounds,
+                       "max_turns": self.max_turns, "teams": len(self.teams)}, f)
+
+
+def standings(teams: List[Team], results: Iterable[Dict]) -> List[Dict]:
+    """Per-team points and win/draw/loss record, best first."""
+    table = {team.id: {"team": team.id, "points": 0.0, "wins": 0, "draws": 0, "losses": 0, "played": 0}
+             for team in teams}
+    for result in results:
+        for team_id in (result["team_a"], result["team_b"]):
+            if team_id is None:
+                continue
+            row = table[team_id]
+            row["played"] += 1
+            if result["winner"] is None:
+                row["draws"] += 1
+            elif result["winner"] == team_id:
+                row["wins"] += 1
+            else:
+                row["losses"] += 1
+            row["points"] += _points(result, team_id)
+    order = {team.id: i for i, team in enumerate(teams)}
+    return sorted(table.values(), key=lambda row: (-row["points"], order[row["team"]]))
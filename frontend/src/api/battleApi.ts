@@ -20,3 +20,70 @@ export const nextTurn = async (battleId: string) => {
   const { data } = await axios.post(`${API_BASE}/battles/${battleId}/turn`);
   return data;
 };
+
+export interface AutoplayTurn {
+  turn: number;
+  state: string;
+  result: string;
+}
+
+// Streams autoplay as NDJSON so turns can be rendered as soon as they are played
+export const streamAutoplay = async (
+  battleId: string,
+  onTurn: (turn: AutoplayTurn) => void,
+  maxTurns = 50,
+  signal?: AbortSignal
+) => {
+  const response = await fetch(`${API_BASE}/battles/${battleId}/autoplay/stream?max_turns=${maxTurns}`, {
+    method: "POST",
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Autoplay stream failed: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let summary = null;
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop() ?? "";
+    for (const line of lines) {
+      if (!line) continue;
+      const frame = JSON.parse(line);
+      if (frame.summary) summary = frame.summary;
+      else onTurn(frame);
+    }
+  }
+  return summary;
+};
+
+export interface BattleDelta {
+  type: "delta";
+  state: string;
+  turn: number;
+  version: number;
+  from_version: number;
+  characters: { slot: number; current_health: number; is_alive: boolean }[];
+  active_character: string | null;
+  log: string[];
+}
+
+// Pushes a full snapshot on join and a delta per turn instead of polling; returns a function that stops watching
+export const watchBattle = (
+  battleId: string,
+  onSnapshot: (battle: any, version: number) => void,
+  onDelta: (delta: BattleDelta) => void
+) => {
+  const socket = new WebSocket(`${API_BASE.replace(/^http/, "ws")}/battles/${battleId}/ws`);
+  socket.onmessage = (message) => {
+    const frame = JSON.parse(message.data);
+    if (frame.type === "snapshot") onSnapshot(frame.battle, frame.version);
+    else onDelta(frame);
+  };
+  return () => socket.close();
+};
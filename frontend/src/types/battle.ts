@@ -17,6 +17,7 @@ export interface BattleCharacter {
 export interface BattleSummary {
   state: string;
   turn: number;
+  version: number;
   team_a: BattleCharacter[];
   team_b: BattleCharacter[];
   active_character: string | null;
@@ -1,8 +1,18 @@
 import sys
 import os
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from itertools import islice
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.routing import APIRoute
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List, Optional, Tuple
 import uvicorn
 sys.path.append(os.getcwd())
 sys.path.append(os.path.abspath(os.path.dirname(p=__file__)))
@@ -11,11 +21,46 @@ sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
 
-from core.service.battle_service import BattleService
+from core.metrics import REGISTRY as METRICS, HTTP_LATENCY
+from core.model.battle.battle_state import BattleState
+from core.profiler import SamplingProfiler, track_thread
+from core.model.battle.team_spec import TeamSpec
+from core.model.characters.element import CharacterElement
+from core.service.battle_service import BattleService, ServiceBusyError
+from core.service.battle_store import BoundedBattleStore, VersionConflictError
+from core.service.shared_store import ShardedBattleStore
+from core.service.spectators import RESYNC, SpectatorHub, snapshot_frame
+from rest.schemas import (AutoplayResponse, BattleListModel, BattleSummaryModel,
+                          CreateBattleResponse, TurnResponse)
 from fastapi.middleware.cors import CORSMiddleware
 
+try:
+    import orjson
+except ImportError:  # optional; only makes bulk responses faster to encode
+    orjson = None
+
 app = FastAPI(title="Auto Chess War API")
-battle_service = BattleService()
+# "memory" keeps battles in this process; "sqlite" shares them between uvicorn workers
+if os.environ.get("ACW_STORE_BACKEND", "memory") == "sqlite":
+    battle_store = ShardedBattleStore(
+        directory=os.environ.get("ACW_STORE_DIR", "battles-shared"),
+        shards=int(os.environ.get("ACW_STORE_SHARDS", 8)),
+    )
+else:
+    battle_store = BoundedBattleStore(
+        max_size=int(os.environ.get("ACW_STORE_MAX_SIZE", 10000)),
+        ttl=float(os.environ["ACW_STORE_TTL"]) if os.environ.get("ACW_STORE_TTL") else None,
+        policy=os.environ.get("ACW_STORE_POLICY", "finished_first"),
+        # No spilling unless a file is configured; spilled rows are purged after ACW_STORE_SPILL_TTL seconds
+        spill_path=os.environ.get("ACW_STORE_PATH") or None,
+        spill_ttl=float(os.environ.get("ACW_STORE_SPILL_TTL", 86400)),
+    )
+battle_service = BattleService(
+    store=battle_store,
+    autoplay_workers=int(os.environ.get("ACW_AUTOPLAY_WORKERS", 4)),
+    max_pending_autoplays=int(os.environ.get("ACW_AUTOPLAY_QUEUE", 64)),
+    spectators=SpectatorHub(max_queue=int(os.environ.get("ACW_SPECTATOR_QUEUE", 64))),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,45 +68,409 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # allow POST, GET, OPTIONS, etc.
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Profile-Id"],
 )
 
+METRICS.gauge("acw_battle_store_size", "Battles held by the store",
+              lambda: {(location,): battle_service.store_stats().get(location, 0) for location in ("resident", "spilled")},
+              ("location",))
+METRICS.gauge("acw_outcome_cache_hit_rate", "Share of headless resolves answered from the outcome cache",
+              lambda: battle_service.outcome_cache_stats()["hit_rate"])
+METRICS.gauge("acw_spectators", "WebSocket spectators connected to this worker",
+              lambda: battle_service.spectator_stats()["spectators"])
+
+PROFILING_ENABLED = os.environ.get("ACW_PROFILING", "").lower() in ("1", "true", "yes")
+MAX_PROFILES = 32
+profiles: "OrderedDict[str, str]" = OrderedDict()
+_route_paths = {}
+
+def _route_path(request: Request) -> str:
+    """Route template (e.g. /battles/{battle_id}) so metrics do not explode per battle id."""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if not _route_paths:
+        _route_paths.update({route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")})
+    return _route_paths.get(endpoint, "unmatched")
+
+if METRICS.enabled:
+    @app.middleware("http")
+    async def record_latency(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        HTTP_LATENCY.observe(time.perf_counter() - start, request.method, _route_path(request))
+        return response
+
+class ProfiledRoute(APIRoute):
+    """Lets the profiler of a request sample the pool thread running its (sync) endpoint."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            call = endpoint
+
+            @wraps(call)
+            def endpoint(*args, **kw):
+                with track_thread():
+                    return call(*args, **kw)
+        super().__init__(path, endpoint, **kwargs)
+
+if PROFILING_ENABLED:
+    app.router.route_class = ProfiledRoute
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """Sample stacks for requests sent with ``X-Profile: 1``; fetch them from /metrics/profiles/{id}.
+
+        Streaming responses are only profiled until their first byte. Only the event loop and the
+        thread running a sync endpoint are sampled, not the other requests served meanwhile.
+        """
+        if request.headers.get("x-profile") != "1":
+            return await call_next(request)
+        with SamplingProfiler() as profiler:
+            response = await call_next(request)
+        profile_id = str(uuid.uuid4())
+        profiles[profile_id] = f"# {request.method} {request.url.path} samples={profiler.samples}\n" + profiler.collapsed()
+        while len(profiles) > MAX_PROFILES:
+            profiles.popitem(last=False)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
 class CreateBattleRequest(BaseModel):
-    team_a: List[str]
-    team_b: List[str]
-    level: Optional[int] = 5
+    team_a: List[str] = Field(..., min_items=1)
+    team_b: List[str] = Field(..., min_items=1)
+    level: int = Field(5, gt=0)
+    seed: Optional[int] = None  # random abilities and targets, reproducible from the seed
+
+class ResolveBattleRequest(CreateBattleRequest):
+    max_turns: Optional[int] = Field(1000, gt=0)
 
-@app.post("/battles")
-def create_battle(req: CreateBattleRequest):
-    battle_id, battle = battle_service.create_battle(req.team_a, req.team_b, req.level)
+class TeamSpecRequest(BaseModel):
+    names: List[str] = Field(..., min_items=1)
+    level: int = Field(5, gt=0)
+
+class WinrateRequest(BaseModel):
+    team_a: TeamSpecRequest
+    team_b: TeamSpecRequest
+    iterations: int = Field(1000, gt=0, le=1_000_000)
+    seed: int = 0
+    max_turns: int = Field(50, gt=0)
+
+@app.post("/battles", response_model=CreateBattleResponse)
+def create_battle(req: CreateBattleRequest, record: bool = False):
+    """Create a battle; with ``record=true`` its actions are kept for GET /battles/{battle_id}/recording."""
+    battle_id, battle = battle_service.create_battle(req.team_a, req.team_b, req.level, req.seed, record)
     return {"battle_id": battle_id}
 
-@app.post("/battles/{battle_id}/turn")
-def step_turn(battle_id: str):
+# Well below the store size, so one request cannot push every other battle out of memory
+MAX_BULK_BATTLES = int(os.environ.get("ACW_BULK_MAX", 1000))
+if isinstance(battle_store, BoundedBattleStore):
+    MAX_BULK_BATTLES = min(MAX_BULK_BATTLES, max(1, battle_store.max_size // 10))
+BULK_CHUNK = 256  # battles built per job on the autoplay executor
+
+def _ndjson_line(data) -> bytes:
+    return orjson.dumps(data) + b"\n" if orjson is not None else json.dumps(data).encode() + b"\n"
+
+def _bulk_spec(index: int, spec: dict) -> Tuple[List[str], List[str], int, Optional[int]]:
+    """(team_a, team_b, level, seed) of one bulk spec.
+
+    Checked by hand: building a pydantic model per spec costs more than creating the battle.
+    """
+    def invalid(field: str, msg: str) -> HTTPException:
+        return HTTPException(status_code=422, detail=[{"loc": ["body", index, field], "msg": msg, "type": "value_error"}])
+
+    for field in ("team_a", "team_b"):
+        names = spec.get(field)
+        if not isinstance(names, list) or not names or not all(isinstance(name, str) for name in names):
+            raise invalid(field, "must be a non-empty list of names")
+    level = spec.get("level", 5)
+    if type(level) is not int or level <= 0:
+        raise invalid("level", "must be a positive integer")
+    seed = spec.get("seed")
+    if seed is not None and type(seed) is not int:
+        raise invalid("seed", "must be an integer")
+    return spec["team_a"], spec["team_b"], level, seed
+
+@app.post("/battles/bulk")
+async def create_battles_bulk(specs: List[dict] = Body(...), autoplay: bool = False,
+                              max_turns: int = Query(50, gt=0), record: bool = False):
+    """Create many battles in one request, optionally autoplaying each for ``max_turns``.
+
+    Specs have the fields of POST /battles and are all validated before the
+    first battle is created. Streams one NDJSON line per spec, in order, as
+    battles are stored:
+    ``{"index", "battle_id", "state", "turn"}``. Battles are built in chunks on
+    the autoplay executor; if it is busy the request gets a 503, or, once
+    streaming, a last ``{"index", "status", "error"}`` line for the first spec
+    not created (as for any failure mid-stream).
+    """
+    if len(specs) > MAX_BULK_BATTLES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_BATTLES} battles per request")
+    parsed = [_bulk_spec(index, spec) for index, spec in enumerate(specs)]
+    created = battle_service.create_battles(parsed, max_turns if autoplay else None, record)
+
+    def next_chunk():
+        """Up to BULK_CHUNK results, and the error that stopped the chunk early, if any."""
+        chunk = []
+        try:
+            for result in islice(created, BULK_CHUNK):
+                chunk.append(result)
+        except Exception as e:
+            return chunk, e
+        return chunk, None
+
     try:
-        result = battle_service.next_turn(battle_id)
-        battle = battle_service.get_battle(battle_id)
-        return {"result": result, "summary": battle.get_battle_summary()}
+        first = battle_service.submit(next_chunk)
+    except ServiceBusyError:
+        raise HTTPException(status_code=503, detail="Too many autoplay requests, retry later")
+
+    async def lines():
+        index = 0
+        job = first
+        while True:
+            chunk, error = await asyncio.wrap_future(job)
+            frames = []
+            for result in chunk:
+                frames.append(_ndjson_line({"index": index, **result}))
+                index += 1
+            if error is not None:
+                status = 400 if isinstance(error, ValueError) else 500
+                frames.append(_ndjson_line({"index": index, "status": status, "error": str(error)}))
+            if frames:
+                yield b"".join(frames)
+            if error is not None or not chunk or index == len(specs):
+                return
+            try:
+                job = battle_service.submit(next_chunk)
+            except ServiceBusyError:
+                yield _ndjson_line({"index": index, "status": 503, "error": "Too many autoplay requests, retry later"})
+                return
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/battles/resolve")
+def resolve_battle(req: ResolveBattleRequest):
+    outcome = battle_service.resolve(req.team_a, req.team_b, req.level, req.max_turns, req.seed)
+    return outcome.to_dict()
+
+@app.get("/battles/{battle_id}/recording")
+def get_recording(battle_id: str):
+    """Binary recording of the battle (see core.model.battle.recording)."""
+    try:
+        recording = battle_service.get_recording(battle_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Battle not found")
+    if recording is None:
+        raise HTTPException(status_code=404, detail="Battle was created without record=true")
+    return Response(recording, media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{battle_id}.acwr"'})
+
+@app.post("/battles/{battle_id}/turn", response_model=TurnResponse)
+async def step_turn(battle_id: str):
+    try:
+        result, summary = await run_in_threadpool(battle_service.turn_with_summary, battle_id)
+        return {"result": result, "summary": summary}
+    except VersionConflictError:
+        raise HTTPException(status_code=409, detail="Battle is being played elsewhere, retry later")
     except ValueError:
         raise HTTPException(status_code=404, detail="Battle not found")
 
-@app.post("/battles/{battle_id}/autoplay")
-def autoplay(battle_id: str, max_turns: Optional[int] = 50):
+@app.post("/battles/{battle_id}/autoplay", response_model=AutoplayResponse)
+async def autoplay(battle_id: str, max_turns: Optional[int] = 50):
     try:
-        results, battle = battle_service.autoplay(battle_id, max_turns)
-        return {"results": results, "summary": battle.get_battle_summary()}
+        future = battle_service.submit_autoplay(battle_id, max_turns)
+        results, summary = await asyncio.wrap_future(future)
+        return {"results": results, "summary": summary}
+    except ServiceBusyError:
+        raise HTTPException(status_code=503, detail="Too many autoplay requests, retry later")
+    except VersionConflictError:
+        raise HTTPException(status_code=409, detail="Battle is being played elsewhere, retry later")
     except ValueError:
         raise HTTPException(status_code=404, detail="Battle not found")
 
-@app.get("/battles/{battle_id}")
-def get_battle(battle_id: str):
-    battle = battle_service.get_battle(battle_id)
-    if not battle:
+@app.post("/battles/{battle_id}/preview", response_model=AutoplayResponse)
+async def preview(battle_id: str, turns: int = Query(10, ge=1, le=1000)):
+    """What the next ``turns`` turns would look like; the battle itself does not move."""
+    try:
+        results, summary = await run_in_threadpool(battle_service.preview, battle_id, turns)
+        return {"results": results, "summary": summary}
+    except ValueError:
         raise HTTPException(status_code=404, detail="Battle not found")
-    return battle.get_battle_summary()
 
-@app.get("/battles")
-def list_battles():
-    return {bid: b.get_battle_summary() for bid, b in battle_service._battles.items()}
+STREAM_FORMATS = {
+    "ndjson": ("application/x-ndjson", lambda kind, data: json.dumps(data if kind == "turn" else {kind: data}) + "\n"),
+    "sse": ("text/event-stream", lambda kind, data: f"event: {kind}\ndata: {json.dumps(data)}\n\n"),
+}
+
+@app.post("/battles/{battle_id}/autoplay/stream")
+async def autoplay_stream(battle_id: str, request: Request, max_turns: Optional[int] = 50, format: str = "ndjson"):
+    """Stream autoplay turn by turn as NDJSON or Server-Sent Events.
+
+    The next turn is only played once the previous frame has been handed to the
+    client, so a slow reader throttles the battle and a disconnect stops it.
+    The last frame carries the battle summary, or an ``error`` (status and
+    detail) if the battle was saved elsewhere meanwhile or has disappeared.
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown stream format: {format}")
+    media_type, encode = STREAM_FORMATS[format]
+    try:
+        turns = battle_service.autoplay_iter(battle_id, max_turns)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Battle not found")
+
+    async def frames():
+        # Headers are already sent, so failures mid-stream end it with an error frame
+        try:
+            while True:
+                # Before every turn, so a client that left never has one more turn played for it
+                if await request.is_disconnected():
+                    return
+                turn = await run_in_threadpool(next, turns, None)
+                if turn is None:
+                    break
+                yield encode("turn", turn)
+            summary = await run_in_threadpool(battle_service.get_summary, battle_id)
+        except VersionConflictError:
+            yield encode("error", {"status": 409, "detail": "Battle is being played elsewhere, retry later"})
+            return
+        except ValueError:
+            yield encode("error", {"status": 404, "detail": "Battle not found"})
+            return
+        yield encode("summary", summary)
+
+    return StreamingResponse(frames(), media_type=media_type)
+
+WS_CLOSE_NOT_FOUND = 4404
+
+async def _send_snapshot(websocket: WebSocket, battle_id: str) -> Optional[int]:
+    """Send the full battle and return its version, or close the socket if the battle is gone."""
+    try:
+        version, summary = await run_in_threadpool(battle_service.get_summary_json, battle_id)
+    except ValueError:
+        await websocket.close(code=WS_CLOSE_NOT_FOUND, reason="Battle not found")
+        return None
+    await websocket.send_text(snapshot_frame(version, summary).decode())
+    return version
+
+@app.websocket("/battles/{battle_id}/ws")
+async def spectate(websocket: WebSocket, battle_id: str):
+    """Live view of a battle: a snapshot on join, then one delta per change.
+
+    Deltas list only the characters whose HP changed, the active character and
+    the new log lines, and carry ``from_version``/``version``. A spectator
+    that falls behind is sent a new snapshot instead of the deltas it missed.
+    Messages from the client are ignored.
+    """
+    await websocket.accept()
+    # Subscribe before the snapshot so no change can slip in between the two
+    subscription = battle_service.subscribe(battle_id)
+
+    async def pump():
+        current = await _send_snapshot(websocket, battle_id)
+        while current is not None:
+            frame = await subscription.get()
+            from_version, version, payload = frame
+            if version <= current and frame is not RESYNC:
+                continue  # already part of the snapshot
+            if from_version != current:
+                current = await _send_snapshot(websocket, battle_id)
+                continue
+            await websocket.send_text(payload.decode())
+            current = version
+
+    async def listen():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = {asyncio.ensure_future(pump()), asyncio.ensure_future(listen())}
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            # Errors here come from sending to a client that already left
+            task.exception()
+    finally:
+        battle_service.unsubscribe(subscription)
+
+def _etag(battle_id: str, version: int, since_turn: Optional[int] = None) -> str:
+    suffix = f"-{since_turn}" if since_turn is not None else ""
+    return f'"{battle_id}-{version}{suffix}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+@app.get("/battles/{battle_id}", responses={200: {"model": BattleSummaryModel}})
+def get_battle(battle_id: str, since_turn: Optional[int] = Query(None, ge=0),
+               if_none_match: Optional[str] = Header(None)):
+    """Battle summary, or a BattleDeltaModel with only what changed from ``since_turn`` on.
+
+    Responses carry an ETag derived from the battle version; a matching
+    If-None-Match gets an empty 304.
+    """
+    try:
+        if since_turn is not None:
+            delta = battle_service.get_delta(battle_id, since_turn)
+            etag = _etag(battle_id, delta["version"], since_turn)
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            return Response(json.dumps(delta), media_type="application/json", headers={"ETag": etag})
+
+        if if_none_match:
+            etag = _etag(battle_id, battle_service.get_version(battle_id))
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+        version, payload = battle_service.get_summary_json(battle_id)
+        return Response(payload, media_type="application/json", headers={"ETag": _etag(battle_id, version)})
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Battle not found")
+
+@app.get("/battles", responses={200: {"model": BattleListModel}})
+def list_battles(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500),
+                 state: Optional[BattleState] = None):
+    total, page = battle_service.list_summaries_json(offset, limit, state)
+    # Splice the cached summaries in as-is instead of decoding and re-encoding them
+    battles = b",".join(json.dumps(battle_id).encode() + b":" + payload for battle_id, payload in page)
+    header = json.dumps({"total": total, "offset": offset, "limit": limit})[:-1].encode()
+    return Response(header + b', "battles": {' + battles + b"}}", media_type="application/json")
+
+@app.get("/store/stats")
+def store_stats():
+    return battle_service.store_stats()
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"outcomes": battle_service.outcome_cache_stats()}
+
+@app.get("/spectators/stats")
+def spectator_stats():
+    return battle_service.spectator_stats()
+
+@app.post("/simulations/winrate")
+async def simulate_winrate(req: WinrateRequest):
+    """Monte Carlo win rate, played on the worker processes without holding a request thread."""
+    team_a = TeamSpec(req.team_a.names, req.team_a.level, CharacterElement.FIRE)
+    team_b = TeamSpec(req.team_b.names, req.team_b.level, CharacterElement.WATER)
+    return await battle_service.simulate_winrate_async(team_a, team_b, req.iterations, req.seed, req.max_turns)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint; counters stay at zero unless ACW_METRICS=1."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    """Collapsed stacks of a profiled request (see the X-Profile header)."""
+    if profile_id not in profiles:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profiles[profile_id]
+
+@app.on_event("shutdown")
+def shutdown():
+    battle_service.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+class AbilityModel(BaseModel):
+    name: str
+    description: str
+    cooldown: int
+    target_type: str
+
+
+class CharacterModel(BaseModel):
+    name: str
+    level: int
+    char_element: str
+    health: int
+    speed: int
+    damage: int
+    ability_power: int
+    armor: int
+    magic_resist: int
+    abilities: List[AbilityModel]
+
+
+class BattleCharacterModel(BaseModel):
+    character: CharacterModel
+    current_health: int
+    is_alive: bool
+    status_effects: Dict[str, Any]
+    active_buffs: Dict[str, Any]
+    active_debuffs: Dict[str, Any]
+    next_turn_meter: float
+    cooldowns: List[int]
+
+
+class BattleSummaryModel(BaseModel):
+    state: str
+    turn: int
+    version: int
+    team_a: List[BattleCharacterModel]
+    team_b: List[BattleCharacterModel]
+    active_character: Optional[str]
+    log: List[str]
+
+
+class CharacterDeltaModel(BaseModel):
+    slot: int
+    current_health: int
+    is_alive: bool
+
+
+class BattleDeltaModel(BaseModel):
+    state: str
+    turn: int
+    version: int
+    since_turn: int
+    characters: List[CharacterDeltaModel]
+    active_character: Optional[str]
+    log: List[str]
+
+
+class BattleListModel(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    battles: Dict[str, BattleSummaryModel]
+
+
+class CreateBattleResponse(BaseModel):
+    battle_id: str
+
+
+class TurnResponse(BaseModel):
+    result: str
+    summary: BattleSummaryModel
+
+
+class AutoplayResponse(BaseModel):
+    results: List[str]
+    summary: BattleSummaryModel
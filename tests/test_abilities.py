@@ -0,0 +1,93 @@
+import pytest
+
+from core.model.abilities.ability import TargetType
+from core.model.abilities.registry import AbilityDefinition, CompiledAbility
+from core.model.battle.battle import Battle
+from core.model.battle.battle_log import EventType
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+
+def knight(name, element, *abilities, **stats):
+    char = Knight(name, 5, element, **{"health": 100000, **stats})
+    if abilities:
+        char.abilities = abilities
+    return char
+
+
+def turns_of(battle, slot, count):
+    """Event kinds of the next ``count`` turns taken by the character in ``slot``."""
+    kinds = []
+    while len(kinds) < count:
+        event = battle.battle_log[battle.step()]
+        if event.actor == slot:
+            kinds.append(event.kind)
+    return kinds
+
+
+@pytest.mark.parametrize("cooldown", [1, 2, 3])
+def test_cooldown_blocks_the_next_turns(cooldown):
+    strike = CompiledAbility(AbilityDefinition("Strike", cooldown=cooldown, damage=1.0))
+    battle = Battle([knight("A", CharacterElement.FIRE, strike)], [knight("B", CharacterElement.WATER)])
+    cycle = [EventType.ABILITY] + [EventType.ON_COOLDOWN] * cooldown
+    assert turns_of(battle, 0, 3 * len(cycle)) == cycle * 3
+
+
+def test_reported_cooldown_counts_the_turns_left():
+    strike = CompiledAbility(AbilityDefinition("Strike", cooldown=2, damage=1.0))
+    battle = Battle([knight("A", CharacterElement.FIRE, strike)], [knight("B", CharacterElement.WATER)])
+    reported = []
+    for _ in range(3):
+        turns_of(battle, 0, 1)
+        reported.append(battle.team_a[0].to_dict()["cooldowns"][0])
+    assert reported == [2, 1, 0]
+
+
+def wounded_battle(ability):
+    team_a = [knight("A0", CharacterElement.FIRE, ability), knight("A1", CharacterElement.FIRE, speed=1)]
+    battle = Battle(team_a, [knight("B0", CharacterElement.WATER, speed=1)])
+    for bc in battle.roster:
+        bc.take_damage(500)
+    return battle
+
+
+def health(battle):
+    return [bc.current_health for bc in battle.roster]
+
+
+def test_lifesteal_heals_the_caster_not_the_enemy():
+    drain = CompiledAbility(AbilityDefinition("Drain", damage=1.0, heal=50))
+    battle = wounded_battle(drain)
+    before = health(battle)
+    turns_of(battle, 0, 1)
+    after = health(battle)
+    assert after[0] == before[0] + 50
+    assert after[1] == before[1]
+    assert after[2] < before[2]
+
+
+def test_heal_target_all_allies():
+    rally = CompiledAbility(AbilityDefinition("Rally", damage=1.0, heal=50, heal_target=TargetType.ALL_ALLIES))
+    battle = wounded_battle(rally)
+    before = health(battle)
+    turns_of(battle, 0, 1)
+    after = health(battle)
+    assert after[:2] == [before[0] + 50, before[1] + 50]
+    assert after[2] < before[2]
+
+
+def test_pure_heal_keeps_its_own_targets():
+    mend = CompiledAbility(AbilityDefinition.from_dict(
+        {"name": "Mend", "target_type": "all_allies", "heal": 50}))
+    battle = wounded_battle(mend)
+    before = health(battle)
+    event = battle.battle_log[battle.step()]
+    assert event.kind == EventType.ABILITY and event.amount == 100
+    assert health(battle) == [before[0] + 50, before[1] + 50, before[2]]
+
+
+@pytest.mark.parametrize("heal_target", ["single_enemy", "single_ally", "adjacent_allies"])
+def test_heal_target_must_be_reachable(heal_target):
+    with pytest.raises(ValueError):
+        CompiledAbility(AbilityDefinition.from_dict({"name": "Bad", "damage": 1.0, "heal": 10,
+                                                     "heal_target": heal_target}))
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from core.service.battle_store import VersionConflictError
+from rest.app import app, autoplay_stream, battle_service
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def create_battle(client):
+    return client.post("/battles", json={"team_a": ["A"], "team_b": ["B"]}).json()["battle_id"]
+
+
+def stream(client, battle_id, format="ndjson"):
+    response = client.post(f"/battles/{battle_id}/autoplay/stream", params={"max_turns": 5, "format": format})
+    assert response.status_code == 200
+    return response.text
+
+
+def test_stream_ends_with_the_summary(client):
+    lines = [json.loads(line) for line in stream(client, create_battle(client)).splitlines()]
+    assert len(lines) == 6 and "summary" in lines[-1]
+
+
+@pytest.mark.parametrize("format, error", [("ndjson", '{"error": {"status": 409'), ("sse", "event: error\n")])
+def test_conflict_mid_stream_ends_with_an_error_frame(client, monkeypatch, format, error):
+    battle_id = create_battle(client)
+    played = []
+
+    def save(battle_id, battle, expected_version=None):
+        played.append(battle.version)
+        if len(played) > 2:
+            raise VersionConflictError(battle_id)
+    monkeypatch.setattr(battle_service._store, "save", save)
+
+    body = stream(client, battle_id, format)
+    assert error in body
+    assert "summary" not in body
+
+
+@pytest.mark.parametrize("connected_checks", [0, 2])
+def test_disconnect_stops_the_stream_before_the_next_turn(client, connected_checks):
+    battle_id = create_battle(client)
+    checks = []
+
+    async def receive():
+        checks.append(None)
+        return {"type": "http.disconnect" if len(checks) > connected_checks else "http.request"}
+
+    async def consume():
+        request = Request({"type": "http", "method": "POST", "path": "/", "headers": []}, receive)
+        response = await autoplay_stream(battle_id, request, max_turns=5)
+        return [frame async for frame in response.body_iterator]
+
+    assert len(asyncio.run(consume())) == connected_checks
+    assert battle_service.get_version(battle_id) == connected_checks
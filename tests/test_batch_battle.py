@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from core.model.battle.batch_battle import BatchBattle
+from core.model.battle.battle import Battle
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+MAX_TURNS = 50
+
+
+def random_team(rng: random.Random, size: int, element: CharacterElement):
+    return [Knight(f"Knight {i}", rng.randint(1, 20), element, speed=rng.randint(40, 200))
+            for i in range(size)]
+
+
+def matchups(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [(random_team(rng, rng.randint(1, 5), CharacterElement.FIRE),
+             random_team(rng, rng.randint(1, 5), CharacterElement.WATER))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_outcomes_match_resolve(seed):
+    games = matchups(100, seed)
+    batch = BatchBattle.from_teams(games).run(MAX_TURNS)
+    for (team_a, team_b), row_health, outcome in zip(games, batch.current_health, batch.outcomes()):
+        expected = Battle(team_a, team_b).resolve(MAX_TURNS)
+        assert outcome == (expected.state, expected.turns)
+        health = [int(hp) for hp in row_health[:len(team_a)]] + \
+                 [int(hp) for hp in row_health[batch.width_a:batch.width_a + len(team_b)]]
+        survivors = {slot: hp for slot, _, hp in expected.survivors}
+        assert [hp for hp in health if hp > 0] == [survivors[slot] for slot in sorted(survivors)]
+
+
+def test_batch_from_started_battles_with_stuns_matches_resolve():
+    battles, expected = [], []
+    for team_a, team_b in matchups(30, seed=7):
+        for copy in (battles, expected):
+            battle = Battle(team_a, team_b)
+            battle.step()
+            battle.effects.apply(battle.roster[-1], "stun", 2)
+            copy.append(battle)
+    batch = BatchBattle.from_battles(battles).run(MAX_TURNS)
+    for battle, outcome in zip(expected, batch.outcomes()):
+        result = battle.resolve(MAX_TURNS)
+        assert outcome == (result.state, result.turns)
+
+
+def test_batch_rejects_seeded_battles():
+    (team_a, team_b), = matchups(1)
+    with pytest.raises(ValueError):
+        BatchBattle.from_battles([Battle(team_a, team_b, seed=1)])
@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from core.model.battle.battle_state import BattleState
+from core.service.battle_service import BattleService
+from core.service.battle_store import BattleStore, BoundedBattleStore
+from core.service.shared_store import ShardedBattleStore
+
+
+@pytest.fixture(params=["memory", "bounded", "sharded"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = BattleStore()
+    elif request.param == "bounded":
+        store = BoundedBattleStore(max_size=3, spill_path=str(tmp_path / "spill.db"))
+    else:
+        store = ShardedBattleStore(str(tmp_path / "shared"), shards=3)
+    yield store
+    store.close()
+
+
+def test_pages_cover_every_battle_once(store):
+    service = BattleService(store=store)
+    ids = [service.create_battle(["A"], ["B"])[0] for _ in range(10)]
+    for battle_id in ids[::3]:
+        service.autoplay(battle_id, 100)
+
+    listed = []
+    for offset in range(0, 12, 4):
+        total, page = service.list_summaries_json(offset, 4)
+        assert total == 10
+        listed += [battle_id for battle_id, _ in page]
+    assert sorted(listed) == sorted(ids)
+
+    total, page = service.list_summaries_json(0, 50, BattleState.ONGOING)
+    assert total == 6 and sorted(battle_id for battle_id, _ in page) == sorted(ids[1::3] + ids[2::3])
+
+
+def test_listing_only_unpickles_the_page(tmp_path, monkeypatch):
+    store = BoundedBattleStore(max_size=2, spill_path=str(tmp_path / "spill.db"))
+    service = BattleService(store=store)
+    for _ in range(20):
+        service.create_battle(["A"], ["B"])
+    loads = []
+    real_loads = pickle.loads
+    monkeypatch.setattr(pickle, "loads", lambda data: loads.append(1) or real_loads(data))
+    total, page = service.list_summaries_json(5, 3)
+    assert total == 20 and len(page) == 3
+    assert len(loads) == 3
+    assert store.stats()["resident"] == 2  # listing does not pull spilled battles back in
+    store.close()
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from rest.app import app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def create_battle(client):
+    names = ["K1", "K2"]
+    return client.post("/battles", json={"team_a": names, "team_b": names}).json()["battle_id"]
+
+
+@pytest.mark.parametrize("params", [{}, {"since_turn": 0}])
+def test_unchanged_battle_answers_304(client, params):
+    battle_id = create_battle(client)
+    first = client.get(f"/battles/{battle_id}", params=params)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get(f"/battles/{battle_id}", params=params, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.content == b""
+
+
+@pytest.mark.parametrize("params", [{}, {"since_turn": 0}])
+def test_etag_changes_after_a_turn(client, params):
+    battle_id = create_battle(client)
+    etag = client.get(f"/battles/{battle_id}", params=params).headers["ETag"]
+    client.post(f"/battles/{battle_id}/turn")
+
+    response = client.get(f"/battles/{battle_id}", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_since_turn_returns_only_the_newer_log_entries(client):
+    battle_id = create_battle(client)
+    for _ in range(5):
+        client.post(f"/battles/{battle_id}/turn")
+    full = client.get(f"/battles/{battle_id}").json()
+    assert len(full["log"]) == 5
+
+    for since_turn in (0, 3, 5):
+        delta = client.get(f"/battles/{battle_id}", params={"since_turn": since_turn}).json()
+        assert delta["since_turn"] == since_turn
+        assert delta["turn"] == full["turn"]
+        assert delta["log"] == full["log"][since_turn:]
@@ -0,0 +1,63 @@
+import pytest
+
+from core.service.battle_service import BattleService
+from core.service.battle_store import BoundedBattleStore
+
+
+@pytest.fixture(params=["spill", "drop"])
+def store(request, tmp_path):
+    spill_path = str(tmp_path / "spill.db") if request.param == "spill" else None
+    store = BoundedBattleStore(max_size=1, spill_path=spill_path)
+    yield store
+    store.close()
+
+
+def test_battle_evicted_mid_turn_is_saved_back(store):
+    service = BattleService(store=store)
+    battle_id, _ = service.create_battle(["A"], ["B"])
+
+    def play(battle):
+        service.create_battle(["C"], ["D"])  # evicts the battle being played
+        battle.step()
+        battle.step()
+        return battle.current_turn
+
+    assert service._mutate(battle_id, play) == 2
+    assert service.get_battle(battle_id).current_turn == 2
+    assert len(store) == (2 if store._db is not None else 1)
+
+
+def test_save_replaces_stale_spilled_copy(tmp_path):
+    store = BoundedBattleStore(max_size=1, spill_path=str(tmp_path / "spill.db"))
+    service = BattleService(store=store)
+    battle_id, _ = service.create_battle(["A"], ["B"])
+    battle = store.get(battle_id)
+    version = battle.version
+    service.create_battle(["C"], ["D"])
+    battle.step()
+    battle.step()
+    store.save(battle_id, battle, version)
+    assert store.get(battle_id) is battle
+    assert store.get(battle_id).current_turn == 2
+    assert store.stats()["spilled"] == 1
+    store.close()
+
+
+def test_spilled_battles_expire_and_deleted_ones_are_purged(tmp_path):
+    now = [1000.0]
+    store = BoundedBattleStore(max_size=1, spill_path=str(tmp_path / "spill.db"), spill_ttl=60,
+                               wall_clock=lambda: now[0])
+    service = BattleService(store=store)
+    old_id, _ = service.create_battle(["A"], ["B"])
+    kept_id, _ = service.create_battle(["C"], ["D"])   # spills the first battle
+    assert store.stats()["spilled"] == 1
+
+    store.delete(old_id)
+    assert store.stats()["spilled"] == 0
+
+    service.create_battle(["E"], ["F"])                  # spills the second one at t=1000
+    now[0] += 61
+    store.get("missing")                                 # any access sweeps expired rows
+    assert kept_id not in store
+    assert store.stats()["expired"] == 1
+    store.close()
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import rest.app
+from core.service.battle_service import ServiceBusyError
+from rest.app import app, battle_service
+
+SPEC = {"team_a": ["A1", "A2"], "team_b": ["B1"]}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def post(client, specs, **params):
+    response = client.post("/battles/bulk", json=specs, params=params)
+    lines = [json.loads(line) for line in response.text.splitlines()] if response.status_code == 200 else None
+    return response.status_code, lines
+
+
+def test_bulk_creates_every_battle_in_order(client):
+    status, lines = post(client, [SPEC] * 300, autoplay="true", max_turns=5)
+    assert status == 200
+    assert [line["index"] for line in lines] == list(range(300))
+    assert all(0 < line["turn"] <= 5 for line in lines)
+
+
+@pytest.mark.parametrize("spec", [
+    {"team_a": [], "team_b": ["B1"]},
+    {"team_a": ["A1"], "team_b": []},
+    {**SPEC, "level": 0},
+    {**SPEC, "level": None},
+    {**SPEC, "level": True},
+    {"team_a": "A1", "team_b": ["B1"]},
+    {"team_a": ["A1", 2], "team_b": ["B1"]},
+    {"team_b": ["B1"]},
+    {**SPEC, "seed": "x"},
+    "not a spec",
+])
+def test_invalid_specs_are_rejected_before_streaming(client, spec):
+    created = battle_service.store_stats()
+    assert post(client, [SPEC, spec])[0] == 422
+    assert battle_service.store_stats() == created
+
+
+def test_rejection_points_at_the_invalid_spec(client):
+    response = client.post("/battles/bulk", json=[SPEC, SPEC, {**SPEC, "level": -1}])
+    assert response.json()["detail"][0]["loc"] == ["body", 2, "level"]
+
+
+def test_bulk_size_is_capped(client, monkeypatch):
+    monkeypatch.setattr(rest.app, "MAX_BULK_BATTLES", 2)
+    assert post(client, [SPEC] * 3)[0] == 413
+
+
+def test_busy_executor_rejects_the_request(client, monkeypatch):
+    def busy(*args):
+        raise ServiceBusyError("busy")
+    monkeypatch.setattr(battle_service, "submit", busy)
+    assert post(client, [SPEC])[0] == 503
+
+
+def test_busy_executor_mid_stream_ends_with_an_error_line(client, monkeypatch):
+    submit = battle_service.submit
+    calls = []
+
+    def first_only(*args):
+        calls.append(1)
+        if len(calls) > 1:
+            raise ServiceBusyError("busy")
+        return submit(*args)
+    monkeypatch.setattr(battle_service, "submit", first_only)
+    status, lines = post(client, [SPEC] * 300)
+    assert status == 200
+    assert len(lines) == rest.app.BULK_CHUNK + 1
+    assert lines[-1] == {"index": rest.app.BULK_CHUNK, "status": 503,
+                         "error": "Too many autoplay requests, retry later"}
+
+
+def test_failure_mid_stream_ends_with_an_error_line(client, monkeypatch):
+    create_battles = battle_service.create_battles
+
+    def failing(specs, *args):
+        for index, result in enumerate(create_battles(specs, *args)):
+            if index == 2:
+                raise RuntimeError("store is gone")
+            yield result
+    monkeypatch.setattr(battle_service, "create_battles", failing)
+    status, lines = post(client, [SPEC] * 5)
+    assert status == 200
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert lines[-1] == {"index": 2, "status": 500, "error": "store is gone"}
@@ -0,0 +1,29 @@
+import pytest
+
+from core.metrics import REGISTRY, BATTLES_CREATED, BATTLES_FINISHED
+from core.service.battle_service import BattleService
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(REGISTRY, "enabled", True)
+    monkeypatch.setattr(BATTLES_CREATED, "values", {})
+    monkeypatch.setattr(BATTLES_FINISHED, "values", {})
+
+
+def test_only_stored_battles_are_counted(metrics):
+    service = BattleService()
+    battle_id, _ = service.create_battle(["A"], ["B"])
+    service.preview(battle_id, 1000)
+    service.resolve(["A"], ["B"], max_turns=1000)
+    service.resolve(["A"], ["B"], max_turns=1000)
+    assert sum(BATTLES_CREATED.values.values()) == 1
+    assert not BATTLES_FINISHED.values
+
+    service.autoplay(battle_id, 1000)
+    service.autoplay(battle_id, 1000)  # already over; not counted twice
+    assert sum(BATTLES_FINISHED.values.values()) == 1
+
+    list(service.create_battles([(["A"], ["B"], 5, None)], autoplay_turns=1000))
+    assert sum(BATTLES_CREATED.values.values()) == 2
+    assert sum(BATTLES_FINISHED.values.values()) == 2
@@ -0,0 +1,37 @@
+import hashlib
+
+from core.model.abilities.registry import AbilityDefinition, register_ability
+from core.model.battle.status_effects import StatusEffectType, register_status_effect
+from core.model.battle.team_spec import TeamSpec
+from core.model.characters.element import CharacterElement
+from core.service import outcome_cache
+from core.service.outcome_cache import OutcomeCache, rules_version
+
+
+def test_rules_version_is_only_recomputed_after_a_registration(monkeypatch):
+    version = rules_version()
+    hashes = []
+    real_sha256 = hashlib.sha256
+    monkeypatch.setattr(outcome_cache.hashlib, "sha256", lambda *args: hashes.append(1) or real_sha256(*args))
+
+    assert rules_version() == version and not hashes
+
+    register_ability(AbilityDefinition("Outcome Cache Test Strike", damage=2.0))
+    changed = rules_version()
+    assert changed != version and len(hashes) == 1
+
+    register_status_effect(StatusEffectType("outcome-cache-test-slow", speed_multiplier=0.5))
+    assert rules_version() not in (version, changed) and len(hashes) == 2
+
+
+def test_registration_invalidates_cached_outcomes():
+    cache = OutcomeCache()
+    team_a = TeamSpec(["A"], 5, CharacterElement.FIRE).build()
+    team_b = TeamSpec(["B"], 5, CharacterElement.WATER).build()
+    cache.resolve(team_a, team_b, 100)
+    cache.resolve(team_a, team_b, 100)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+    register_status_effect(StatusEffectType("outcome-cache-test-haste", category="buff", speed_multiplier=2.0))
+    cache.resolve(team_a, team_b, 100)
+    assert cache.invalidations == 1 and cache.misses == 2
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+from rest.app import app, battle_service
+
+
+def test_preview_leaves_the_stored_battle_unchanged():
+    client = TestClient(app)
+    names = ["K1", "K2"]
+    battle_id = client.post("/battles", json={"team_a": names, "team_b": names}).json()["battle_id"]
+    client.post(f"/battles/{battle_id}/turn")
+    before = client.get(f"/battles/{battle_id}").json()
+
+    response = client.post(f"/battles/{battle_id}/preview", params={"turns": 5})
+    assert response.status_code == 200
+    preview = response.json()
+    assert len(preview["results"]) == 5
+    assert preview["summary"]["version"] > before["version"]
+
+    after = client.get(f"/battles/{battle_id}").json()
+    assert after == before
+    assert battle_service.get_version(battle_id) == before["version"]
+    health = [c["current_health"] for c in after["team_a"] + after["team_b"]]
+    assert health == [c["current_health"] for c in before["team_a"] + before["team_b"]]
@@ -0,0 +1,56 @@
+import contextvars
+import threading
+import time
+
+from core.profiler import SamplingProfiler, track_thread
+from core.service.battle_service import BattleService
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_only_tracked_threads_are_sampled():
+    stop = threading.Event()
+
+    def bystander():
+        while not stop.is_set():
+            spin(0.01)
+
+    def tracked():
+        with track_thread():
+            spin(0.1)
+
+    other = threading.Thread(target=bystander)
+    other.start()
+    try:
+        with SamplingProfiler(interval=0.001) as profiler:
+            # Thread pools copy the caller's context, which carries the active profiler
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(tracked,))
+            worker.start()
+            worker.join()
+    finally:
+        stop.set()
+        other.join()
+
+    stacks = profiler.collapsed()
+    assert profiler.samples > 0 and "tracked" in stacks
+    assert "bystander" not in stacks
+    assert not profiler.threads
+
+
+def test_track_thread_without_a_profiler_does_nothing():
+    with track_thread():
+        pass
+
+
+def test_jobs_submitted_to_the_service_are_sampled():
+    service = BattleService()
+    try:
+        with SamplingProfiler(interval=0.001) as profiler:
+            service.submit(spin, 0.1).result()
+    finally:
+        service.shutdown()
+    assert "spin" in profiler.collapsed()
@@ -0,0 +1,67 @@
+import pickle
+
+import pytest
+
+from core.model.battle.recording import Recording, record
+from core.service.battle_service import BattleService
+from core.service.battle_store import BoundedBattleStore
+from core.service.shared_store import ShardedBattleStore
+
+
+@pytest.fixture(params=["bounded", "sharded"])
+def service(request, tmp_path, monkeypatch):
+    if request.param == "bounded":
+        store = BoundedBattleStore(max_size=1, spill_path=str(tmp_path / "spill.db"))
+    else:
+        monkeypatch.setattr(ShardedBattleStore, "MAX_RECORDING_CHUNKS", 4)
+        store = ShardedBattleStore(str(tmp_path / "shared"), shards=2, cache_size=1)
+    yield BattleService(store=store)
+    store.close()
+
+
+def test_pickled_battle_leaves_its_recorder_out():
+    service = BattleService()
+    _, battle = service.create_battle(["A"], ["B"], record=True)
+    battle.step()
+    assert battle.recorder is not None
+    assert pickle.loads(pickle.dumps(battle)).recorder is None
+
+
+def test_recording_survives_spills_and_saves(service):
+    battle_id, _ = service.create_battle(["A", "B"], ["C", "D"], seed=7, record=True)
+    for _ in range(10):
+        list(service.autoplay_iter(battle_id, 3))
+        service.create_battle(["E"], ["F"])  # pushes the recorded battle out of memory
+
+    recording = Recording.from_bytes(service.get_recording(battle_id))
+    battle = service.get_battle(battle_id)
+    replayed = recording.replay()
+    assert len(recording) == len(battle.battle_log)
+    assert replayed.current_turn == battle.current_turn
+    assert [bc.current_health for bc in replayed.roster] == [bc.current_health for bc in battle.roster]
+
+
+def test_shared_store_appends_recording_chunks(tmp_path):
+    store = ShardedBattleStore(str(tmp_path / "shared"), shards=1)
+    other_worker = ShardedBattleStore(str(tmp_path / "shared"), shards=1)
+    service = BattleService(store=store)
+    battle_id, battle = service.create_battle(["A", "B"], ["C", "D"], seed=3)
+    record(battle, keyframe_interval=2)
+    store.put(battle_id, battle)
+    for _ in range(3):
+        service.autoplay(battle_id, 2)
+    assert battle.recorder.saved == (4, 6, 3)
+    chunks = store._dbs[0].execute("SELECT COUNT(*) FROM recording_chunks").fetchone()[0]
+    assert chunks == 4
+
+    # Another worker loads the battle with its recording and keeps recording it
+    continued = BattleService(store=other_worker)
+    continued.autoplay(battle_id, 2)
+    recording = Recording.from_bytes(continued.get_recording(battle_id))
+    assert len(recording) == 8 and len(recording.keyframes) == 4
+    assert recording.replay().current_turn == other_worker.get(battle_id).current_turn
+
+    other_worker.delete(battle_id)
+    assert store._dbs[0].execute("SELECT COUNT(*) FROM recording_chunks").fetchone()[0] == 0
+    store.close()
+    other_worker.close()
@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from rest.app import app
+
+TEAMS = {"team_a": ["A1", "A2"], "team_b": ["B1"]}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_resolve_returns_the_winner_and_turn_count(client):
+    response = client.post("/battles/resolve", json=TEAMS)
+    assert response.status_code == 200
+    outcome = response.json()
+    assert outcome["state"] == "victory"
+    assert outcome["turns"] > 0
+    assert {s["name"] for s in outcome["survivors"]} <= {"A1", "A2"}
+    assert client.post("/battles/resolve", json=TEAMS).json() == outcome
+
+
+def test_resolve_stops_at_max_turns(client):
+    outcome = client.post("/battles/resolve", json={**TEAMS, "max_turns": 1}).json()
+    assert (outcome["state"], outcome["turns"]) == ("ongoing", 1)
+
+
+@pytest.mark.parametrize("max_turns", [0, -1, "many"])
+def test_resolve_rejects_an_invalid_max_turns(client, max_turns):
+    response = client.post("/battles/resolve", json={**TEAMS, "max_turns": max_turns})
+    assert response.status_code == 422
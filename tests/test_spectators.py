@@ -0,0 +1,57 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from rest.app import app, battle_service
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def create_battle(client):
+    names = ["K1", "K2"]
+    return client.post("/battles", json={"team_a": names, "team_b": names}).json()["battle_id"]
+
+
+def test_join_sends_a_snapshot(client):
+    battle_id = create_battle(client)
+    client.post(f"/battles/{battle_id}/turn")
+    with client.websocket_connect(f"/battles/{battle_id}/ws") as ws:
+        snapshot = ws.receive_json()
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["version"] == 1
+    assert snapshot["battle"] == client.get(f"/battles/{battle_id}").json()
+
+
+def test_turn_sends_a_delta(client):
+    battle_id = create_battle(client)
+    with client.websocket_connect(f"/battles/{battle_id}/ws") as ws:
+        snapshot = ws.receive_json()
+        client.post(f"/battles/{battle_id}/turn")
+        delta = ws.receive_json()
+    summary = client.get(f"/battles/{battle_id}").json()
+    assert delta["type"] == "delta"
+    assert (delta["from_version"], delta["version"]) == (snapshot["version"], snapshot["version"] + 1)
+    assert delta["log"] == summary["log"]
+    assert [c["slot"] for c in delta["characters"]] == [2]  # only the attacked knight changed
+
+
+def test_spectator_behind_its_queue_gets_a_new_snapshot(client, monkeypatch):
+    monkeypatch.setattr(battle_service._spectators, "max_queue", 1)
+    battle_id = create_battle(client)
+    resyncs = battle_service.spectator_stats()["resyncs"]
+    with client.websocket_connect(f"/battles/{battle_id}/ws") as ws:
+        snapshot = ws.receive_json()
+
+        def play_turns():
+            # On the socket's event loop, so all three deltas arrive before it can send any
+            for _ in range(3):
+                battle_service.next_turn(battle_id)
+
+        ws.portal.call(play_turns)
+        resync = ws.receive_json()
+    assert resync["type"] == "snapshot"
+    assert resync["version"] == snapshot["version"] + 3
+    assert len(resync["battle"]["log"]) == 3
+    assert battle_service.spectator_stats()["resyncs"] > resyncs
@@ -0,0 +1,51 @@
+import pytest
+
+from core.model.battle.battle import Battle
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+
+def duel():
+    """A0 and B0 alternate turns, A0 first; nobody dies within these tests."""
+    return Battle([Knight("A0", 5, CharacterElement.FIRE, health=100000, damage=1)],
+                  [Knight("B0", 5, CharacterElement.WATER, health=100000, damage=1)])
+
+
+def actors(battle, count):
+    return [battle.roster[battle.battle_log[battle.step()].actor].character.name for _ in range(count)]
+
+
+def test_burn_ticks_its_value_at_the_end_of_every_turn():
+    battle = duel()
+    plain = battle.fork()
+    holder = battle.roster[1]
+    holder.add_status_effect("burn", 3, 7)
+    for turn, actor in enumerate(["A0", "B0", "A0"], start=1):
+        assert actors(battle, 1) == actors(plain, 1) == [actor]
+        assert plain.roster[1].current_health - holder.current_health == 7 * turn
+    assert not holder.has_status_effect("burn")
+    battle.step()
+    plain.step()
+    assert plain.roster[1].current_health - holder.current_health == 21
+
+
+@pytest.mark.parametrize("duration", [1, 2, 5, 31, 32, 33, 70])
+def test_effect_expires_after_exactly_its_duration(duration):
+    # Durations around and beyond the timer wheel size land in reused buckets
+    battle = duel()
+    holder = battle.roster[1]
+    holder.add_status_effect("regen", duration, 0)
+    for _ in range(duration):
+        assert holder.has_status_effect("regen")
+        battle.step()
+    assert not holder.has_status_effect("regen")
+
+
+def test_stun_skips_exactly_one_turn_then_wears_off():
+    battle = duel()
+    plain = battle.fork()
+    # Applied during turn 0, it lasts through turn 1, which B0 would have taken
+    battle.roster[1].add_status_effect("stun", 2)
+    assert actors(plain, 8) == ["A0", "B0"] * 4
+    assert actors(battle, 8) == ["A0", "A0"] + ["B0", "A0"] * 3
+    assert not battle.roster[1].has_status_effect("stun")
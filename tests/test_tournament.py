@@ -0,0 +1,67 @@
+import json
+from collections import Counter
+
+import pytest
+
+from core.model.battle.team_spec import TeamSpec
+from core.service.tournament import Team, Tournament
+
+
+def teams(count):
+    return [Team(f"t{i}", TeamSpec([f"K{i}", f"K{i + 1}"], 3 + i % 4)) for i in range(count)]
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_replays_only_the_truncated_last_match(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    full = Tournament(teams(3), workers=1).run(output)
+    assert len(full) == 6
+
+    with open(output, "rb") as f:
+        data = f.read()
+    with open(output, "wb") as f:
+        f.write(data[:-10])  # killed in the middle of the last line
+
+    played = []
+    resumed = Tournament(teams(3), workers=1).run(output, on_result=played.append)
+    assert [result["match"] for result in played] == [full[-1]["match"]]
+    assert sorted(r["match"] for r in resumed) == sorted(r["match"] for r in full)
+    assert read_lines(output) == resumed
+
+
+def test_swiss_with_an_odd_count_gives_one_bye_per_round(tmp_path):
+    results = Tournament(teams(5), "swiss", rounds=4, workers=1).run(str(tmp_path / "swiss.jsonl"))
+    for round_no in range(1, 5):
+        in_round = [r for r in results if r["round"] == round_no]
+        byes = [r for r in in_round if r["state"] == "bye"]
+        assert len(byes) == 1 and byes[0]["team_b"] is None and byes[0]["winner"] == byes[0]["team_a"]
+        appearances = Counter(team for r in in_round for team in (r["team_a"], r["team_b"]) if team)
+        assert sorted(appearances) == [f"t{i}" for i in range(5)]
+        assert set(appearances.values()) == {1}
+    bye_teams = [r["team_a"] for r in results if r["state"] == "bye"]
+    assert len(set(bye_teams)) == len(bye_teams)
+
+
+def test_resume_with_a_different_config_is_rejected(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    Tournament(teams(3), workers=1).run(output)
+    with pytest.raises(ValueError, match="different"):
+        Tournament(teams(3), max_turns=10, workers=1).run(output)
+    with pytest.raises(ValueError, match="different"):
+        Tournament(teams(4), workers=1).run(output)
+
+
+def test_existing_output_without_checkpoint_needs_overwrite(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"unrelated": true}\n')
+    with pytest.raises(ValueError, match="not a tournament checkpoint"):
+        Tournament(teams(3), workers=1).run(str(output))
+    assert output.read_text() == '{"unrelated": true}\n'
+
+    results = Tournament(teams(3), workers=1).run(str(output), overwrite=True)
+    assert len(results) == 6
+    assert read_lines(str(output)) == results
@@ -0,0 +1,49 @@
+"""Turn order of fixed rosters, recorded with the scheduler that scanned every turn meter."""
+import pytest
+
+from core.model.battle.battle import Battle
+from core.model.characters.element import CharacterElement
+from core.model.characters.knight.knight import Knight
+
+# (name, team A speeds, team B speeds, first 30 actors); nobody dies within 30 turns
+TURN_ORDERS = [
+    ("mixed_speeds", [80, 120, 7], [50, 333],
+     "B1 B1 A1 B1 A0 B1 A1 B1 B0 B1 A0 A1 B1 B1 B1 A1 A0 B1 B0 B1 A1 B1 B1 A0 A1 B1 B1 B0 B1 A1"),
+    ("ties", [80, 80], [80, 80],
+     "A0 A1 B0 B1 A0 A1 B0 B1 A0 A1 B0 B1 A0 A1 B0 B1 A0 A1 B0 B1 A0 A1 B0 B1 A0 A1 B0 B1 A0 A1"),
+    ("zero_speed", [0, 60], [90],
+     "B0 A1 B0 A1 B0 B0 A1 B0 A1 B0 B0 A1 B0 A1 B0 A1 B0 B0 A1 B0 A1 B0 B0 A1 B0 A1 B0 B0 A1 B0"),
+    ("primes", [97, 89, 83, 79, 73], [71, 67, 61, 59, 53, 47],
+     "A0 A1 A2 A3 A4 B0 B1 B2 B3 B4 A0 B5 A1 A2 A3 A4 B0 B1 A0 B2 A1 B3 A2 B4 A3 A4 A0 B5 B0 B1"),
+    ("fast_and_slow", [300], [1, 99, 100],
+     "A0 A0 B2 B1 A0 A0 A0 B2 B1 A0 A0 B2 A0 B1 A0 A0 B2 A0 B1 A0 B2 A0 A0 B1 A0 B2 A0 A0 B1 B2"),
+]
+
+
+def team(prefix, speeds, element):
+    return [Knight(f"{prefix}{i}", 5, element, speed=speed, health=100000, damage=1)
+            for i, speed in enumerate(speeds)]
+
+
+@pytest.mark.parametrize("speeds_a, speeds_b, expected", [case[1:] for case in TURN_ORDERS],
+                         ids=[case[0] for case in TURN_ORDERS])
+def test_turn_order_matches_the_recorded_sequence(speeds_a, speeds_b, expected):
+    battle = Battle(team("A", speeds_a, CharacterElement.FIRE), team("B", speeds_b, CharacterElement.WATER))
+    actors = []
+    for _ in range(30):
+        event = battle.battle_log[battle.step()]
+        actors.append(battle.roster[event.actor].character.name)
+    assert " ".join(actors) == expected
+
+
+@pytest.mark.parametrize("speeds_a, speeds_b, expected", [case[1:] for case in TURN_ORDERS],
+                         ids=[case[0] for case in TURN_ORDERS])
+def test_resolve_and_fork_keep_the_turn_order(speeds_a, speeds_b, expected):
+    battle = Battle(team("A", speeds_a, CharacterElement.FIRE), team("B", speeds_b, CharacterElement.WATER))
+    battle.resolve(10)
+    fork = battle.fork()
+    actors = []
+    for _ in range(20):
+        event = fork.battle_log[fork.step()]
+        actors.append(fork.roster[event.actor].character.name)
+    assert " ".join(actors) == " ".join(expected.split()[10:])
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from rest.app import app
+
+TEAMS = {"team_a": {"names": ["A1", "A2"]}, "team_b": {"names": ["B1", "B2"]}}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("change", [
+    {"team_a": {"names": []}},
+    {"team_b": {"names": ["B1"], "level": None}},
+    {"team_b": {"names": ["B1"], "level": -3}},
+    {"max_turns": 0},
+    {"max_turns": -1},
+    {"max_turns": None},
+    {"iterations": 0},
+])
+def test_invalid_requests_are_rejected(client, change):
+    response = client.post("/simulations/winrate", json={**TEAMS, "iterations": 10, **change})
+    assert response.status_code == 422
+
+
+def test_same_seed_gives_the_same_result(client):
+    body = {**TEAMS, "iterations": 40, "seed": 7}
+    first = client.post("/simulations/winrate", json=body)
+    second = client.post("/simulations/winrate", json=body)
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert sum(first.json()["counts"].values()) == 40
+
+
+def test_different_seed_gives_a_different_result(client):
+    first = client.post("/simulations/winrate", json={**TEAMS, "iterations": 40, "seed": 7}).json()
+    second = client.post("/simulations/winrate", json={**TEAMS, "iterations": 40, "seed": 8}).json()
+    assert (first["counts"], first["turn_histogram"]) != (second["counts"], second["turn_histogram"])